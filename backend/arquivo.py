@@ -0,0 +1,369 @@
+"""
+Arquivo morto dos pedidos: histórico fechado fora das tabelas quentes.
+
+`pedidos` e `pedido_items` crescem para sempre, e toda listagem, índice e
+agregação paga por isso. Pedidos fechados (`delivered`/`cancelled`, que não
+mudam mais) com mais de `ARCHIVE_AFTER_DAYS` dias saem do banco principal e
+vão para um SQLite separado (`ARCHIVE_DATABASE_URL`, por padrão
+`choperia-arquivo.db` ao lado do banco; se o banco principal não é um arquivo
+SQLite, sem `ARCHIVE_DATABASE_URL` não há arquivo morto):
+
+- uma linha por pedido, com os itens num único BLOB (JSON compacto com zlib)
+  e só o índice por data: bem menor que as linhas de `pedido_items` com os
+  seus índices;
+- os relatórios não mudam (os agregados de `vendas_agregadas` ficam), e
+  `reports.rebuild` também lê o arquivo;
+- `GET /pedidos/{id}` procura no arquivo quando o pedido não está mais no
+  banco principal (`get_pedido`), então o link de um pedido antigo continua
+  funcionando. As listagens (`GET /pedidos/`) só mostram o banco principal.
+
+A mudança é em lotes de `ARCHIVE_BATCH` pedidos: cada lote é copiado para o
+arquivo (com commit lá) e depois apagado do banco principal, numa transação
+curta. Se o processo cair entre os dois passos, o pedido fica nos dois lugares
+e a próxima rodada copia de novo (substituindo) e apaga; a leitura prefere o
+banco principal, então nada some nem aparece duplicado.
+
+O pedido de maior id nunca é arquivado: no SQLite, sem AUTOINCREMENT, o id de
+um pedido novo é o maior id + 1, e apagar o último faria o próximo pedido
+reaproveitar o id de um pedido arquivado.
+
+Roda pelo comando `python -m backend.scripts.archive_pedidos` e, com
+`ARCHIVE_ENABLED=1` (padrão em production), como o job `JOB_ARQUIVA` da fila
+(ver backend/jobs.py), agendado a cada `ARCHIVE_INTERVAL` segundos pelo
+lifespan. Um lote por job; se sobrou mais, o job agenda o próximo lote.
+"""
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import anyio.to_thread
+from sqlalchemy import (
+    Column, DateTime, Integer, LargeBinary, MetaData, String, Table, delete, func, insert, select,
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend import database, jobs, models, money, schemas
+
+_logger = logging.getLogger("uvicorn.error")
+
+JOB_ARQUIVA = "pedidos.arquiva"
+
+FECHADOS = ("delivered", "cancelled")
+
+# Esquema próprio do arquivo (não faz parte das migrações do banco principal)
+metadata = MetaData()
+pedidos_arquivados = Table(
+    "pedidos_arquivados",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("pedido_date", DateTime, nullable=False, index=True),
+    Column("status", String, nullable=False),
+    Column("total_price", money.Dinheiro),
+    Column("version", Integer, nullable=False),
+    # zlib(JSON [[produto_id, produto_name, unit_price em centavos, quantity], ...])
+    Column("items", LargeBinary, nullable=False),
+    Column("archived_at", DateTime, nullable=False),
+)
+
+
+def _url_padrao(url: str) -> Optional[str]:
+    """
+    `sqlite:///./choperia.db` -> `sqlite:///./choperia-arquivo.db`. Outros
+    bancos (e SQLite em memória) não têm onde pôr o arquivo ao lado: None.
+    """
+    prefixo = "sqlite:///"
+    if url.startswith(prefixo) and ":memory:" not in url:
+        raiz, ext = os.path.splitext(url[len(prefixo):])
+        return f"{prefixo}{raiz}-arquivo{ext or '.db'}"
+    return None
+
+
+@dataclass
+class ArquivoSettings:
+    enabled: bool = False
+    url: Optional[str] = None                   # None: sem arquivo morto (nada é arquivado)
+    after_days: float = 90.0
+    batch_size: int = 500
+    interval: float = 3600.0
+
+    @classmethod
+    def from_env(cls) -> "ArquivoSettings":
+        producao = os.getenv("DB_PROFILE", "dev").lower() == "production"
+        return cls(
+            enabled=os.getenv("ARCHIVE_ENABLED", "1" if producao else "0").lower() in ("1", "true", "yes"),
+            url=os.getenv("ARCHIVE_DATABASE_URL") or _url_padrao(database.settings.url),
+            after_days=float(os.getenv("ARCHIVE_AFTER_DAYS", cls.after_days)),
+            batch_size=int(os.getenv("ARCHIVE_BATCH", cls.batch_size)),
+            interval=float(os.getenv("ARCHIVE_INTERVAL", cls.interval)),
+        )
+
+
+def _comprime_itens(itens: List[Tuple[str, str, int, int]]) -> bytes:
+    return zlib.compress(json.dumps(itens, ensure_ascii=False, separators=(",", ":")).encode(), 9)
+
+
+def _descomprime_itens(blob: bytes) -> List[list]:
+    return json.loads(zlib.decompress(blob))
+
+
+class ArquivoMorto:
+    def __init__(self, settings: Optional[ArquivoSettings] = None):
+        self.settings = settings or ArquivoSettings.from_env()
+        self._engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.archived = 0
+        self.runs = 0
+        self.lookups = 0
+        self.hits = 0
+
+    # --- Banco do arquivo ---
+
+    @property
+    def ativo(self) -> bool:
+        """Arquivamento ligado e com um banco para o arquivo."""
+        return self.settings.enabled and self.settings.url is not None
+
+    def _caminho(self) -> Optional[str]:
+        prefixo = "sqlite:///"
+        url = self.settings.url
+        return url[len(prefixo):] if url.startswith(prefixo) and ":memory:" not in url else None
+
+    def existe(self) -> bool:
+        """O arquivo já foi criado? (as leituras não criam um arquivo vazio)"""
+        if self._engine is not None:
+            return True
+        if self.settings.url is None:
+            return False
+        caminho = self._caminho()
+        return caminho is None or os.path.exists(caminho)
+
+    def engine(self) -> Engine:
+        """Engine do arquivo, com o mesmo perfil do banco principal; cria o arquivo e a tabela no primeiro uso."""
+        if self.settings.url is None:
+            raise RuntimeError(
+                "Sem arquivo morto: defina ARCHIVE_DATABASE_URL (o banco principal não é um arquivo SQLite)"
+            )
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    engine = database.build_engine(dataclasses.replace(database.settings, url=self.settings.url))
+                    metadata.create_all(engine)
+                    self._engine = engine
+        return self._engine
+
+    def dispose(self) -> None:
+        with self._lock:
+            if self._engine is not None:
+                self._engine.dispose()
+                self._engine = None
+
+    # --- Arquivamento ---
+
+    def corte(self, dias: Optional[float] = None) -> datetime:
+        """Pedidos anteriores a este instante (UTC, como `pedido_date`) podem ser arquivados."""
+        return datetime.utcnow() - timedelta(days=self.settings.after_days if dias is None else dias)
+
+    def candidatos(self, db: Session, antes: datetime, limite: Optional[int] = None):
+        """Pedidos fechados anteriores a `antes`, do mais antigo para o mais novo (nunca o de maior id)."""
+        ultimo = select(func.max(models.Pedido.id)).scalar_subquery()
+        query = (
+            select(models.Pedido.id)
+            .where(models.Pedido.status.in_(FECHADOS), models.Pedido.pedido_date < antes, models.Pedido.id < ultimo)
+            .order_by(models.Pedido.pedido_date, models.Pedido.id)
+        )
+        return query.limit(limite) if limite is not None else query
+
+    def arquiva_lote(self, db: Session, antes: datetime, limite: Optional[int] = None) -> int:
+        """
+        Copia até `limite` pedidos fechados anteriores a `antes` para o arquivo
+        (commit lá) e os apaga de `db`, sem commit. Retorna quantos moveu.
+        """
+        limite = limite or self.settings.batch_size
+        ids = db.execute(self.candidatos(db, antes, limite)).scalars().all()
+        if not ids:
+            return 0
+        itens: Dict[int, list] = {pedido_id: [] for pedido_id in ids}
+        for row in db.execute(
+            select(
+                models.PedidoItem.pedido_id, models.PedidoItem.produto_id, models.PedidoItem.produto_name,
+                models.PedidoItem.unit_price, models.PedidoItem.quantity,
+            )
+            .where(models.PedidoItem.pedido_id.in_(ids))
+            .order_by(models.PedidoItem.pedido_id, models.PedidoItem.id)
+        ):
+            itens[row.pedido_id].append(
+                (row.produto_id, row.produto_name, money.centavos(row.unit_price), row.quantity)
+            )
+        agora = datetime.utcnow()
+        linhas = [
+            {
+                "id": row.id,
+                "pedido_date": row.pedido_date,
+                "status": row.status,
+                "total_price": row.total_price,
+                "version": row.version,
+                "items": _comprime_itens(itens[row.id]),
+                "archived_at": agora,
+            }
+            for row in db.execute(
+                select(
+                    models.Pedido.id, models.Pedido.pedido_date, models.Pedido.status,
+                    models.Pedido.total_price, models.Pedido.version,
+                ).where(models.Pedido.id.in_(ids))
+            )
+        ]
+        # Substitui o que uma rodada interrompida já tinha copiado
+        with self.engine().begin() as conn:
+            conn.execute(delete(pedidos_arquivados).where(pedidos_arquivados.c.id.in_(ids)))
+            conn.execute(insert(pedidos_arquivados), linhas)
+
+        db.execute(
+            delete(models.PedidoItem).where(models.PedidoItem.pedido_id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            delete(models.Pedido).where(models.Pedido.id.in_(ids), models.Pedido.status.in_(FECHADOS))
+            .execution_options(synchronize_session=False)
+        )
+        with self._lock:
+            self.archived += len(linhas)
+        return len(linhas)
+
+    def arquiva(self, db: Session, dias: Optional[float] = None, limite: Optional[int] = None) -> int:
+        """Arquiva tudo o que passou da idade, um lote (e um commit) por vez. Retorna o total movido."""
+        antes = self.corte(dias)
+        limite = limite or self.settings.batch_size
+        total = 0
+        with self._lock:
+            self.runs += 1
+        while True:
+            try:
+                movidos = self.arquiva_lote(db, antes, limite)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            total += movidos
+            if movidos < limite:
+                return total
+
+    # --- Leitura ---
+
+    def get_pedido(self, pedido_id: int) -> Optional[schemas.Pedido]:
+        """O pedido arquivado, no mesmo formato de GET /pedidos/{id}; None se não está no arquivo."""
+        with self._lock:
+            self.lookups += 1
+        if not self.existe():
+            return None
+        with self.engine().connect() as conn:
+            row = conn.execute(select(pedidos_arquivados).where(pedidos_arquivados.c.id == pedido_id)).first()
+        if row is None:
+            return None
+        with self._lock:
+            self.hits += 1
+        return schemas.Pedido(
+            id=row.id,
+            pedido_date=row.pedido_date,
+            total_price=row.total_price,
+            status=row.status,
+            version=row.version,
+            items=[
+                schemas.PedidoItem(
+                    produto_id=produto_id,
+                    produto_name=produto_name,
+                    unit_price=money.de_centavos(unit_price),
+                    quantity=quantity,
+                )
+                for produto_id, produto_name, unit_price, quantity in _descomprime_itens(row.items)
+            ],
+        )
+
+    def itens_vendidos(self, batch_size: int = 5000) -> Iterator[tuple]:
+        """
+        Itens dos pedidos arquivados não cancelados, no formato das linhas de
+        `reports.rebuild`: (pedido_id, pedido_date, produto_id, produto_name, unit_price, quantity).
+        """
+        if not self.existe():
+            return
+        with self.engine().connect() as conn:
+            rows = conn.execute(
+                select(pedidos_arquivados.c.id, pedidos_arquivados.c.pedido_date, pedidos_arquivados.c["items"])
+                .where(pedidos_arquivados.c.status != "cancelled")
+                .execution_options(yield_per=batch_size)
+            )
+            for pedido_id, pedido_date, blob in rows:
+                for produto_id, produto_name, unit_price, quantity in _descomprime_itens(blob):
+                    yield pedido_id, pedido_date, produto_id, produto_name, money.de_centavos(unit_price), quantity
+
+    def resumo(self) -> Dict[str, Any]:
+        """Pedidos no arquivo, por mês (para o comando `status`)."""
+        if not self.existe():
+            return {"pedidos": 0, "meses": {}}
+        mes = func.strftime("%Y-%m", pedidos_arquivados.c.pedido_date)
+        with self.engine().connect() as conn:
+            meses = dict(conn.execute(select(mes, func.count()).group_by(mes).order_by(mes)).all())
+        return {"pedidos": sum(meses.values()), "meses": meses}
+
+    # --- Agendamento (lifespan) ---
+
+    def _submete(self, session_factory: sessionmaker) -> None:
+        with session_factory() as db:
+            jobs.queue.submit(db, JOB_ARQUIVA, {"antes": self.corte().isoformat(), "limite": self.settings.batch_size})
+            db.commit()
+
+    async def _agenda(self, session_factory: sessionmaker) -> None:
+        # A primeira rodada sai logo depois da subida (deploys podem ser mais frequentes que o intervalo)
+        espera = min(60.0, self.settings.interval)
+        while True:
+            await asyncio.sleep(espera)
+            espera = self.settings.interval
+            try:
+                await anyio.to_thread.run_sync(self._submete, session_factory)
+            except Exception:
+                _logger.exception("Falha ao agendar o arquivamento de pedidos")
+
+    async def start(self, session_factory: sessionmaker) -> None:
+        if self.settings.enabled and self.settings.url is None:
+            _logger.warning("Arquivamento de pedidos desligado: defina ARCHIVE_DATABASE_URL "
+                            "(o banco principal não é um arquivo SQLite)")
+        if self.ativo and self.settings.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._agenda(session_factory))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.ativo,
+            "after_days": self.settings.after_days,
+            "archived": self.archived,
+            "runs": self.runs,
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
+
+
+morto = ArquivoMorto()
+
+
+@jobs.queue.handler(JOB_ARQUIVA)
+def _arquiva_job(db: Session, payload: Dict[str, Any]) -> None:
+    """Um lote por job (transação curta no banco principal); se sobrou mais, agenda o próximo."""
+    limite = payload.get("limite") or morto.settings.batch_size
+    with morto._lock:
+        morto.runs += 1
+    movidos = morto.arquiva_lote(db, datetime.fromisoformat(payload["antes"]), limite)
+    if movidos == limite and jobs.queue.running:
+        jobs.queue.submit(db, JOB_ARQUIVA, payload)
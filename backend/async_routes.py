@@ -0,0 +1,126 @@
+"""
+Versões assíncronas das rotas quentes (catálogo e pedidos), usadas quando
+DB_ASYNC=1. Mesmos caminhos, parâmetros e respostas das rotas de `main.py`,
+mas com `AsyncSession` (ex.: aiosqlite): a espera pelo banco não ocupa uma
+thread do threadpool do Starlette, então um worker atende muito mais
+tablets simultâneos.
+"""
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import arquivo, crud_async, estoque, idempotency, pagination, schemas, web
+from backend.cache import RenderedJSON, catalog_cache, render_json
+from backend.database import get_async_db
+
+router = APIRouter()
+
+# --- Produtos ---
+
+@router.get("/produtos/", response_model=List[schemas.Produto], status_code=status.HTTP_200_OK, tags=["Produtos"])
+async def read_produtos(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=100),
+    filtros: Dict[str, Any] = Depends(web.produto_filtros),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Retorna a lista de todos os produtos cadastrados (ver `main.read_produtos`)."""
+    web.check_cursor_or_skip(cursor, skip)
+    if q is not None:
+        offset = web.busca_offset(cursor, q) + skip
+
+        async def render_busca() -> RenderedJSON:
+            produtos = await crud_async.busca_produtos(db, q, skip=offset, limit=limit, **filtros)
+            return web.render_busca_page(produtos, q, offset, limit)
+
+        chave = ("busca", q, offset, limit, *filtros.values())
+        return web.conditional_json(request, await catalog_cache.arendered(db, chave, render_busca))
+
+    after_id = web.produto_after_id(cursor)
+
+    async def render() -> RenderedJSON:
+        produtos = await crud_async.get_produtos_cached(db, skip=skip, limit=limit, after_id=after_id, **filtros)
+        return web.render_produtos_page(produtos, limit)
+
+    rendered = await catalog_cache.arendered(db, ("produtos", skip, limit, after_id, *filtros.values()), render)
+    return web.conditional_json(request, rendered)
+
+@router.get("/produtos/{produto_id}", response_model=schemas.Produto, tags=["Produtos"])
+async def read_produto(request: Request, produto_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Retorna um produto específico pelo ID (com ETag / If-None-Match)."""
+    async def render() -> RenderedJSON:
+        db_produto = await crud_async.get_produto_cached(db, produto_id=produto_id)
+        if db_produto is None:
+            raise HTTPException(status_code=404, detail="Produto not found")
+        return render_json(web.produto_adapter, db_produto)
+
+    rendered = await catalog_cache.arendered(db, ("produto", produto_id), render)
+    return web.conditional_json(request, rendered)
+
+# --- Pedidos ---
+
+@router.post("/pedidos/", response_model=schemas.Pedido, status_code=status.HTTP_201_CREATED, tags=["Pedidos"])
+async def create_new_pedido(
+    pedido: schemas.PedidoCreate,
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    """Cria um novo pedido (ver `main.create_new_pedido`)."""
+    if not pedido.items:
+        raise HTTPException(status_code=400, detail="O pedido deve ter pelo menos um item.")
+
+    async def criar():
+        try:
+            return await crud_async.create_pedido(db, pedido)
+        except estoque.EstoqueInsuficienteError as e:
+            raise HTTPException(status_code=409, detail={"message": str(e), "faltas": e.faltas})
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+    if idempotency_key is None:
+        return await criar()
+    return await idempotency.store.arun(
+        ("pedidos", idempotency.validate_key(idempotency_key)),
+        idempotency.fingerprint(pedido),
+        criar,
+        status_code=status.HTTP_201_CREATED,
+    )
+
+@router.get("/pedidos/", response_model=List[schemas.Pedido], tags=["Pedidos"])
+async def list_pedidos(
+    skip: int = 0,
+    limit: int = 100,
+    filtros: Dict[str, Any] = Depends(web.pedido_filtros),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Retorna a lista de todos os pedidos, ordenados por data."""
+    web.check_cursor_or_skip(filtros["after"], skip)
+    pedidos = await crud_async.get_pedidos(db, skip=skip, limit=limit, **filtros)
+    return web.json_response(web.pedidos_adapter, pedidos, web.next_cursor_headers(pedidos, limit, pagination.pedido_cursor))
+
+@router.get("/pedidos/resumo/", response_model=List[schemas.PedidoResumo], tags=["Pedidos"])
+async def list_pedidos_resumo(
+    skip: int = 0,
+    limit: int = 100,
+    filtros: Dict[str, Any] = Depends(web.pedido_filtros),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Retorna apenas os cabeçalhos dos pedidos (sem itens), para dashboards."""
+    web.check_cursor_or_skip(filtros["after"], skip)
+    pedidos = await crud_async.get_pedidos_resumo(db, skip=skip, limit=limit, **filtros)
+    return web.json_response(web.pedidos_resumo_adapter, pedidos, web.next_cursor_headers(pedidos, limit, pagination.pedido_cursor))
+
+@router.get("/pedidos/{pedido_id}", response_model=schemas.Pedido, tags=["Pedidos"])
+async def read_pedido(pedido_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Retorna um pedido específico pelo ID (também os já arquivados, ver backend/arquivo.py)."""
+    db_pedido = await crud_async.get_pedido(db, pedido_id=pedido_id)
+    if db_pedido is None:
+        db_pedido = await run_in_threadpool(arquivo.morto.get_pedido, pedido_id)
+    if db_pedido is None:
+        raise HTTPException(status_code=404, detail="Pedido not found")
+    return web.json_response(web.pedido_adapter, db_pedido)
@@ -0,0 +1,274 @@
+"""
+Cache em memória (por processo) do catálogo de produtos.
+
+O catálogo muda poucas vezes por dia, mas é lido em toda listagem, em todo
+GET /produtos/{id} e em cada checkout. O cache é read-through: a primeira
+leitura após expirar o TTL carrega o catálogo inteiro com uma única query e
+guarda um snapshot imutável de `schemas.Produto`, indexado por ID e por
+categoria. Leituras concorrentes nunca pegam lock; só a recarga é serializada.
+Cada snapshot também memoiza as respostas JSON já codificadas (com ETag),
+para as rotas do catálogo não re-serializarem a cada polling dos tablets.
+
+Invalidação: qualquer commit que insira/altere/remova `models.Produto`
+(via ORM ou via insert/update/delete em lote na Session) descarta o snapshot.
+Em múltiplos workers cada processo tem o seu cache; escritas feitas por
+outro processo aparecem no máximo após `CATALOG_CACHE_TTL` segundos.
+
+Catálogos maiores que `CATALOG_CACHE_MAX_SIZE` não são cacheados: as
+leituras seguem direto para o banco (contadas como `bypass`).
+"""
+import bisect
+import hashlib
+import os
+import threading
+import time
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, List, NamedTuple, Optional
+
+from pydantic import TypeAdapter
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Respostas pré-serializadas guardadas por snapshot (combinações de skip/limit/cursor)
+MAX_RENDERED_PER_SNAPSHOT = 512
+
+
+class RenderedJSON(NamedTuple):
+    """Corpo JSON já codificado, com ETag forte e headers extras da resposta."""
+    etag: str
+    body: bytes
+    headers: Dict[str, str]
+
+
+def render_json(adapter: TypeAdapter, value: Any, headers: Optional[Dict[str, str]] = None) -> RenderedJSON:
+    """
+    Serializa `value` uma única vez e deriva o ETag do conteúdo: o mesmo
+    catálogo gera o mesmo ETag em todos os workers, e qualquer mudança
+    (inclusive após recarga por TTL) gera um ETag novo.
+    """
+    # validate_python aceita tanto schemas já prontos quanto linhas do ORM
+    body = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return RenderedJSON(etag, body, headers or {})
+
+
+class CatalogSnapshot:
+    """Cópia imutável do catálogo em um instante (ordenada por ID)."""
+
+    def __init__(self, version: int, produtos: List[schemas.Produto], expires_at: float):
+        self.version = version
+        self.expires_at = expires_at
+        self.produtos = produtos
+        self.ids = [produto.id for produto in produtos]
+        self.by_id: Dict[str, schemas.Produto] = {produto.id: produto for produto in produtos}
+        self.by_category: Dict[str, List[schemas.Produto]] = {}
+        for produto in produtos:
+            self.by_category.setdefault(produto.category, []).append(produto)
+        self.ids_by_category = {
+            category: [produto.id for produto in lista] for category, lista in self.by_category.items()
+        }
+        self._rendered: Dict[Hashable, RenderedJSON] = {}
+
+    def rendered(self, key: Hashable, build: Callable[[], RenderedJSON]) -> RenderedJSON:
+        """Memoiza respostas serializadas enquanto este snapshot for o vigente."""
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            rendered = build()
+            self.remember(key, rendered)
+        return rendered
+
+    def cached(self, key: Hashable) -> Optional[RenderedJSON]:
+        return self._rendered.get(key)
+
+    def remember(self, key: Hashable, rendered: RenderedJSON) -> None:
+        if len(self._rendered) < MAX_RENDERED_PER_SNAPSHOT:
+            self._rendered[key] = rendered
+
+    def page(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+    ) -> List[schemas.Produto]:
+        """Mesma semântica de `crud.get_produtos` (filtros, ordem por ID, offset e keyset)."""
+        produtos, ids = self.produtos, self.ids
+        if category is not None:
+            produtos, ids = self.by_category.get(category, []), self.ids_by_category.get(category, [])
+        if min_price is not None or max_price is not None:
+            produtos = [
+                produto for produto in produtos
+                if (min_price is None or produto.price >= min_price)
+                and (max_price is None or produto.price <= max_price)
+            ]
+            ids = [produto.id for produto in produtos]
+        start = bisect.bisect_right(ids, after_id) if after_id is not None else 0
+        start += skip
+        return produtos[start:start + limit]
+
+
+class CatalogCache:
+    def __init__(self, ttl: float = 300.0, max_size: int = 10_000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.version = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._oversize_until = 0.0
+        self._lock = threading.Lock()
+        # Contadores aproximados (incrementos sem lock no caminho rápido)
+        self.hits = 0
+        self.misses = 0
+        self.bypass = 0
+        self.invalidations = 0
+
+    def _fresh(self) -> Optional[CatalogSnapshot]:
+        snap = self._snapshot
+        if snap is not None and time.monotonic() < snap.expires_at:
+            self.hits += 1
+            return snap
+        return None
+
+    def _statement(self):
+        return select(models.Produto).order_by(models.Produto.id).limit(self.max_size + 1)
+
+    def _install(self, version: int, rows: list) -> Optional[CatalogSnapshot]:
+        """Monta o snapshot a partir das linhas carregadas (chamado com o lock)."""
+        now = time.monotonic()
+        if len(rows) > self.max_size:
+            self._oversize_until = now + self.ttl
+            self._snapshot = None
+            return None
+        snap = CatalogSnapshot(
+            version, [schemas.Produto.model_validate(row) for row in rows], now + self.ttl
+        )
+        # Se houve invalidação durante a carga, o snapshot pode estar velho: não guarda
+        if self.version == version:
+            self._snapshot = snap
+        return snap
+
+    def snapshot(self, db: Session) -> Optional[CatalogSnapshot]:
+        """Retorna o snapshot válido (recarregando se preciso) ou None se o catálogo não cabe no cache."""
+        snap = self._fresh()
+        if snap is not None:
+            return snap
+
+        with self._lock:
+            # Outra thread pode ter recarregado enquanto esperávamos o lock
+            snap = self._fresh()
+            if snap is not None:
+                return snap
+            if time.monotonic() < self._oversize_until:
+                self.bypass += 1
+                return None
+
+            self.misses += 1
+            version = self.version
+            rows = db.execute(self._statement()).scalars().all()
+            return self._install(version, rows)
+
+    async def asnapshot(self, db: "AsyncSession") -> Optional[CatalogSnapshot]:
+        """
+        Versão assíncrona de `snapshot`. Não segura o lock durante a carga (não
+        pode bloquear o event loop): recargas simultâneas podem se repetir, o que
+        é inofensivo — só a instalação do snapshot é serializada.
+        """
+        snap = self._fresh()
+        if snap is not None:
+            return snap
+        if time.monotonic() < self._oversize_until:
+            self.bypass += 1
+            return None
+
+        self.misses += 1
+        version = self.version
+        rows = (await db.execute(self._statement())).scalars().all()
+        with self._lock:
+            return self._install(version, rows)
+
+    def rendered(self, db: Session, key: Hashable, build: Callable[[], RenderedJSON]) -> RenderedJSON:
+        """Resposta pré-serializada para `key`, reaproveitada até o snapshot mudar."""
+        snap = self.snapshot(db)
+        if snap is None:
+            return build()
+        return snap.rendered(key, build)
+
+    async def arendered(
+        self, db: "AsyncSession", key: Hashable, build: Callable[[], Awaitable[RenderedJSON]]
+    ) -> RenderedJSON:
+        """Versão assíncrona de `rendered` (`build` é uma corrotina)."""
+        snap = await self.asnapshot(db)
+        if snap is None:
+            return await build()
+        rendered = snap.cached(key)
+        if rendered is None:
+            rendered = await build()
+            snap.remember(key, rendered)
+        return rendered
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self.invalidations += 1
+            self._snapshot = None
+            self._oversize_until = 0.0
+
+    def stats(self) -> Dict[str, float]:
+        snap = self._snapshot
+        lookups = self.hits + self.misses + self.bypass
+        return {
+            "version": self.version,
+            "size": len(snap.produtos) if snap is not None else 0,
+            "ttl": self.ttl,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypass": self.bypass,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+catalog_cache = CatalogCache(
+    ttl=float(os.getenv("CATALOG_CACHE_TTL", "300")),
+    max_size=int(os.getenv("CATALOG_CACHE_MAX_SIZE", "10000")),
+)
+
+
+# --- Invalidação automática em qualquer escrita de Produto ---
+
+_CATALOGO_ALTERADO = "catalogo_alterado"
+
+@event.listens_for(Session, "before_flush")
+def _marca_produtos_alterados(session, flush_context, instances):
+    if any(
+        isinstance(obj, models.Produto)
+        for obj in (*session.new, *session.dirty, *session.deleted)
+    ):
+        session.info[_CATALOGO_ALTERADO] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _marca_escrita_em_lote(orm_execute_state):
+    if (
+        (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete)
+        and orm_execute_state.bind_mapper is not None
+        and orm_execute_state.bind_mapper.class_ is models.Produto
+    ):
+        orm_execute_state.session.info[_CATALOGO_ALTERADO] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalida_apos_commit(session):
+    if session.info.pop(_CATALOGO_ALTERADO, False):
+        catalog_cache.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _descarta_marca(session):
+    session.info.pop(_CATALOGO_ALTERADO, None)
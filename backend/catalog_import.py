@@ -0,0 +1,249 @@
+"""
+Importação em lote do catálogo (upsert de produtos) a partir de CSV ou JSON.
+
+O carregamento antigo fazia um SELECT e um commit por produto; um feed de
+fornecedor com 50 mil SKUs levava minutos. Aqui as linhas são lidas em
+streaming e processadas em blocos de `chunk_size`:
+
+- cada linha é validada com `schemas.ProdutoCreate` (as inválidas são
+  contadas como rejeitadas, com o motivo, e não derrubam o bloco);
+- um único SELECT por bloco busca os produtos que já existem;
+- um único statement (executemany) grava o bloco: INSERT ... ON CONFLICT DO
+  UPDATE no SQLite/PostgreSQL, ou INSERT + UPDATE por chave nos demais;
+- um commit por bloco (um bloco com erro é desfeito e conta como rejeitado).
+
+Linhas idênticas ao que já está no banco não são regravadas (`unchanged`).
+O commit invalida o cache do catálogo pelos eventos de Session (backend/cache.py).
+
+Formatos aceitos: CSV com cabeçalho (`id,name,description,price,image,category`),
+JSON Lines (um objeto por linha) e array JSON (lido incrementalmente).
+"""
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_ERRORS_REPORTED = 100
+
+_CAMPOS = ("name", "description", "price", "image", "category")
+
+
+class FormatoInvalidoError(ValueError):
+    """Arquivo que não é CSV/JSON/JSON Lines legível."""
+
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    rejected: int = 0
+    chunks: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def reject(self, linha: int, produto_id: Optional[str], motivo: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_ERRORS_REPORTED:
+            self.errors.append({"row": linha, "id": produto_id, "error": motivo})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "rejected": self.rejected,
+            "chunks": self.chunks,
+            "errors": self.errors,
+        }
+
+
+# --- Leitura em streaming ---
+
+def iter_csv(stream: IO[str]) -> Iterator[Dict[str, Any]]:
+    for row in csv.DictReader(stream):
+        yield {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+
+
+def iter_json(stream: IO[str], read_size: int = 64 * 1024) -> Iterator[Any]:
+    """Array JSON ou JSON Lines, decodificado objeto a objeto sem carregar o arquivo inteiro."""
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    em_array = None
+    eof = False
+
+    def pula_espacos(b: str, p: int, sep: str = "") -> int:
+        while p < len(b) and (b[p].isspace() or b[p] in sep):
+            p += 1
+        return p
+
+    while True:
+        pos = pula_espacos(buf, pos, "," if em_array else "")
+        if em_array is None and pos < len(buf):
+            em_array = buf[pos] == "["
+            if em_array:
+                pos += 1
+                continue
+        if pos < len(buf) and em_array and buf[pos] == "]":
+            return
+        try:
+            obj, fim = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                if pos >= len(buf) and not em_array:
+                    return
+                raise FormatoInvalidoError(f"JSON inválido perto da posição {e.pos}: {e.msg}") from e
+            chunk = stream.read(read_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        # Um escalar colado no fim do buffer pode estar cortado ("2." de "2.5"): lê mais antes de aceitar
+        cortado = fim == len(buf) or not (buf[fim].isspace() or buf[fim] in ",]")
+        if cortado and not eof and not isinstance(obj, (dict, list)):
+            chunk = stream.read(read_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        yield obj
+        pos = fim
+
+
+def iter_rows(stream: IO[str], fmt: str) -> Iterator[Any]:
+    if fmt == "csv":
+        return iter_csv(stream)
+    if fmt in ("json", "jsonl", "ndjson"):
+        return iter_json(stream)
+    raise FormatoInvalidoError(f"Formato desconhecido: {fmt!r} (use csv, json ou jsonl)")
+
+
+def detect_format(filename: str = "", content_type: str = "") -> str:
+    nome = filename.lower()
+    tipo = content_type.split(";")[0].strip().lower()
+    if nome.endswith(".csv") or tipo in ("text/csv", "application/csv"):
+        return "csv"
+    if nome.endswith((".jsonl", ".ndjson")) or tipo in ("application/x-ndjson", "application/jsonl"):
+        return "jsonl"
+    return "json"
+
+
+def open_text(raw: IO[bytes]) -> IO[str]:
+    # utf-8-sig: planilhas exportadas pelo Excel costumam vir com BOM
+    return io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+
+
+# --- Gravação em blocos ---
+
+def _statement_upsert(db: Session, update_existing: bool):
+    """INSERT ... ON CONFLICT nativo quando o dialeto suporta; None caso contrário."""
+    dialeto = db.get_bind().dialect.name
+    if dialeto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialeto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    stmt = dialect_insert(models.Produto)
+    if not update_existing:
+        return stmt.on_conflict_do_nothing(index_elements=["id"])
+    return stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={campo: getattr(stmt.excluded, campo) for campo in _CAMPOS},
+    )
+
+
+def _grava_bloco(db: Session, bloco: Dict[str, Dict[str, Any]], update_existing: bool, result: ImportResult) -> None:
+    existentes = {
+        row.id: row
+        for row in db.execute(
+            select(models.Produto.id, *(getattr(models.Produto, c) for c in _CAMPOS))
+            .where(models.Produto.id.in_(list(bloco)))
+        )
+    }
+    novos: List[Dict[str, Any]] = []
+    alterados: List[Dict[str, Any]] = []
+    inalterados = 0
+    for produto_id, valores in bloco.items():
+        atual = existentes.get(produto_id)
+        if atual is None:
+            novos.append(valores)
+        elif update_existing and any(getattr(atual, c) != valores[c] for c in _CAMPOS):
+            alterados.append(valores)
+        else:
+            inalterados += 1
+
+    linhas = novos + alterados
+    if linhas:
+        stmt = _statement_upsert(db, update_existing)
+        if stmt is not None:
+            db.execute(stmt, linhas)
+        else:
+            if novos:
+                db.execute(insert(models.Produto), novos)
+            if alterados:
+                db.execute(update(models.Produto), alterados)
+    db.commit()
+
+    result.inserted += len(novos)
+    result.updated += len(alterados)
+    result.unchanged += inalterados
+    result.chunks += 1
+
+
+def upsert_produtos(
+    db: Session,
+    rows: Iterable[Any],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    update_existing: bool = True,
+) -> ImportResult:
+    """
+    Insere/atualiza produtos em blocos; devolve as contagens.
+
+    `update_existing=False` só insere os que faltam (usado pelo /initialize_produtos/).
+    Dentro de um bloco, um id repetido fica com a última ocorrência.
+    """
+    result = ImportResult()
+    bloco: Dict[str, Dict[str, Any]] = {}
+    linhas_do_bloco: List[int] = []
+
+    def descarrega() -> None:
+        try:
+            _grava_bloco(db, bloco, update_existing, result)
+        except Exception as e:
+            db.rollback()
+            for linha in linhas_do_bloco:
+                result.reject(linha, None, f"bloco desfeito: {e.__class__.__name__}: {e}")
+        bloco.clear()
+        linhas_do_bloco.clear()
+
+    for linha, row in enumerate(rows, start=1):
+        produto_id = row.get("id") if isinstance(row, dict) else None
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("esperado um objeto com os campos do produto")
+            produto = schemas.ProdutoCreate.model_validate(row)
+        except (ValidationError, ValueError) as e:
+            motivo = "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+            ) if isinstance(e, ValidationError) else str(e)
+            result.reject(linha, produto_id, motivo)
+            continue
+
+        if produto.id not in bloco:
+            linhas_do_bloco.append(linha)
+        bloco[produto.id] = produto.model_dump()
+        if len(bloco) >= chunk_size:
+            descarrega()
+
+    if bloco:
+        descarrega()
+    return result
@@ -1,76 +1,427 @@
-from sqlalchemy.orm import Session
-from backend import models, schemas
-from typing import List
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.orm import Session, selectinload
+from backend import estoque, events, models, money, reports, schemas, search
+from backend.cache import catalog_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from decimal import Decimal
+
+
+class ProdutosNaoEncontradosError(ValueError):
+    """Um ou mais produtos do carrinho não existem no catálogo."""
+
+    def __init__(self, produto_ids: List[str]):
+        self.produto_ids = produto_ids
+        ids = ", ".join(f"'{pid}'" for pid in produto_ids)
+        super().__init__(f"Produto(s) com ID {ids} não encontrado(s).")
 
 # --- Funções CRUD de Produto (existentes) ---
 # ... (Manter as funções get_produto, get_produtos, create_produto aqui) ...
 def get_produto(db: Session, produto_id: str):
     return db.query(models.Produto).filter(models.Produto.id == produto_id).first()
 
-def get_produtos(db: Session, skip: int = 0, limit: int = 100) -> List[models.Produto]:
-    """Retorna todos os produtos."""
-    return db.query(models.Produto).offset(skip).limit(limit).all()
+def get_produtos_by_ids(db: Session, produto_ids: Iterable[str]) -> Dict[str, models.Produto]:
+    """Busca vários produtos com um único SELECT ... IN, indexados pelo ID."""
+    ids = set(produto_ids)
+    if not ids:
+        return {}
+    produtos = db.query(models.Produto).filter(models.Produto.id.in_(ids)).all()
+    return {produto.id: produto for produto in produtos}
 
-# --- NOVAS Funções CRUD de Pedido ---
+def get_produtos(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[str] = None,
+    category: Optional[str] = None,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+) -> List[models.Produto]:
+    """
+    Retorna os produtos, ordenados por ID, opcionalmente filtrados por
+    categoria e faixa de preço.
 
-def create_pedido(db: Session, pedido: schemas.PedidoCreate):
+    `after_id` ativa a paginação por keyset: a página começa logo após esse
+    ID (usando a chave primária), com custo constante em qualquer profundidade.
     """
-    Cria um novo pedido com base na lista de itens do carrinho.
-    
-    1. Calcula o preço total e garante que todos os produtos existam.
-    2. Cria o registro do Pedido (Pedido).
-    3. Cria os registros dos Itens do Pedido (PedidoItem).
+    query = filtra_produtos(db.query(models.Produto), category, min_price, max_price)
+    if after_id is not None:
+        query = query.filter(models.Produto.id > after_id)
+    return query.order_by(models.Produto.id).offset(skip).limit(limit).all()
+
+def filtra_produtos(query, category: Optional[str] = None, min_price: Optional[Decimal] = None,
+                    max_price: Optional[Decimal] = None):
+    """Filtros de categoria/preço; funciona com `Session.query` e com `select()` (crud_async.py)."""
+    if category is not None:
+        query = query.filter(models.Produto.category == category)
+    if min_price is not None:
+        query = query.filter(models.Produto.price >= min_price)
+    if max_price is not None:
+        query = query.filter(models.Produto.price <= max_price)
+    return query
+
+def ordena_por_ids(ids: List[str], produtos: Dict[str, Any]) -> List[Any]:
+    """Produtos na ordem de `ids` (ex.: relevância da busca), ignorando os que sumiram."""
+    return [produtos[produto_id] for produto_id in ids if produto_id in produtos]
+
+# --- Leituras do catálogo via cache (ver backend/cache.py) ---
+
+def get_produto_cached(db: Session, produto_id: str):
+    """Como `get_produto`, mas servido pelo cache do catálogo quando possível."""
+    snapshot = catalog_cache.snapshot(db)
+    if snapshot is None:
+        return get_produto(db, produto_id=produto_id)
+    return snapshot.by_id.get(produto_id)
+
+def get_produtos_by_ids_cached(db: Session, produto_ids: Iterable[str]) -> Dict[str, schemas.Produto]:
     """
-    
-    total_price = 0.0
-    pedido_items_to_save = []
+    Como `get_produtos_by_ids`, mas servido pelo cache. IDs ausentes do
+    snapshot (ex.: criados por outro worker) ainda são buscados no banco.
+    """
+    ids = set(produto_ids)
+    snapshot = catalog_cache.snapshot(db)
+    if snapshot is None:
+        return get_produtos_by_ids(db, ids)
+    produtos = {produto_id: snapshot.by_id[produto_id] for produto_id in ids if produto_id in snapshot.by_id}
+    if len(produtos) < len(ids):
+        produtos.update(get_produtos_by_ids(db, ids - produtos.keys()))
+    return produtos
+
+def get_produtos_cached(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[str] = None, **filtros):
+    """Como `get_produtos`, mas servido pelo cache do catálogo quando possível."""
+    snapshot = catalog_cache.snapshot(db)
+    if snapshot is None:
+        return get_produtos(db, skip=skip, limit=limit, after_id=after_id, **filtros)
+    return snapshot.page(skip=skip, limit=limit, after_id=after_id, **filtros)
+
+def busca_produtos(db: Session, q: str, skip: int = 0, limit: int = 100, **filtros):
+    """
+    Busca textual em nome/descrição (índice FTS5, ver backend/search.py), na
+    ordem de relevância. Os filtros de categoria/preço entram na mesma consulta;
+    os produtos em si vêm do cache do catálogo.
+    """
+    stmt = search.statement_busca(q, skip=skip, limit=limit, **filtros)
+    if stmt is None:
+        return []
+    ids = list(db.execute(stmt).scalars())
+    return ordena_por_ids(ids, get_produtos_by_ids_cached(db, ids))
+
+# --- NOVAS Funções CRUD de Pedido ---
+
+# Funções puras do checkout, compartilhadas com a versão assíncrona (crud_async.py)
 
-    # 1. Valida e calcula o total
+def agrupa_quantidades(pedido: schemas.PedidoCreate) -> Dict[str, int]:
+    """Agrupa linhas repetidas do mesmo produto, preservando a ordem do carrinho."""
+    quantidades: Dict[str, int] = {}
     for item in pedido.items:
-        produto = get_produto(db, produto_id=item.produto_id)
-        if not produto:
-            # Em um cenário real, você levantaria uma HTTPException aqui
-            raise ValueError(f"Produto com ID '{item.produto_id}' não encontrado.")
-        
-        item_total = produto.price * item.quantity
-        total_price += item_total
-        
+        quantidades[item.produto_id] = quantidades.get(item.produto_id, 0) + item.quantity
+    return quantidades
+
+def precifica_itens(quantidades: Dict[str, int], produtos: Dict[str, Any]) -> Tuple[Decimal, List[dict]]:
+    """Valida que todos os produtos existem e calcula o total (exato, em Decimal) e as linhas do pedido."""
+    faltando = [produto_id for produto_id in quantidades if produto_id not in produtos]
+    if faltando:
+        # Reporta todos os IDs inexistentes de uma vez (a rota converte em 404)
+        raise ProdutosNaoEncontradosError(faltando)
+
+    total_price = money.ZERO
+    pedido_items_to_save = []
+    for produto_id, quantity in quantidades.items():
+        produto = produtos[produto_id]
+        total_price += produto.price * quantity
+
         # Prepara o PedidoItem para salvar
         pedido_items_to_save.append({
             "produto_id": produto.id,
             "produto_name": produto.name,
             "unit_price": produto.price, # Garante o preço no momento da compra
-            "quantity": item.quantity
+            "quantity": quantity
         })
+    return total_price, pedido_items_to_save
 
-    # 2. Cria o registro do Pedido (Pedido)
-    db_pedido = models.Pedido(
+def categorias_do_pedido(quantidades: Dict[str, int], produtos: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    return {produto_id: produtos[produto_id].category for produto_id in quantidades}
+
+def novo_pedido(total_price: Decimal) -> models.Pedido:
+    return models.Pedido(
+        pedido_date=datetime.utcnow(),
         total_price=total_price,
-        status="pending" # O status mudaria para 'approved' após a integração com MP
+        status="pending", # O status mudaria para 'approved' após a integração com MP
+        version=1,
     )
-    db.add(db_pedido)
-    db.commit()
-    db.refresh(db_pedido)
+
+def monta_resposta_pedido(db_pedido: models.Pedido, pedido_items: List[dict]) -> schemas.Pedido:
+    """
+    Monta a resposta antes do commit, que expira os atributos:
+    assim não precisamos reler o pedido e os itens do banco.
+    """
+    return schemas.Pedido(
+        id=db_pedido.id,
+        pedido_date=db_pedido.pedido_date,
+        total_price=db_pedido.total_price,
+        status=db_pedido.status,
+        version=db_pedido.version,
+        items=[schemas.PedidoItem(**item_data) for item_data in pedido_items],
+    )
+
+def create_pedido(db: Session, pedido: schemas.PedidoCreate):
+    """
+    Cria um novo pedido com base na lista de itens do carrinho.
     
-    # 3. Cria os registros dos Itens do Pedido (PedidoItem)
-    for item_data in pedido_items_to_save:
-        db_pedido_item = models.PedidoItem(**item_data, pedido_id=db_pedido.id)
-        db.add(db_pedido_item)
+    1. Calcula o preço total e garante que todos os produtos existam
+       (cache do catálogo ou uma única consulta, linhas repetidas são somadas).
+    2. Reserva o estoque com um único UPDATE condicional (ver backend/estoque.py);
+       sem estoque, levanta EstoqueInsuficienteError e nada é gravado.
+    3. Cria o registro do Pedido (Pedido).
+    4. Cria os registros dos Itens do Pedido (PedidoItem).
+    5. Agenda a soma do pedido nos agregados de vendas, que roda depois do
+       commit num worker (ver backend/reports.py e backend/jobs.py).
+    6. Publica `pedido.criado` para as telas conectadas em /pedidos/stream/.
 
-    db.commit()
-    db.refresh(db_pedido) # Refresca para incluir os 'items'
-    return db_pedido
+    Pedido, itens, estoque e o job entram em uma única transação (um commit). Retorna o
+    `schemas.Pedido` já montado, sem reconsultar o banco.
+    """
+    quantidades = agrupa_quantidades(pedido)
+
+    # 1. Valida e calcula o total a partir do cache do catálogo (ou de uma única consulta)
+    produtos = get_produtos_by_ids_cached(db, quantidades)
+    total_price, pedido_items_to_save = precifica_itens(quantidades, produtos)
+
+    db_pedido = novo_pedido(total_price)
+    try:
+        # 2. Desconta o estoque do carrinho inteiro (a condição e o desconto no mesmo UPDATE)
+        estoque.baixa(db, quantidades)
+
+        # 3. Cria o registro do Pedido (Pedido). O flush obtém o ID sem commit,
+        # então pedido e itens entram na mesma transação (nada de pedido órfão).
+        db.add(db_pedido)
+        db.flush()
+
+        # 4. Cria os registros dos Itens do Pedido (PedidoItem) em um único INSERT em lote
+        db.execute(
+            insert(models.PedidoItem),
+            [dict(item_data, pedido_id=db_pedido.id) for item_data in pedido_items_to_save],
+        )
+
+        # 5. Agregados de vendas por hora/produto: job despachado no commit
+        # (com a fila parada ou cheia, roda aqui mesmo, na transação do pedido)
+        linhas = reports.linhas_de_venda(db_pedido.pedido_date, pedido_items_to_save, produtos)
+        reports.agenda_acumulo(db, linhas)
+        resposta = monta_resposta_pedido(db_pedido, pedido_items_to_save)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # 6. Avisa as telas da cozinha/bar (ver backend/events.py), só depois do commit
+    events.pedido_criado(resposta, categorias_do_pedido(quantidades, produtos))
+    return resposta
 
 def get_pedido(db: Session, pedido_id: int):
-    """Retorna um pedido específico pelo ID."""
-    return db.query(models.Pedido).filter(models.Pedido.id == pedido_id).first()
+    """Retorna um pedido específico pelo ID (itens carregados junto)."""
+    return (
+        db.query(models.Pedido)
+        .options(selectinload(models.Pedido.items))
+        .filter(models.Pedido.id == pedido_id)
+        .first()
+    )
+
+# --- Transições de status (trava otimista pela coluna `version`) ---
+
+# Máquina de estados do pedido: de -> para permitidos
+STATUS_TRANSICOES: Dict[str, frozenset] = {
+    "pending": frozenset({"approved", "cancelled"}),
+    "approved": frozenset({"shipped", "cancelled"}),
+    "shipped": frozenset({"delivered"}),
+    "delivered": frozenset(),
+    "cancelled": frozenset(),
+}
+
+def transiciona_status(
+    db: Session,
+    pedido_ids: List[int],
+    novo_status: str,
+    versoes: Optional[Dict[int, int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Move os pedidos para `novo_status`, respeitando `STATUS_TRANSICOES`.
+
+    Sem lock de tabela: lê (status, version) de todos, e um único
+    UPDATE ... WHERE (id, version) IN (...) aplica as transições válidas.
+    Quem mudou o pedido entre a leitura e o UPDATE (ou mandou em `versoes` uma
+    versão diferente da atual) fica de fora e volta como `conflict`. Cancelar
+    devolve o estoque dos itens (um UPDATE para o lote todo), na mesma
+    transação, e desconta o pedido dos agregados de vendas pelo job
+    `reports.JOB_ACUMULA`, como a venda. Depois do
+    commit, publica `pedido.status` para as telas (ver backend/events.py).
+
+    Retorna um resultado por id, na ordem recebida: updated, unchanged,
+    conflict, invalid_transition ou not_found.
+    """
+    versoes = versoes or {}
+    ids = list(dict.fromkeys(pedido_ids))
+    atuais = {
+        row.id: row
+        for row in db.execute(
+            select(models.Pedido.id, models.Pedido.status, models.Pedido.version, models.Pedido.pedido_date)
+            .where(models.Pedido.id.in_(ids))
+        )
+    }
+
+    resultados: Dict[int, Dict[str, Any]] = {}
+    candidatos: Dict[int, Any] = {}
+    for pedido_id in ids:
+        atual = atuais.get(pedido_id)
+        if atual is None:
+            resultados[pedido_id] = {"id": pedido_id, "result": "not_found"}
+            continue
+        esperado = versoes.get(pedido_id, atual.version)
+        base = {"id": pedido_id, "status": atual.status, "version": atual.version}
+        if esperado != atual.version:
+            resultados[pedido_id] = dict(base, result="conflict")
+        elif atual.status == novo_status:
+            resultados[pedido_id] = dict(base, result="unchanged")
+        elif novo_status not in STATUS_TRANSICOES.get(atual.status, ()):
+            resultados[pedido_id] = dict(base, result="invalid_transition")
+        else:
+            candidatos[pedido_id] = atual
 
-def get_pedidos(db: Session, skip: int = 0, limit: int = 100) -> List[models.Pedido]:
-    """Retorna a lista de pedidos."""
-    return db.query(models.Pedido).offset(skip).limit(limit).all()
+    try:
+        aplicados = _aplica_transicoes(db, candidatos, novo_status)
+        for pedido_id in aplicados:
+            resultados[pedido_id] = {
+                "id": pedido_id, "result": "updated", "status": novo_status, "version": aplicados[pedido_id]
+            }
+        # Outra requisição mudou o pedido depois da nossa leitura: devolve o estado de agora
+        perdidos = [pedido_id for pedido_id in candidatos if pedido_id not in aplicados]
+        if perdidos:
+            agora = {
+                row.id: row
+                for row in db.execute(
+                    select(models.Pedido.id, models.Pedido.status, models.Pedido.version)
+                    .where(models.Pedido.id.in_(perdidos))
+                )
+            }
+            for pedido_id in perdidos:
+                atual = agora.get(pedido_id)
+                if atual is None:
+                    resultados[pedido_id] = {"id": pedido_id, "result": "not_found"}
+                else:
+                    base = {"id": pedido_id, "status": atual.status, "version": atual.version}
+                    resultados[pedido_id] = dict(base, result="conflict")
+
+        itens = _itens_dos_pedidos(db, list(aplicados))
+        produtos = get_produtos_by_ids_cached(db, {item.produto_id for lista in itens.values() for item in lista})
+        if novo_status == "cancelled":
+            linhas = []
+            devolvidos: Dict[str, int] = {}
+            for pedido_id, lista in itens.items():
+                linhas += reports.linhas_de_estorno(
+                    candidatos[pedido_id].pedido_date, [item._asdict() for item in lista], produtos
+                )
+                for item in lista:
+                    devolvidos[item.produto_id] = devolvidos.get(item.produto_id, 0) + item.quantity
+            # Estorno pelo mesmo job da venda: as duas pontas com a mesma garantia de entrega
+            reports.agenda_acumulo(db, linhas)
+            estoque.devolve(db, devolvidos)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    for pedido_id in aplicados:
+        categorias = {getattr(produtos.get(item.produto_id), "category", None) for item in itens.get(pedido_id, [])}
+        events.status_alterado(pedido_id, novo_status, candidatos[pedido_id].status, categorias)
+    return [resultados[pedido_id] for pedido_id in ids]
+
+def _aplica_transicoes(db: Session, candidatos: Dict[int, Any], novo_status: str) -> Dict[int, int]:
+    """UPDATE condicional pela versão lida; retorna {id: nova versão} dos que foram aplicados."""
+    if not candidatos:
+        return {}
+    chaves = [(pedido_id, atual.version) for pedido_id, atual in candidatos.items()]
+    stmt = (
+        update(models.Pedido)
+        .where(tuple_(models.Pedido.id, models.Pedido.version).in_(chaves))
+        .values(status=novo_status, version=models.Pedido.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if db.get_bind().dialect.update_returning:
+        return dict(db.execute(stmt.returning(models.Pedido.id, models.Pedido.version)).all())
+    # Sem RETURNING: um UPDATE por pedido, conferindo o rowcount
+    aplicados = {}
+    for pedido_id, versao in chaves:
+        result = db.execute(
+            update(models.Pedido)
+            .where(models.Pedido.id == pedido_id, models.Pedido.version == versao)
+            .values(status=novo_status, version=versao + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            aplicados[pedido_id] = versao + 1
+    return aplicados
+
+def _itens_dos_pedidos(db: Session, pedido_ids: List[int]) -> Dict[int, list]:
+    if not pedido_ids:
+        return {}
+    itens: Dict[int, list] = {}
+    rows = db.execute(
+        select(
+            models.PedidoItem.pedido_id,
+            models.PedidoItem.produto_id,
+            models.PedidoItem.produto_name,
+            models.PedidoItem.unit_price,
+            models.PedidoItem.quantity,
+        ).where(models.PedidoItem.pedido_id.in_(pedido_ids))
+    )
+    for row in rows:
+        itens.setdefault(row.pedido_id, []).append(row)
+    return itens
+
+def filtra_pedidos(
+    query,
+    after: Optional[Tuple[datetime, int]] = None,
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    """
+    Aplica os filtros da listagem e a ordenação (pedido_date, id).
+    Funciona tanto com `Session.query` quanto com `select()` (crud_async.py).
+
+    `after` é a chave (pedido_date, id) do último pedido da página anterior;
+    a comparação por tupla usa os índices compostos de `models.Pedido`.
+    """
+    if status is not None:
+        query = query.filter(models.Pedido.status == status)
+    if date_from is not None:
+        query = query.filter(models.Pedido.pedido_date >= date_from)
+    if date_to is not None:
+        query = query.filter(models.Pedido.pedido_date < date_to)
+    if after is not None:
+        query = query.filter(tuple_(models.Pedido.pedido_date, models.Pedido.id) > tuple_(*after))
+    return query.order_by(models.Pedido.pedido_date, models.Pedido.id)
+
+def get_pedidos(db: Session, skip: int = 0, limit: int = 100, **filtros) -> List[models.Pedido]:
+    """
+    Retorna a lista de pedidos.
+
+    Os itens são carregados com selectinload: 2 queries por página em vez de
+    1 + N (uma por pedido) quando a resposta é serializada.
+    Filtros aceitos (ver `filtra_pedidos`): after, status, date_from, date_to.
+    """
+    query = db.query(models.Pedido).options(selectinload(models.Pedido.items))
+    return filtra_pedidos(query, **filtros).offset(skip).limit(limit).all()
+
+def get_pedidos_resumo(db: Session, skip: int = 0, limit: int = 100, **filtros) -> List[models.Pedido]:
+    """Retorna apenas os cabeçalhos dos pedidos (sem itens), em uma única query."""
+    return filtra_pedidos(db.query(models.Pedido), **filtros).offset(skip).limit(limit).all()
 
 def create_produto(db: Session, produto: schemas.ProdutoCreate):
-    """Cria e armazena um novo produto no banco de dados."""
+    """
+    Cria e armazena um novo produto no banco de dados.
+
+    O commit invalida o cache do catálogo (ver backend/cache.py).
+    """
     db_produto = models.Produto(
         id=produto.id,
         name=produto.name,
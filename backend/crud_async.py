@@ -0,0 +1,119 @@
+"""
+Versões assíncronas (AsyncSession) das funções de `crud.py` usadas pelas
+rotas quentes, para o modo DB_ASYNC=1 (ver `backend/async_routes.py`).
+
+A lógica de negócio (agrupamento do carrinho, preço, filtros da listagem) é
+a mesma de `crud.py`; aqui muda apenas a forma de falar com o banco.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from backend import crud, estoque, events, models, reports, schemas, search
+from backend.cache import catalog_cache
+
+# --- Produtos ---
+
+async def get_produto(db: AsyncSession, produto_id: str):
+    return await db.get(models.Produto, produto_id)
+
+async def get_produtos_by_ids(db: AsyncSession, produto_ids: Iterable[str]) -> Dict[str, models.Produto]:
+    """Busca vários produtos com um único SELECT ... IN, indexados pelo ID."""
+    ids = set(produto_ids)
+    if not ids:
+        return {}
+    result = await db.execute(select(models.Produto).where(models.Produto.id.in_(ids)))
+    return {produto.id: produto for produto in result.scalars()}
+
+async def get_produtos(
+    db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[str] = None, **filtros
+) -> List[models.Produto]:
+    """Retorna os produtos ordenados por ID (ver `crud.get_produtos`)."""
+    stmt = crud.filtra_produtos(select(models.Produto), **filtros)
+    if after_id is not None:
+        stmt = stmt.where(models.Produto.id > after_id)
+    result = await db.execute(stmt.order_by(models.Produto.id).offset(skip).limit(limit))
+    return list(result.scalars())
+
+# --- Leituras do catálogo via cache ---
+
+async def get_produto_cached(db: AsyncSession, produto_id: str):
+    snapshot = await catalog_cache.asnapshot(db)
+    if snapshot is None:
+        return await get_produto(db, produto_id)
+    return snapshot.by_id.get(produto_id)
+
+async def get_produtos_by_ids_cached(db: AsyncSession, produto_ids: Iterable[str]) -> Dict[str, schemas.Produto]:
+    ids = set(produto_ids)
+    snapshot = await catalog_cache.asnapshot(db)
+    if snapshot is None:
+        return await get_produtos_by_ids(db, ids)
+    produtos = {produto_id: snapshot.by_id[produto_id] for produto_id in ids if produto_id in snapshot.by_id}
+    if len(produtos) < len(ids):
+        produtos.update(await get_produtos_by_ids(db, ids - produtos.keys()))
+    return produtos
+
+async def get_produtos_cached(
+    db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[str] = None, **filtros
+):
+    snapshot = await catalog_cache.asnapshot(db)
+    if snapshot is None:
+        return await get_produtos(db, skip=skip, limit=limit, after_id=after_id, **filtros)
+    return snapshot.page(skip=skip, limit=limit, after_id=after_id, **filtros)
+
+async def busca_produtos(db: AsyncSession, q: str, skip: int = 0, limit: int = 100, **filtros):
+    """Busca textual na ordem de relevância (ver `crud.busca_produtos`)."""
+    stmt = search.statement_busca(q, skip=skip, limit=limit, **filtros)
+    if stmt is None:
+        return []
+    ids = list((await db.execute(stmt)).scalars())
+    return crud.ordena_por_ids(ids, await get_produtos_by_ids_cached(db, ids))
+
+# --- Pedidos ---
+
+async def create_pedido(db: AsyncSession, pedido: schemas.PedidoCreate) -> schemas.Pedido:
+    """
+    Mesmo fluxo de `crud.create_pedido`: uma transação, baixa do estoque,
+    INSERT em lote, job dos agregados de vendas, evento para as telas.
+    """
+    quantidades = crud.agrupa_quantidades(pedido)
+    produtos = await get_produtos_by_ids_cached(db, quantidades)
+    total_price, pedido_items_to_save = crud.precifica_itens(quantidades, produtos)
+
+    db_pedido = crud.novo_pedido(total_price)
+    try:
+        await db.run_sync(estoque.baixa, quantidades)
+        db.add(db_pedido)
+        await db.flush()
+        await db.execute(
+            insert(models.PedidoItem),
+            [dict(item_data, pedido_id=db_pedido.id) for item_data in pedido_items_to_save],
+        )
+        linhas = reports.linhas_de_venda(db_pedido.pedido_date, pedido_items_to_save, produtos)
+        await db.run_sync(reports.agenda_acumulo, linhas)
+        resposta = crud.monta_resposta_pedido(db_pedido, pedido_items_to_save)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    events.pedido_criado(resposta, crud.categorias_do_pedido(quantidades, produtos))
+    return resposta
+
+async def get_pedido(db: AsyncSession, pedido_id: int):
+    result = await db.execute(
+        select(models.Pedido)
+        .options(selectinload(models.Pedido.items))
+        .where(models.Pedido.id == pedido_id)
+    )
+    return result.scalars().first()
+
+async def get_pedidos(db: AsyncSession, skip: int = 0, limit: int = 100, **filtros) -> List[models.Pedido]:
+    stmt = select(models.Pedido).options(selectinload(models.Pedido.items))
+    result = await db.execute(crud.filtra_pedidos(stmt, **filtros).offset(skip).limit(limit))
+    return list(result.scalars())
+
+async def get_pedidos_resumo(db: AsyncSession, skip: int = 0, limit: int = 100, **filtros) -> List[models.Pedido]:
+    result = await db.execute(crud.filtra_pedidos(select(models.Pedido), **filtros).offset(skip).limit(limit))
+    return list(result.scalars())
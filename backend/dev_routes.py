@@ -0,0 +1,62 @@
+"""
+Rotas de Dev Tools (contadores internos, carga inicial do catálogo e rebuild
+dos relatórios). Só são importadas e registradas por `main.create_app`
+quando `DEV_TOOLS=1` (padrão em dev; em production precisa ser ligado).
+"""
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from backend import arquivo, catalog_import, events, idempotency, jobs, ratelimit, reports
+from backend.cache import catalog_cache
+from backend.database import get_db
+
+router = APIRouter(tags=["Dev Tools"])
+
+
+@router.get("/cache/stats/")
+def cache_stats():
+    """Contadores do cache do catálogo (hits, misses, invalidações, tamanho)."""
+    return catalog_cache.stats()
+
+@router.get("/events/stats/")
+def events_stats():
+    """Assinaturas ativas e eventos publicados no stream de pedidos."""
+    return events.broker.stats()
+
+@router.get("/idempotency/stats/")
+def idempotency_stats():
+    """Contadores do store de chaves de idempotência."""
+    return idempotency.store.stats()
+
+@router.get("/jobs/stats/")
+def jobs_stats():
+    """Fila de jobs em segundo plano: profundidade, em andamento, retentativas e falhas."""
+    return jobs.queue.stats()
+
+@router.get("/ratelimit/stats/")
+def ratelimit_stats():
+    """Baldes do rate limit: clientes/rotas ativos, requisições liberadas e recusadas (429)."""
+    return ratelimit.limiter.stats()
+
+@router.get("/arquivo/stats/")
+def arquivo_stats():
+    """Arquivo morto de pedidos: pedidos movidos, rodadas e leituras de GET /pedidos/{id} que caíram nele."""
+    return {**arquivo.morto.stats(), **arquivo.morto.resumo()}
+
+@router.post("/initialize_produtos/")
+def initialize_produtos(db: Session = Depends(get_db)):
+    """Adiciona a lista inicial de produtos do frontend ao banco de dados, se não existirem."""
+    from backend.data import initial_produtos
+
+    # Validação via schemas.ProdutoCreate e gravação em lote (só insere os que faltam)
+    count = catalog_import.upsert_produtos(db, initial_produtos, update_existing=False).inserted
+
+    if count > 0:
+        return {"message": f"{count} produtos iniciais adicionados com sucesso."}
+    else:
+        return {"message": "Todos os produtos iniciais já estavam cadastrados."}
+
+@router.post("/relatorios/rebuild/")
+def relatorio_rebuild(db: Session = Depends(get_db)):
+    """Recalcula os agregados de vendas a partir de todo o histórico de pedidos."""
+    return {"buckets": reports.rebuild(db)}
@@ -0,0 +1,133 @@
+"""
+Estoque de produtos (barris de chope em ml, comida em unidades).
+
+`crud.create_pedido` reserva o estoque com um único UPDATE condicional para
+o carrinho inteiro, na transação do pedido:
+
+    UPDATE produtos SET stock = stock - stock_per_unit * <quantidade do id>
+    WHERE id IN (...) AND (stock IS NULL OR stock >= stock_per_unit * <quantidade do id>)
+
+Não há leitura antes da escrita: a condição e o desconto acontecem no mesmo
+statement, então dois checkouts concorrentes nunca vendem o mesmo copo (no
+SQLite o lock de escrita serializa as transações; no PostgreSQL só as linhas
+dos produtos do carrinho ficam travadas até o commit). Se alguma linha ficar
+de fora, o pedido inteiro é desfeito e `EstoqueInsuficienteError` diz quais
+produtos faltaram (só nesse caso há uma query a mais).
+
+Produtos com `stock` NULL não têm controle de estoque. Cancelar um pedido
+devolve o estoque (`devolve`, também um único UPDATE).
+
+Os UPDATEs usam a tabela (Core), não o modelo: o estoque não faz parte das
+respostas do catálogo e não deve invalidar o cache dele (ver backend/cache.py).
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+
+from backend import models
+
+produtos = models.Produto.__table__
+
+
+class EstoqueInsuficienteError(ValueError):
+    """Um ou mais produtos do carrinho não têm estoque para a quantidade pedida."""
+
+    def __init__(self, faltas: List[Dict[str, Optional[int]]]):
+        self.faltas = faltas
+        ids = ", ".join(f"'{falta['produto_id']}'" for falta in faltas)
+        super().__init__(f"Estoque insuficiente para o(s) produto(s) {ids}." if ids else "Estoque insuficiente.")
+
+
+def _consumo(quantidades: Dict[str, int]):
+    """Quanto o carrinho consome de cada produto, na unidade do estoque (ml ou unidades)."""
+    return produtos.c.stock_per_unit * case(quantidades, value=produtos.c.id)
+
+
+def baixa(db: Session, quantidades: Dict[str, int]) -> None:
+    """
+    Desconta o estoque do carrinho `{produto_id: quantidade}` num único UPDATE,
+    sem commit. Levanta EstoqueInsuficienteError se algum produto não tiver o
+    suficiente (a transação do pedido deve ser desfeita).
+    """
+    if not quantidades:
+        return
+    consumo = _consumo(quantidades)
+    result = db.execute(
+        update(produtos)
+        .where(produtos.c.id.in_(quantidades), (produtos.c.stock.is_(None)) | (produtos.c.stock >= consumo))
+        .values(stock=produtos.c.stock - consumo)
+    )
+    if result.rowcount == len(quantidades):
+        return
+    # Caminho de erro: descobre quais produtos faltaram para a resposta 409
+    atuais = {
+        row.id: row
+        for row in db.execute(
+            select(produtos.c.id, produtos.c.stock, produtos.c.stock_per_unit).where(produtos.c.id.in_(quantidades))
+        )
+    }
+    faltas = []
+    for produto_id, quantidade in quantidades.items():
+        row = atuais.get(produto_id)
+        disponivel = 0 if row is None else (None if row.stock is None else row.stock // row.stock_per_unit)
+        if disponivel is not None and disponivel < quantidade:
+            faltas.append({"produto_id": produto_id, "disponivel": disponivel, "pedido": quantidade})
+    raise EstoqueInsuficienteError(faltas)
+
+
+def devolve(db: Session, quantidades: Dict[str, int]) -> None:
+    """Devolve ao estoque (pedido cancelado), num único UPDATE e sem commit."""
+    if not quantidades:
+        return
+    db.execute(
+        update(produtos)
+        .where(produtos.c.id.in_(quantidades), produtos.c.stock.isnot(None))
+        .values(stock=produtos.c.stock + _consumo(quantidades))
+    )
+
+
+MANTEM = object()  # `define`: deixa stock_min como está
+
+
+def define(
+    db: Session, produto_id: str, stock: Optional[int], stock_per_unit: int = 1, stock_min: Any = MANTEM
+) -> bool:
+    """
+    Define o estoque de um produto (ex.: barril novo) e faz commit. False se o
+    produto não existe. `stock_min` só muda quando é passado (None o remove).
+    """
+    valores: Dict[str, Any] = {"stock": stock, "stock_per_unit": stock_per_unit}
+    if stock_min is not MANTEM:
+        valores["stock_min"] = stock_min
+    result = db.execute(update(produtos).where(produtos.c.id == produto_id).values(**valores))
+    db.commit()
+    return result.rowcount == 1
+
+
+def _colunas():
+    return (
+        produtos.c.id,
+        produtos.c.name,
+        produtos.c.category,
+        produtos.c.stock,
+        produtos.c.stock_per_unit,
+        produtos.c.stock_min,
+        (produtos.c.stock // produtos.c.stock_per_unit).label("porcoes"),
+    )
+
+
+def get_estoque(db: Session, produto_id: str):
+    return db.execute(select(*_colunas()).where(produtos.c.id == produto_id)).first()
+
+
+def estoque_baixo(db: Session, category: Optional[str] = None, limit: int = 100):
+    """
+    Produtos com `stock <= stock_min`, por categoria e do menor estoque para
+    o maior. A condição é a mesma do índice parcial `ix_produtos_estoque_baixo`, então a
+    consulta só lê os produtos que estão nele.
+    """
+    query = select(*_colunas()).where(produtos.c.stock <= produtos.c.stock_min)
+    if category is not None:
+        query = query.where(produtos.c.category == category)
+    return db.execute(query.order_by(produtos.c.category, produtos.c.stock).limit(limit)).all()
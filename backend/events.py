@@ -0,0 +1,208 @@
+"""
+Pub/sub em processo dos eventos de pedidos para as telas da cozinha e do bar.
+
+Em vez de cada tela fazer polling em `GET /pedidos/`, ela assina
+`GET /pedidos/stream/` (Server-Sent Events) e recebe:
+
+- `pedido.criado`: o pedido completo, com a categoria de cada item;
+- `pedido.status`: mudança de status (`status`, `status_anterior`).
+
+Cada estação filtra por categoria (`?categories=beer` no bar,
+`?categories=food` na cozinha): recebe só os pedidos com itens da sua
+categoria, e só esses itens.
+
+Retomada: cada evento tem um `id` crescente e os últimos
+`ORDER_EVENTS_BUFFER` ficam em memória. O EventSource do navegador reconecta
+sozinho enviando `Last-Event-ID`, e a assinatura recomeça com os eventos
+perdidos. Se o id já saiu do buffer (ou é de antes de um restart), a tela
+recebe `reset` e deve recarregar a lista por `GET /pedidos/`.
+
+Backpressure: cada assinatura tem uma fila limitada (`ORDER_EVENTS_QUEUE`).
+Uma tela lenta que enche a fila é desconectada (sem segurar memória nem
+atrasar as outras) e, ao reconectar com `Last-Event-ID`, recebe o que perdeu
+pelo buffer.
+
+O broker é por processo: com vários workers, cada tela só vê os pedidos
+criados no worker em que está conectada.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from backend import schemas
+
+PEDIDO_CRIADO = "pedido.criado"
+PEDIDO_STATUS = "pedido.status"
+RESET = "reset"
+
+
+class Evento(NamedTuple):
+    id: int
+    tipo: str
+    categorias: FrozenSet[str]
+    data: Dict[str, Any]
+
+
+class Assinatura:
+    """Uma tela conectada: filtro de categorias e fila limitada no event loop dela."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, categorias: Optional[FrozenSet[str]], max_queue: int):
+        self.loop = loop
+        self.categorias = categorias
+        self.queue: "asyncio.Queue[Optional[Evento]]" = asyncio.Queue(maxsize=max_queue)
+        self.transbordou = False
+
+    def aceita(self, evento: Evento) -> bool:
+        return self.categorias is None or bool(evento.categorias & self.categorias)
+
+    def _entrega(self, evento: Evento) -> None:
+        """Roda no event loop da assinatura (via call_soon_threadsafe)."""
+        if self.transbordou or not self.aceita(evento):
+            return
+        try:
+            self.queue.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Tela lenta: descarta a fila e encerra o stream; ela retoma pelo Last-Event-ID
+            self.transbordou = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventBroker:
+    def __init__(self, buffer_size: int = 1000, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        # Ids começam no relógio (ms): um Last-Event-ID de antes de um restart cai fora do buffer
+        self._seq = time.time_ns() // 1_000_000
+        self._buffer: Deque[Evento] = deque(maxlen=buffer_size)
+        self._assinaturas: Set[Assinatura] = set()
+        self.publicados = 0
+        self.desconectados = 0
+
+    def publish(self, tipo: str, categorias: Iterable[str], data: Dict[str, Any]) -> Evento:
+        """Publica um evento; pode ser chamado de qualquer thread (rotas síncronas rodam no threadpool)."""
+        with self._lock:
+            self._seq += 1
+            evento = Evento(self._seq, tipo, frozenset(c for c in categorias if c), data)
+            self._buffer.append(evento)
+            assinaturas = list(self._assinaturas)
+            self.publicados += 1
+        for assinatura in assinaturas:
+            try:
+                assinatura.loop.call_soon_threadsafe(assinatura._entrega, evento)
+            except RuntimeError:
+                # Event loop já fechado (shutdown): a assinatura some no unsubscribe
+                pass
+        return evento
+
+    def subscribe(
+        self, categorias: Optional[Iterable[str]] = None, last_event_id: Optional[int] = None
+    ) -> Tuple[Assinatura, List[Evento], bool]:
+        """
+        Registra uma assinatura no event loop atual.
+
+        Retorna (assinatura, eventos a reenviar, precisa_reset). O registro e a
+        cópia do buffer acontecem sob o mesmo lock: nenhum evento se perde nem
+        chega duas vezes entre o replay e a fila.
+        """
+        filtro = frozenset(categorias) if categorias else None
+        assinatura = Assinatura(asyncio.get_running_loop(), filtro, self.max_queue)
+        with self._lock:
+            self._assinaturas.add(assinatura)
+            if last_event_id is None:
+                return assinatura, [], False
+            mais_antigo = self._buffer[0].id if self._buffer else self._seq + 1
+            if last_event_id > self._seq or last_event_id < mais_antigo - 1:
+                return assinatura, [], True
+            replay = [evento for evento in self._buffer if evento.id > last_event_id and assinatura.aceita(evento)]
+        return assinatura, replay, False
+
+    def unsubscribe(self, assinatura: Assinatura) -> None:
+        with self._lock:
+            self._assinaturas.discard(assinatura)
+            if assinatura.transbordou:
+                self.desconectados += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "subscribers": len(self._assinaturas),
+                "published": self.publicados,
+                "buffered": len(self._buffer),
+                "last_event_id": self._seq,
+                "slow_disconnects": self.desconectados,
+                "max_queue": self.max_queue,
+            }
+
+
+# --- Eventos de pedido ---
+
+def pedido_criado(pedido: schemas.Pedido, categorias: Dict[str, Optional[str]]) -> Evento:
+    """`categorias`: produto_id -> categoria, para o filtro por estação."""
+    data = jsonable_encoder(pedido)
+    for item in data["items"]:
+        item["category"] = categorias.get(item["produto_id"])
+    return broker.publish(PEDIDO_CRIADO, categorias.values(), data)
+
+
+def status_alterado(pedido_id: int, status: str, status_anterior: str, categorias: Iterable[str]) -> Evento:
+    data = {"id": pedido_id, "status": status, "status_anterior": status_anterior}
+    return broker.publish(PEDIDO_STATUS, categorias, data)
+
+
+# --- Formato SSE ---
+
+def formata(evento: Evento, categorias: Optional[FrozenSet[str]]) -> str:
+    data = evento.data
+    if evento.tipo == PEDIDO_CRIADO and categorias is not None:
+        # Cada estação vê só os itens dela
+        data = dict(data, items=[item for item in data["items"] if item.get("category") in categorias])
+    corpo = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+    return f"id: {evento.id}\nevent: {evento.tipo}\ndata: {corpo}\n\n"
+
+
+async def stream(
+    categorias: Optional[Iterable[str]] = None,
+    last_event_id: Optional[int] = None,
+    heartbeat: float = 15.0,
+    retry_ms: int = 3000,
+):
+    """Gerador SSE de uma assinatura: replay, eventos ao vivo e heartbeat (comentário `: ping`)."""
+    assinatura, replay, reset = broker.subscribe(categorias, last_event_id)
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        if reset:
+            yield f"event: {RESET}\ndata: {{}}\n\n"
+        for evento in replay:
+            yield formata(evento, assinatura.categorias)
+        while True:
+            try:
+                evento = await asyncio.wait_for(assinatura.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if evento is None:
+                return
+            yield formata(evento, assinatura.categorias)
+    finally:
+        broker.unsubscribe(assinatura)
+
+
+def parse_last_event_id(valor: Optional[str]) -> Optional[int]:
+    try:
+        return int(valor) if valor else None
+    except ValueError:
+        return None
+
+
+broker = EventBroker(
+    buffer_size=int(os.getenv("ORDER_EVENTS_BUFFER", "1000")),
+    max_queue=int(os.getenv("ORDER_EVENTS_QUEUE", "100")),
+)
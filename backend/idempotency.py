@@ -0,0 +1,203 @@
+"""
+Chaves de idempotência (header `Idempotency-Key`) para rotas que criam coisas.
+
+Tablets em Wi-Fi instável repetem o checkout; sem isso cada repetição cria
+outro pedido e outra preferência no Mercado Pago. Com a chave:
+
+- a primeira requisição executa normalmente e o resultado (status + corpo)
+  fica guardado por `IDEMPOTENCY_TTL` segundos;
+- repetições com a mesma chave recebem a resposta guardada
+  (header `Idempotent-Replayed: true`), sem tocar no banco nem no Mercado Pago;
+- repetições concorrentes esperam a primeira terminar (uma única execução);
+- a mesma chave com um corpo diferente é rejeitada (422);
+- se a execução falhar, a chave é liberada e a próxima tentativa executa de novo.
+
+O store é em memória, por processo, limitado a `IDEMPOTENCY_MAX_KEYS`
+entradas (as mais antigas já concluídas são descartadas primeiro). Se todas
+estiverem em andamento, chaves novas recebem 503 com `Retry-After` até
+alguma terminar, em vez de o store crescer sem limite.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Optional, Tuple
+
+import anyio
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from backend.responses import JSONResponse
+
+MAX_KEY_LENGTH = 255
+
+
+class StoredResponse(NamedTuple):
+    status_code: int
+    body: Any
+
+
+class _Entry:
+    def __init__(self, fingerprint: str, expires_at: float):
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        self.done = threading.Event()
+        self.response: Optional[StoredResponse] = None
+
+
+class IdempotencyStore:
+    def __init__(self, ttl: float = 86400.0, max_entries: int = 10_000, wait_timeout: float = 30.0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.replays = 0
+        self.executions = 0
+        self.rejected = 0
+
+    # --- controle das entradas ---
+
+    def _evict(self, now: float) -> None:
+        """Remove expiradas (a ordem de inserção é a ordem de expiração) e aplica o limite."""
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if oldest.expires_at > now:
+                break
+            self._entries.popitem(last=False)
+        if len(self._entries) >= self.max_entries:
+            for key in [k for k, e in self._entries.items() if e.done.is_set()]:
+                del self._entries[key]
+                if len(self._entries) < self.max_entries:
+                    break
+
+    def _begin(self, key: Hashable, fingerprint: str) -> Tuple[_Entry, bool]:
+        """Retorna (entrada, dono). O dono executa; os demais esperam/reaproveitam."""
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                if entry.fingerprint != fingerprint:
+                    raise HTTPException(
+                        status_code=422,
+                        detail="Idempotency-Key já usada com um corpo de requisição diferente.",
+                    )
+                return entry, False
+            if len(self._entries) >= self.max_entries:
+                # Só sobraram execuções em andamento: nada pode ser descartado
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Muitas requisições com Idempotency-Key em processamento; tente novamente.",
+                    headers={"Retry-After": "1"},
+                )
+            entry = _Entry(fingerprint, now + self.ttl)
+            self._entries[key] = entry
+            return entry, True
+
+    def _finish(self, key: Hashable, entry: _Entry, response: Optional[StoredResponse]) -> None:
+        with self._lock:
+            if response is None:
+                # Falhou: libera a chave para a próxima tentativa executar de novo
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            else:
+                entry.response = response
+            entry.done.set()
+
+    def _replay(self, entry: _Entry) -> Optional[JSONResponse]:
+        if entry.response is None:
+            return None  # a execução original falhou; o chamador tenta de novo
+        self.replays += 1
+        return JSONResponse(
+            status_code=entry.response.status_code,
+            content=entry.response.body,
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    @staticmethod
+    def _em_andamento() -> HTTPException:
+        return HTTPException(
+            status_code=409,
+            detail="Uma requisição com esta Idempotency-Key ainda está em processamento.",
+        )
+
+    # --- API para as rotas ---
+
+    def run(self, key: Hashable, fingerprint: str, fn: Callable[[], Any], status_code: int = 200) -> JSONResponse:
+        """Executa `fn` (síncrona) no máximo uma vez por chave; repetições recebem o resultado guardado."""
+        while True:
+            entry, owner = self._begin(key, fingerprint)
+            if owner:
+                break
+            if not entry.done.wait(self.wait_timeout):
+                raise self._em_andamento()
+            replay = self._replay(entry)
+            if replay is not None:
+                return replay
+        try:
+            result = fn()
+        except BaseException:
+            self._finish(key, entry, None)
+            raise
+        return self._store(key, entry, result, status_code)
+
+    async def arun(
+        self, key: Hashable, fingerprint: str, fn: Callable[[], Awaitable[Any]], status_code: int = 200
+    ) -> JSONResponse:
+        """Versão assíncrona de `run` (a espera pelo dono não bloqueia o event loop)."""
+        while True:
+            entry, owner = self._begin(key, fingerprint)
+            if owner:
+                break
+            if not await anyio.to_thread.run_sync(entry.done.wait, self.wait_timeout):
+                raise self._em_andamento()
+            replay = self._replay(entry)
+            if replay is not None:
+                return replay
+        try:
+            result = await fn()
+        except BaseException:
+            self._finish(key, entry, None)
+            raise
+        return self._store(key, entry, result, status_code)
+
+    def _store(self, key: Hashable, entry: _Entry, result: Any, status_code: int) -> JSONResponse:
+        body = jsonable_encoder(result)
+        self.executions += 1
+        self._finish(key, entry, StoredResponse(status_code, body))
+        return JSONResponse(status_code=status_code, content=body)
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._entries),
+            "max_keys": self.max_entries,
+            "ttl": self.ttl,
+            "executions": self.executions,
+            "replays": self.replays,
+            "rejected": self.rejected,
+        }
+
+
+def fingerprint(payload: Any) -> str:
+    """Impressão digital do corpo da requisição (para detectar chave reutilizada)."""
+    raw = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def validate_key(key: str) -> str:
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Idempotency-Key deve ter entre 1 e {MAX_KEY_LENGTH} caracteres.",
+        )
+    return key
+
+
+store = IdempotencyStore(
+    ttl=float(os.getenv("IDEMPOTENCY_TTL", "86400")),
+    max_entries=int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000")),
+)
@@ -0,0 +1,427 @@
+"""
+Fila de jobs em segundo plano para o trabalho que vem depois do checkout.
+
+`POST /pedidos/` devolvia a resposta só depois de atualizar os agregados de
+vendas na mesma transação. Agora `crud.create_pedido` só agenda o job
+(`queue.submit`) e responde assim que o pedido é gravado; um pool de workers
+(tarefas asyncio no loop da aplicação, com os handlers síncronos numa thread
+cada, até `JOBS_WORKERS` ao mesmo tempo) faz o resto.
+
+- `submit(db, nome, payload)` roda dentro da transação do chamador. O job só
+  vai para a fila no commit dessa transação; rollback descarta.
+- Capacidade limitada (`JOBS_MAX_QUEUE`): com a fila cheia, ou parada
+  (scripts, benchmarks, `JOBS_ENABLED=0`), o handler roda na hora, na
+  própria transação do chamador, como antes. Nada se perde por falta de espaço.
+- Retentativas: uma falha reagenda o job com backoff exponencial e jitter,
+  até `JOBS_MAX_ATTEMPTS` tentativas; depois disso ele é logado como falho.
+- Durável (`JOBS_DURABLE=1`, padrão com `DB_PROFILE=production`; no perfil
+  dev a fila fica só em memória): o job também vira uma linha da tabela `jobs`,
+  inserida na transação do pedido (outbox), e a linha é apagada na mesma
+  transação em que o handler grava. Jobs de um processo que caiu (ou que não
+  couberam na memória) são retomados por um poller a cada
+  `JOBS_POLL_INTERVAL` segundos. Um lease (`JOBS_LEASE`) impede que dois
+  workers (ou dois processos) rodem o mesmo job. Os que esgotaram as
+  tentativas ficam na tabela com status `failed`.
+- Métricas: profundidade da fila, jobs em andamento e contadores
+  (`jobs_*`, via `stats`), mais o lag (espera na fila) e a duração de cada
+  execução (`job_lag_seconds`, `job_duration_seconds`).
+- Desligamento: `stop` para de aceitar jobs, espera a fila esvaziar (até
+  `JOBS_DRAIN_TIMEOUT`) e encerra os workers. No modo em memória, o que
+  sobrar é contado em `lost`; no durável, fica na tabela para a próxima subida.
+
+Os handlers recebem `(db, payload)`: `payload` é um dict serializável em
+JSON, e `db` é uma Session (a do worker, ou a do chamador quando o job roda
+na hora). Os handlers não fazem commit.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import anyio
+import anyio.to_thread
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend import metrics, models
+
+_logger = logging.getLogger("uvicorn.error")
+
+jobs_table = models.Job.__table__
+
+Handler = Callable[[Session, Dict[str, Any]], None]
+
+_PENDENTES = "jobs_pendentes"
+
+
+@dataclass
+class JobSettings:
+    enabled: bool = True
+    workers: int = 2
+    max_queue: int = 1000
+    max_attempts: int = 5
+    backoff: float = 0.5
+    backoff_max: float = 60.0
+    durable: bool = False
+    poll_interval: float = 5.0
+    lease: float = 60.0
+    drain_timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "JobSettings":
+        producao = os.getenv("DB_PROFILE", "dev").lower() == "production"
+        return cls(
+            enabled=os.getenv("JOBS_ENABLED", "1").lower() in ("1", "true", "yes"),
+            workers=int(os.getenv("JOBS_WORKERS", cls.workers)),
+            max_queue=int(os.getenv("JOBS_MAX_QUEUE", cls.max_queue)),
+            max_attempts=int(os.getenv("JOBS_MAX_ATTEMPTS", cls.max_attempts)),
+            backoff=float(os.getenv("JOBS_BACKOFF", cls.backoff)),
+            backoff_max=float(os.getenv("JOBS_BACKOFF_MAX", cls.backoff_max)),
+            durable=os.getenv("JOBS_DURABLE", "1" if producao else "0").lower() in ("1", "true", "yes"),
+            poll_interval=float(os.getenv("JOBS_POLL_INTERVAL", cls.poll_interval)),
+            lease=float(os.getenv("JOBS_LEASE", cls.lease)),
+            drain_timeout=float(os.getenv("JOBS_DRAIN_TIMEOUT", cls.drain_timeout)),
+        )
+
+
+@dataclass
+class Job:
+    name: str
+    payload: Dict[str, Any]
+    id: Optional[int] = None        # Linha em `jobs` (modo durável)
+    attempts: int = 0
+    enfileirado: float = field(default_factory=time.monotonic)
+
+
+class JobQueue:
+    def __init__(self, settings: Optional[JobSettings] = None):
+        self.settings = settings or JobSettings()
+        self._handlers: Dict[str, Handler] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._fila: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._timers: Set[asyncio.TimerHandle] = set()
+        self._session_factory: Optional[sessionmaker] = None
+        self._limiter: Optional[anyio.CapacityLimiter] = None
+        self._aceitando = False
+        # Jobs aceitos e ainda não concluídos (fila + em execução + aguardando retentativa)
+        self._ocupados = 0
+        self._duraveis: Set[int] = set()  # ids de `jobs` já em memória (o poller não duplica)
+        self.in_progress = 0
+        self.submitted = 0
+        self.inline = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.lost = 0
+
+    def handler(self, nome: str) -> Callable[[Handler], Handler]:
+        """Registra o handler do job `nome` (decorator)."""
+        def registra(fn: Handler) -> Handler:
+            self._handlers[nome] = fn
+            return fn
+        return registra
+
+    @property
+    def running(self) -> bool:
+        return self._aceitando
+
+    # --- Produção de jobs (qualquer thread) ---
+
+    def submit(self, db: Session, nome: str, payload: Dict[str, Any]) -> None:
+        """
+        Agenda o job para depois do commit de `db`. Com a fila parada ou cheia,
+        roda o handler agora, na transação de `db`.
+        """
+        handler = self._handlers[nome]
+        if self._aceitando and self.settings.durable:
+            agora = datetime.utcnow()
+            job_id = db.execute(insert(jobs_table).values(
+                name=nome, payload=json.dumps(payload), status="pending", attempts=0, run_at=agora, created_at=agora,
+            )).inserted_primary_key[0]
+            db.info.setdefault(_PENDENTES, []).append(Job(nome, payload, job_id))
+            return
+        if self._aceitando and self._reserva():
+            db.info.setdefault(_PENDENTES, []).append(Job(nome, payload))
+            return
+        with self._lock:
+            self.inline += 1
+        handler(db, payload)
+
+    def _reserva(self) -> bool:
+        with self._lock:
+            if self._ocupados >= self.settings.max_queue:
+                return False
+            self._ocupados += 1
+            return True
+
+    def _libera(self, job: Job) -> None:
+        with self._lock:
+            self._ocupados = max(0, self._ocupados - 1)
+            self._duraveis.discard(job.id)
+
+    def _apos_commit(self, jobs: List[Job]) -> None:
+        loop = self._loop
+        with self._lock:
+            self.submitted += len(jobs)
+        for job in jobs:
+            if job.id is not None and not self._reserva():
+                continue  # Fila cheia: a linha fica em `jobs` e o poller pega depois
+            if job.id is not None:
+                with self._lock:
+                    self._duraveis.add(job.id)
+            if loop is None or loop.is_closed():
+                self._perdido(job)
+                continue
+            job.enfileirado = time.monotonic()
+            loop.call_soon_threadsafe(self._enfileira, job)
+
+    def _apos_rollback(self, jobs: List[Job]) -> None:
+        for job in jobs:
+            if job.id is None:
+                self._libera(job)
+
+    def _enfileira(self, job: Job) -> None:
+        if self._fila is None:
+            self._perdido(job)
+            return
+        self._fila.put_nowait(job)
+
+    def _perdido(self, job: Job) -> None:
+        self._libera(job)
+        if job.id is None:
+            with self._lock:
+                self.lost += 1
+            _logger.warning(f"Job {job.name} descartado: fila parada")
+
+    # --- Workers ---
+
+    async def start(self, session_factory: sessionmaker) -> None:
+        """Sobe os workers (e o poller, no modo durável) no loop atual."""
+        if not self.settings.enabled or self._aceitando:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._fila = asyncio.Queue()
+        self._limiter = anyio.CapacityLimiter(self.settings.workers)
+        self._session_factory = session_factory
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.settings.workers)]
+        if self.settings.durable:
+            self._tasks.append(asyncio.create_task(self._poller()))
+        self._aceitando = True
+
+    async def stop(self) -> None:
+        """Para de aceitar jobs, espera a fila esvaziar (até `drain_timeout`) e encerra os workers."""
+        if self._fila is None:
+            return
+        self._aceitando = False
+        try:
+            await asyncio.wait_for(self._fila.join(), timeout=self.settings.drain_timeout)
+        except asyncio.TimeoutError:
+            _logger.warning(f"Fila de jobs não esvaziou em {self.settings.drain_timeout}s: {self._fila.qsize()} na fila")
+        for timer in self._timers:
+            timer.cancel()
+        pendentes = [self._fila.get_nowait() for _ in range(self._fila.qsize())]
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for job in pendentes:
+            self._perdido(job)
+        with self._lock:
+            # Retentativas agendadas que não vão mais rodar (no modo durável continuam na tabela)
+            if not self.settings.durable:
+                self.lost += len(self._timers)
+            self._ocupados = 0
+            self._duraveis.clear()
+        self._timers.clear()
+        self._tasks = []
+        self._fila = None
+        self._loop = None
+
+    async def join(self) -> None:
+        """Espera a fila em memória esvaziar (benchmarks e scripts)."""
+        if self._fila is not None:
+            await self._fila.join()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._fila.get()
+            try:
+                await self._executa(job)
+            except Exception:
+                _logger.exception(f"Erro inesperado no worker de jobs ({job.name})")
+            finally:
+                self._fila.task_done()
+
+    async def _executa(self, job: Job) -> None:
+        lag = time.monotonic() - job.enfileirado
+        inicio = time.monotonic()
+        job.attempts += 1
+        with self._lock:
+            self.in_progress += 1
+        try:
+            rodou = await anyio.to_thread.run_sync(self._roda, job, limiter=self._limiter)
+        except Exception as e:
+            outcome = await self._falhou(job, e)
+        else:
+            outcome = "ok" if rodou else "skipped"
+            self._libera(job)
+            if rodou:
+                with self._lock:
+                    self.completed += 1
+        finally:
+            with self._lock:
+                self.in_progress -= 1
+        metrics.observe_job(job.name, lag, time.monotonic() - inicio, outcome)
+
+    def _roda(self, job: Job) -> bool:
+        """Roda o handler numa Session nova. False se outro worker já pegou o job durável."""
+        with self._session_factory() as db:
+            if job.id is not None:
+                agora = datetime.utcnow()
+                claim = db.execute(
+                    update(jobs_table)
+                    .where(
+                        jobs_table.c.id == job.id,
+                        jobs_table.c.status.in_(("pending", "running")),
+                        jobs_table.c.run_at <= agora,
+                    )
+                    .values(
+                        status="running",
+                        attempts=jobs_table.c.attempts + 1,
+                        run_at=agora + timedelta(seconds=self.settings.lease),
+                    )
+                )
+                db.commit()
+                if claim.rowcount != 1:
+                    return False
+            self._handlers[job.name](db, job.payload)
+            if job.id is not None:
+                db.execute(delete(jobs_table).where(jobs_table.c.id == job.id))
+            db.commit()
+        return True
+
+    async def _falhou(self, job: Job, erro: Exception) -> str:
+        if job.attempts >= self.settings.max_attempts:
+            _logger.error(f"Job {job.name} falhou após {job.attempts} tentativas", exc_info=erro)
+            await self._marca(job, "failed", 0.0, erro)
+            self._libera(job)
+            with self._lock:
+                self.failed += 1
+            return "failed"
+        limite = min(self.settings.backoff_max, self.settings.backoff * 2 ** (job.attempts - 1))
+        atraso = limite * random.uniform(0.5, 1.0)
+        _logger.warning(f"Job {job.name} falhou (tentativa {job.attempts}), nova tentativa em {atraso:.2f}s: {erro!r}")
+        await self._marca(job, "pending", atraso, erro)
+        with self._lock:
+            self.retried += 1
+
+        def reenfileira() -> None:
+            self._timers.discard(timer)
+            if self._fila is None:
+                return
+            job.enfileirado = time.monotonic()
+            self._fila.put_nowait(job)
+
+        timer = self._loop.call_later(atraso, reenfileira)
+        self._timers.add(timer)
+        return "retry"
+
+    async def _marca(self, job: Job, status: str, atraso: float, erro: Exception) -> None:
+        """Modo durável: grava o novo status, a próxima tentativa e o erro na linha do job."""
+        if job.id is None:
+            return
+
+        def marca() -> None:
+            with self._session_factory() as db:
+                db.execute(
+                    update(jobs_table).where(jobs_table.c.id == job.id).values(
+                        status=status,
+                        run_at=datetime.utcnow() + timedelta(seconds=atraso),
+                        last_error=repr(erro)[:500],
+                    )
+                )
+                db.commit()
+
+        try:
+            await anyio.to_thread.run_sync(marca, limiter=self._limiter)
+        except Exception:
+            # O lease expira e o poller retoma o job de qualquer forma
+            _logger.exception(f"Não foi possível atualizar o job {job.id}")
+
+    # --- Modo durável: retomada de jobs pela tabela ---
+
+    async def _poller(self) -> None:
+        while True:
+            try:
+                for job in await anyio.to_thread.run_sync(self._vencidos, limiter=self._limiter):
+                    self._fila.put_nowait(job)
+            except Exception:
+                _logger.exception("Falha ao ler a tabela de jobs")
+            await asyncio.sleep(self.settings.poll_interval)
+
+    def _vencidos(self) -> List[Job]:
+        """Jobs pendentes (ou com o lease vencido) que ainda não estão em memória, até a capacidade livre."""
+        with self._lock:
+            livres = self.settings.max_queue - self._ocupados
+            em_memoria = set(self._duraveis)
+        if livres <= 0:
+            return []
+        with self._session_factory() as db:
+            rows = db.execute(
+                select(jobs_table.c.id, jobs_table.c.name, jobs_table.c.payload, jobs_table.c.attempts)
+                .where(jobs_table.c.status.in_(("pending", "running")), jobs_table.c.run_at <= datetime.utcnow())
+                .order_by(jobs_table.c.run_at)
+                .limit(livres + len(em_memoria))
+            ).all()
+        jobs = []
+        for row in rows:
+            if row.id in em_memoria or row.name not in self._handlers or not self._reserva():
+                continue
+            with self._lock:
+                self._duraveis.add(row.id)
+            jobs.append(Job(row.name, json.loads(row.payload), row.id, row.attempts))
+        return jobs
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._aceitando,
+                "durable": self.settings.durable,
+                "workers": self.settings.workers if self._aceitando else 0,
+                "queued": self._fila.qsize() if self._fila is not None else 0,
+                "capacity": self.settings.max_queue,
+                "occupied": self._ocupados,
+                "in_progress": self.in_progress,
+                "scheduled_retries": len(self._timers),
+                "submitted": self.submitted,
+                "inline": self.inline,
+                "completed": self.completed,
+                "retried": self.retried,
+                "failed": self.failed,
+                "lost": self.lost,
+            }
+
+
+queue = JobQueue(JobSettings.from_env())
+
+
+# --- Despacho no commit da transação que agendou os jobs ---
+
+@event.listens_for(Session, "after_commit")
+def _despacha_apos_commit(session):
+    jobs = session.info.pop(_PENDENTES, None)
+    if jobs:
+        queue._apos_commit(jobs)
+
+@event.listens_for(Session, "after_rollback")
+def _descarta_apos_rollback(session):
+    jobs = session.info.pop(_PENDENTES, None)
+    if jobs:
+        queue._apos_rollback(jobs)
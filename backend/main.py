@@ -1,45 +1,30 @@
-from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
-from dotenv import load_dotenv
+"""
+API da Choperia Digital: `create_app` monta a aplicação (middlewares, rotas e
+lifespan) e `app = create_app()` é o que o uvicorn carrega.
+
+Importar este módulo não toca no banco: a checagem da versão do esquema
+(`backend/migrations.py`) roda no lifespan, na subida do worker. Subsistemas
+opcionais só são importados quando usados: o cliente do Mercado Pago (httpx)
+na primeira chamada de /mp/, as rotas de Dev Tools só com `DEV_TOOLS=1` e
+`async_routes` só com `DB_ASYNC=1`.
+"""
+import logging
 import os
-import requests
+import sys
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
 from sqlalchemy.orm import Session
-# typing
-from typing import List
-from fastapi.responses import RedirectResponse
 
-# Use imports absolutos para funcionar independentemente do CWD/start command.
-from backend import models, schemas, crud
-from backend.database import engine, get_db
-# Importa os modelos para garantir que eles sejam registrados com o SQLAlchemy
-
-# Cria as tabelas no DB se elas não existirem (incluindo Pedido e PedidoItem)
-models.Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="Choperia Digital API")
-
-# Habilita CORS para o frontend em desenvolvimento (Vite padrão em localhost:8080)
-# Ajuste `allow_origins` conforme o host/porta do seu frontend em dev.
-# Configurações de CORS — aceita localhost em dev e uma URL de frontend
-# definida via variável de ambiente FRONTEND_URL (útil em produção Render).
-_frontend_url = os.getenv("FRONTEND_URL")
-_allow_origins = ["http://localhost:8080", "http://127.0.0.1:8080"]
-if _frontend_url:
-    _allow_origins.append(_frontend_url)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=_allow_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Carrega variáveis de ambiente do arquivo backend/.env (e como fallback tenta a raiz do projeto)
-import logging
+# Carrega variáveis de ambiente do arquivo backend/.env (e como fallback tenta a raiz do projeto).
+# Precisa vir antes dos imports do backend: database, cache etc. leem a configuração ao importar.
 _logger = logging.getLogger("uvicorn.error")
 
 # Tentar carregar .env a partir de alguns locais óbvios para evitar problemas com o reloader
@@ -50,6 +35,8 @@ root_env = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env")
 for path in (backend_env, root_env):
     env_paths_tried.append(path)
     if os.path.exists(path):
+        # python-dotenv só é importado se houver um .env (em produção as variáveis vêm do ambiente)
+        from dotenv import load_dotenv
         load_dotenv(dotenv_path=path, override=False)
         _logger.info(f"Carregado .env de: {path}")
         break
@@ -57,9 +44,29 @@ else:
     # Nenhum .env encontrado nos caminhos esperados — ainda assim continuamos (variáveis podem vir do ambiente)
     _logger.info(f"Nenhum arquivo .env encontrado. Caminhos verificados: {env_paths_tried}")
 
-# Log minimal indicando se a variável de ambiente do Mercado Pago foi carregada (não imprime o token)
-_mp_token_present = bool(os.getenv("MERCADO_PAGO_ACCESS_TOKEN"))
-_logger.info(f"MERCADO_PAGO_ACCESS_TOKEN present: {_mp_token_present}")
+# Use imports absolutos para funcionar independentemente do CWD/start command.
+from backend import schemas, crud, arquivo, database, estoque, events, idempotency, jobs, metrics, migrations, pagination, ratelimit, reports, responses, search, web
+from backend.cache import RenderedJSON, catalog_cache, render_json
+from backend.database import engine, get_db
+
+
+@dataclass
+class AppSettings:
+    """Configuração da aplicação (o banco tem a sua em `database.DatabaseSettings`)."""
+    frontend_url: Optional[str] = None
+    dev_tools: bool = True
+
+    @classmethod
+    def from_env(cls) -> "AppSettings":
+        producao = os.getenv("DB_PROFILE", "dev").lower() == "production"
+        return cls(
+            frontend_url=os.getenv("FRONTEND_URL"),
+            dev_tools=os.getenv("DEV_TOOLS", "0" if producao else "1").lower() in ("1", "true", "yes"),
+        )
+
+
+# Rotas gerais; as quentes com acesso ao banco ficam em `router` (mais abaixo)
+api = APIRouter()
 
 
 # Modelo mínimo para aceitar a requisição do frontend e repassar ao Mercado Pago
@@ -70,40 +77,98 @@ class MPPreferenceIn(BaseModel):
     external_reference: Optional[str] = None
 
 
-@app.post("/mp/create_preference/", tags=["MercadoPago"])
-def create_mp_preference(pref: MPPreferenceIn):
+@api.post("/mp/create_preference/", tags=["MercadoPago"])
+async def create_mp_preference(
+    pref: MPPreferenceIn,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
     """
     Cria uma preferência no Mercado Pago usando o token do backend (.env).
     Retorna o JSON bruto que o Mercado Pago devolve (incluindo init_point / sandbox_init_point).
+
+    A chamada usa o cliente compartilhado de `backend.payments` (pool de conexões,
+    timeouts, retentativas e circuit breaker). Com o header `Idempotency-Key`,
+    repetições devolvem a mesma preferência em vez de criar outra.
     """
     token = os.getenv("MERCADO_PAGO_ACCESS_TOKEN")
     if not token:
         raise HTTPException(status_code=500, detail="MERCADO_PAGO_ACCESS_TOKEN not configured on the server")
+    from backend import payments
+
+    async def criar():
+        try:
+            return await payments.get_client().create_preference(token, pref.model_dump(exclude_none=True))
+        except (payments.CircuitOpenError, payments.RateLimitedError) as e:
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=e.detail,
+                headers={"Retry-After": str(max(1, round(e.retry_after)))},
+            )
+        except payments.MercadoPagoError as e:
+            # repassar erro do Mercado Pago de forma controlada
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    if idempotency_key is None:
+        return await criar()
+    return await idempotency.store.arun(
+        ("mp_preference", idempotency.validate_key(idempotency_key)),
+        idempotency.fingerprint(pref),
+        criar,
+    )
+
+
+@api.get("/mp/status/", tags=["MercadoPago"])
+def mp_status():
+    """Estado do circuit breaker do cliente do Mercado Pago."""
+    from backend import payments
+    return payments.get_client().stats()
 
-    url = "https://api.mercadopago.com/checkout/preferences"
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
 
-    try:
-        resp = requests.post(url, headers=headers, json=pref.dict(exclude_none=True))
-    except requests.RequestException as e:
-        raise HTTPException(status_code=502, detail=f"Erro ao conectar ao Mercado Pago: {str(e)}")
+# --- Rotas para Produtos ---
 
-    if not resp.ok:
-        # repassar erro do Mercado Pago de forma controlada
-        raise HTTPException(status_code=502, detail=f"Mercado Pago error: {resp.status_code} - {resp.text}")
+# Rotas quentes com acesso ao banco ficam em `router`: no modo DB_ASYNC=1 elas
+# são substituídas pelas versões assíncronas de `backend/async_routes.py`.
+router = APIRouter()
+
+@router.get("/produtos/", response_model=List[schemas.Produto], status_code=status.HTTP_200_OK, tags=["Produtos"])
+def read_produtos(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=100),
+    filtros: Dict[str, Any] = Depends(web.produto_filtros),
+    db: Session = Depends(get_db),
+):
+    """
+    Retorna a lista de todos os produtos cadastrados, ordenados por ID.
 
-    return resp.json()
+    Filtros: `category`, `min_price`, `max_price`. Com `q`, faz busca textual em
+    nome e descrição (sem acentos, por prefixo) e ordena por relevância.
+    Para paginar, envie em `cursor` o valor do header `X-Next-Cursor` da página anterior.
+    Suporta GET condicional: envie o `ETag` recebido em `If-None-Match` para receber 304.
+    """
+    web.check_cursor_or_skip(cursor, skip)
+    if q is not None:
+        offset = web.busca_offset(cursor, q) + skip
 
+        def render_busca() -> RenderedJSON:
+            produtos = crud.busca_produtos(db, q, skip=offset, limit=limit, **filtros)
+            return web.render_busca_page(produtos, q, offset, limit)
 
-# --- Rotas para Produtos ---
+        chave = ("busca", q, offset, limit, *filtros.values())
+        return web.conditional_json(request, catalog_cache.rendered(db, chave, render_busca))
 
-@app.get("/produtos/", response_model=List[schemas.Produto], status_code=status.HTTP_200_OK, tags=["Produtos"])
-def read_produtos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Retorna a lista de todos os produtos cadastrados."""
-    produtos = crud.get_produtos(db, skip=skip, limit=limit)
-    return produtos
+    after_id = web.produto_after_id(cursor)
 
-@app.post("/produtos/", response_model=schemas.Produto, status_code=status.HTTP_201_CREATED, tags=["Produtos"])
+    def render() -> RenderedJSON:
+        produtos = crud.get_produtos_cached(db, skip=skip, limit=limit, after_id=after_id, **filtros)
+        return web.render_produtos_page(produtos, limit)
+
+    rendered = catalog_cache.rendered(db, ("produtos", skip, limit, after_id, *filtros.values()), render)
+    return web.conditional_json(request, rendered)
+
+@api.post("/produtos/", response_model=schemas.Produto, status_code=status.HTTP_201_CREATED, tags=["Produtos"])
 def create_produto(produto: schemas.ProdutoCreate, db: Session = Depends(get_db)):
     """Cria um novo produto."""
     db_produto = crud.get_produto(db, produto_id=produto.id)
@@ -111,81 +176,381 @@ def create_produto(produto: schemas.ProdutoCreate, db: Session = Depends(get_db)
         raise HTTPException(status_code=400, detail="Produto ID already registered")
     return crud.create_produto(db=db, produto=produto)
 
-@app.get("/produtos/{produto_id}", response_model=schemas.Produto, tags=["Produtos"])
-def read_produto(produto_id: str, db: Session = Depends(get_db)):
-    """Retorna um produto específico pelo ID."""
-    db_produto = crud.get_produto(db, produto_id=produto_id)
-    if db_produto is None:
-        raise HTTPException(status_code=404, detail="Produto not found")
-    return db_produto
-
-# --- Rota de Exemplo para Popular o Banco de Dados (Opcional) ---
-
-# Use esta rota para popular o DB com os dados do seu frontend
-from .data import initial_produtos # Importaremos de um novo arquivo 'data.py'
-
-@app.post("/initialize_produtos/", tags=["Dev Tools"])
-def initialize_produtos(db: Session = Depends(get_db)):
-    """Adiciona a lista inicial de produtos do frontend ao banco de dados, se não existirem."""
-    count = 0
-    for prod_data in initial_produtos:
-        # Usa um schema Pydantic para validar e garantir a tipagem
-        produto_schema = schemas.ProdutoCreate(**prod_data) 
-        if crud.get_produto(db, produto_id=produto_schema.id) is None:
-            crud.create_produto(db, produto_schema)
-            count += 1
-    
-    if count > 0:
-        return {"message": f"{count} produtos iniciais adicionados com sucesso."}
-    else:
-        return {"message": "Todos os produtos iniciais já estavam cadastrados."}
-    
+@api.post("/produtos/import/", tags=["Produtos"])
+async def import_produtos(
+    request: Request,
+    db: Session = Depends(get_db),
+    format: Optional[str] = Query(None, pattern="^(csv|json|jsonl)$"),
+    chunk_size: Optional[int] = Query(None, ge=1, le=10_000),
+    insert_only: bool = False,
+):
+    """
+    Upsert em lote do catálogo (CSV com cabeçalho, array JSON ou JSON Lines no corpo).
+
+    O formato vem de `format` ou do Content-Type. O corpo é copiado em streaming
+    para um arquivo temporário e importado em blocos; a resposta traz as contagens
+    inserted/updated/unchanged/rejected (ver backend/catalog_import.py).
+    """
+    import csv
+    import tempfile
+
+    from backend import catalog_import
+
+    fmt = format or catalog_import.detect_format(content_type=request.headers.get("content-type", ""))
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+
+        def importa() -> catalog_import.ImportResult:
+            rows = catalog_import.iter_rows(catalog_import.open_text(spool), fmt)
+            return catalog_import.upsert_produtos(
+                db, rows, chunk_size=chunk_size or catalog_import.DEFAULT_CHUNK_SIZE, update_existing=not insert_only
+            )
+
+        try:
+            result = await run_in_threadpool(importa)
+        except (catalog_import.FormatoInvalidoError, UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Arquivo inválido: {e}")
+    return result.as_dict()
+
+@router.get("/produtos/{produto_id}", response_model=schemas.Produto, tags=["Produtos"])
+def read_produto(request: Request, produto_id: str, db: Session = Depends(get_db)):
+    """Retorna um produto específico pelo ID (com ETag / If-None-Match)."""
+    def render() -> RenderedJSON:
+        db_produto = crud.get_produto_cached(db, produto_id=produto_id)
+        if db_produto is None:
+            raise HTTPException(status_code=404, detail="Produto not found")
+        return render_json(web.produto_adapter, db_produto)
+
+    rendered = catalog_cache.rendered(db, ("produto", produto_id), render)
+    return web.conditional_json(request, rendered)
 
 # --- NOVAS Rotas para Pedidos ---
 
+@api.get("/pedidos/stream/", tags=["Pedidos"])
+async def stream_pedidos(
+    categories: Optional[List[str]] = Query(None),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    last_event_id_query: Optional[str] = Query(None, alias="last_event_id"),
+):
+    """
+    Server-Sent Events com os pedidos criados e as mudanças de status, para as
+    telas da cozinha/bar (substitui o polling em GET /pedidos/).
 
-@app.post("/pedidos/", response_model=schemas.Pedido, status_code=status.HTTP_201_CREATED, tags=["Pedidos"])
-def create_new_pedido(pedido: schemas.PedidoCreate, db: Session = Depends(get_db)):
+    `categories` filtra por estação (ex.: `?categories=food`). Ao reconectar, o
+    EventSource envia `Last-Event-ID` e recebe os eventos perdidos; se não for
+    mais possível, recebe `reset` e deve recarregar a lista. Numa conexão nova
+    (ex.: tela recarregada), o último id pode ir em `?last_event_id=`.
+    """
+    return StreamingResponse(
+        events.stream(categories, events.parse_last_event_id(last_event_id or last_event_id_query)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/pedidos/", response_model=schemas.Pedido, status_code=status.HTTP_201_CREATED, tags=["Pedidos"])
+def create_new_pedido(
+    pedido: schemas.PedidoCreate,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
     """
     Cria um novo pedido (simula o checkout) com os itens do carrinho.
     
     O frontend deve enviar uma lista de {produto_id, quantity}.
+    Sem estoque para algum item, a resposta é 409 com os produtos em falta.
+    Com o header `Idempotency-Key`, repetições (ex.: retry do tablet) devolvem
+    o mesmo pedido em vez de criar outro.
     """
     if not pedido.items:
         raise HTTPException(status_code=400, detail="O pedido deve ter pelo menos um item.")
-    
-    try:
-        return crud.create_pedido(db=db, pedido=pedido)
-    except ValueError as e:
-        # Captura o erro de produto não encontrado do CRUD
-        raise HTTPException(status_code=404, detail=str(e))
 
+    def criar():
+        try:
+            return crud.create_pedido(db=db, pedido=pedido)
+        except estoque.EstoqueInsuficienteError as e:
+            raise HTTPException(status_code=409, detail={"message": str(e), "faltas": e.faltas})
+        except ValueError as e:
+            # Captura o erro de produto não encontrado do CRUD
+            raise HTTPException(status_code=404, detail=str(e))
+
+    if idempotency_key is None:
+        return criar()
+    return idempotency.store.run(
+        ("pedidos", idempotency.validate_key(idempotency_key)),
+        idempotency.fingerprint(pedido),
+        criar,
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+@router.get("/pedidos/", response_model=List[schemas.Pedido], tags=["Pedidos"])
+def list_pedidos(
+    skip: int = 0,
+    limit: int = 100,
+    filtros: Dict[str, Any] = Depends(web.pedido_filtros),
+    db: Session = Depends(get_db),
+):
+    """
+    Retorna a lista de todos os pedidos, ordenados por data.
 
-
-@app.get("/pedidos/", response_model=List[schemas.Pedido], tags=["Pedidos"])
-def list_pedidos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Retorna a lista de todos os pedidos."""
-    pedidos = crud.get_pedidos(db, skip=skip, limit=limit)
-    return pedidos
-
-@app.get("/pedidos/{pedido_id}", response_model=schemas.Pedido, tags=["Pedidos"])
+    Para paginar, envie em `cursor` o valor do header `X-Next-Cursor` da página anterior.
+    """
+    web.check_cursor_or_skip(filtros["after"], skip)
+    pedidos = crud.get_pedidos(db, skip=skip, limit=limit, **filtros)
+    return web.json_response(web.pedidos_adapter, pedidos, web.next_cursor_headers(pedidos, limit, pagination.pedido_cursor))
+
+@router.get("/pedidos/resumo/", response_model=List[schemas.PedidoResumo], tags=["Pedidos"])
+def list_pedidos_resumo(
+    skip: int = 0,
+    limit: int = 100,
+    filtros: Dict[str, Any] = Depends(web.pedido_filtros),
+    db: Session = Depends(get_db),
+):
+    """Retorna apenas os cabeçalhos dos pedidos (sem itens), para dashboards."""
+    web.check_cursor_or_skip(filtros["after"], skip)
+    pedidos = crud.get_pedidos_resumo(db, skip=skip, limit=limit, **filtros)
+    return web.json_response(web.pedidos_resumo_adapter, pedidos, web.next_cursor_headers(pedidos, limit, pagination.pedido_cursor))
+
+@router.get("/pedidos/{pedido_id}", response_model=schemas.Pedido, tags=["Pedidos"])
 def read_pedido(pedido_id: int, db: Session = Depends(get_db)):
-    """Retorna um pedido específico pelo ID."""
+    """Retorna um pedido específico pelo ID (também os já arquivados, ver backend/arquivo.py)."""
     db_pedido = crud.get_pedido(db, pedido_id=pedido_id)
+    if db_pedido is None:
+        db_pedido = arquivo.morto.get_pedido(pedido_id)
     if db_pedido is None:
         raise HTTPException(status_code=404, detail="Pedido not found")
-    return db_pedido
+    return web.json_response(web.pedido_adapter, db_pedido)
+
 
+# --- Transições de status (máquina de estados + trava otimista, ver crud.transiciona_status) ---
 
-# Rota raiz minimal: redireciona para a documentação para evitar 404 na raiz
-@app.get("/", include_in_schema=False)
-def root():
-    return RedirectResponse(url="/docs")
+@api.patch("/pedidos/{pedido_id}/status", response_model=schemas.PedidoStatusResultado, tags=["Pedidos"])
+def update_pedido_status(pedido_id: int, update: schemas.PedidoStatusUpdate, db: Session = Depends(get_db)):
+    """
+    Move o pedido para `status` (pending -> approved -> shipped -> delivered;
+    pending/approved -> cancelled).
 
-from fastapi import Response
+    Envie em `version` a versão que a tela mostrou: se o pedido mudou desde
+    então, a resposta é 409 com o status e a versão atuais.
+    """
+    versoes = {pedido_id: update.version} if update.version is not None else None
+    resultado = crud.transiciona_status(db, [pedido_id], update.status, versoes)[0]
+    if resultado["result"] == "not_found":
+        raise HTTPException(status_code=404, detail="Pedido not found")
+    if resultado["result"] == "conflict":
+        raise HTTPException(status_code=409, detail=resultado)
+    if resultado["result"] == "invalid_transition":
+        raise HTTPException(status_code=422, detail=resultado)
+    return resultado
+
+@api.post("/pedidos/status/", response_model=List[schemas.PedidoStatusResultado], tags=["Pedidos"])
+def bulk_update_pedidos_status(update: schemas.PedidoStatusBulkUpdate, db: Session = Depends(get_db)):
+    """
+    Transição em lote (ex.: marcar 20 pedidos como delivered) numa única
+    requisição e transação. Cada pedido volta com o seu resultado: updated,
+    unchanged, conflict, invalid_transition ou not_found.
+    """
+    return crud.transiciona_status(db, update.ids, update.status, update.versions)
+
+
+# --- Relatórios de vendas (agregados pré-calculados, ver backend/reports.py) ---
+
+@api.get("/relatorios/produtos/", response_model=List[schemas.VendasProduto], tags=["Relatórios"])
+def relatorio_produtos(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    category: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """Unidades, receita e pedidos por produto no intervalo (mais vendidos primeiro)."""
+    return reports.vendas_por_produto(db, date_from=date_from, date_to=date_to, category=category, limit=limit)
+
+@api.get("/relatorios/categorias/", response_model=List[schemas.VendasCategoria], tags=["Relatórios"])
+def relatorio_categorias(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    """Unidades e receita por categoria no intervalo."""
+    return reports.vendas_por_categoria(db, date_from=date_from, date_to=date_to)
+
+@api.get("/relatorios/horas/", response_model=List[schemas.VendasPeriodo], tags=["Relatórios"])
+def relatorio_horas(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    category: Optional[str] = None,
+    produto_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Série por hora (UTC) de unidades e receita, opcionalmente de uma categoria ou produto."""
+    return reports.serie(
+        db, reports.HORA, date_from=date_from, date_to=date_to, category=category, produto_id=produto_id
+    )
+
+@api.get("/relatorios/dias/", response_model=List[schemas.VendasPeriodo], tags=["Relatórios"])
+def relatorio_dias(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    category: Optional[str] = None,
+    produto_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Série por dia (UTC) de unidades e receita, opcionalmente de uma categoria ou produto."""
+    return reports.serie(
+        db, reports.DIA, date_from=date_from, date_to=date_to, category=category, produto_id=produto_id
+    )
+
+# --- Estoque (barris em ml, comida em unidades; ver backend/estoque.py) ---
+
+@api.get("/estoque/baixo/", response_model=List[schemas.Estoque], tags=["Estoque"])
+def read_estoque_baixo(
+    category: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """Produtos com estoque no limite (`stock <= stock_min`) ou abaixo, do menor para o maior."""
+    return estoque.estoque_baixo(db, category=category, limit=limit)
+
+@api.get("/produtos/{produto_id}/estoque", response_model=schemas.Estoque, tags=["Estoque"])
+def read_estoque(produto_id: str, db: Session = Depends(get_db)):
+    """Estoque atual de um produto e quantos copos/unidades ainda dá para vender."""
+    atual = estoque.get_estoque(db, produto_id)
+    if atual is None:
+        raise HTTPException(status_code=404, detail="Produto not found")
+    return atual
 
-@app.get("/", response_model=dict, status_code=200)
-def root():
-    return {"status": "ok", "service": "choperia-api-backend"}
+@api.put("/produtos/{produto_id}/estoque", response_model=schemas.Estoque, tags=["Estoque"])
+def update_estoque(produto_id: str, update: schemas.EstoqueUpdate, db: Session = Depends(get_db)):
+    """
+    Define o estoque (ex.: barril novo de 50000 ml). `stock` nulo desliga o
+    controle do produto; sem `stock_min` no corpo, o limite atual é mantido.
+    """
+    stock_min = update.stock_min if "stock_min" in update.model_fields_set else estoque.MANTEM
+    if not estoque.define(db, produto_id, update.stock, update.stock_per_unit, stock_min):
+        raise HTTPException(status_code=404, detail="Produto not found")
+    return estoque.get_estoque(db, produto_id)
+
+
+@api.get("/", tags=["Health"])
+def root(request: Request):
+    """Health check: o worker subiu e o esquema do banco está na versão esperada."""
+    return {
+        "status": "ok",
+        "service": "choperia-api-backend",
+        "schema_version": getattr(request.app.state, "schema_version", None),
+    }
+
+
+# --- Aplicação ---
+
+def _breaker_gauges() -> List[str]:
+    # Só lê o circuit breaker se o cliente do Mercado Pago já foi carregado
+    payments = sys.modules.get("backend.payments")
+    if payments is None:
+        return []
+    client = payments.get_client()
+    breaker = client.breaker
+    return metrics.gauges(
+        "mercadopago_breaker", "Circuit breaker do Mercado Pago",
+        {"open": int(breaker.state != "closed"), "consecutive_failures": breaker.failures},
+    ) + metrics.gauges(
+        "mercadopago_quota", "Cota de chamadas ao Mercado Pago",
+        {"waits": client.quota_waits, "rejected": client.quota_rejected},
+    )
+
+
+# Contadores que já existem nos outros módulos, lidos a cada coleta (uma vez por processo)
+metrics.registry.add_collector(lambda: metrics.gauges("catalog_cache", "Cache do catálogo", catalog_cache.stats()))
+metrics.registry.add_collector(lambda: metrics.gauges("order_events", "Stream de pedidos", events.broker.stats()))
+metrics.registry.add_collector(lambda: metrics.gauges("idempotency", "Chaves de idempotência", idempotency.store.stats()))
+metrics.registry.add_collector(lambda: metrics.gauges("jobs", "Fila de jobs em segundo plano", jobs.queue.stats()))
+metrics.registry.add_collector(lambda: metrics.gauges("rate_limit", "Rate limit por cliente e rota", ratelimit.limiter.stats()))
+metrics.registry.add_collector(lambda: metrics.gauges("order_archive", "Arquivo morto de pedidos", arquivo.morto.stats()))
+metrics.registry.add_collector(_breaker_gauges)
+
+
+def read_metrics():
+    """Métricas do processo no formato texto do Prometheus (ver backend/metrics.py)."""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Subida: confere a versão do esquema (uma query; com migrações pendentes o
+    perfil dev aplica e o production falha, ver backend/migrations.py), se o
+    índice de busca existe, e sobe os workers da fila de jobs e o agendamento
+    do arquivamento de pedidos. Descida: para o agendamento, esvazia a fila de
+    jobs, fecha o cliente do Mercado Pago (se foi usado) e o engine
+    assíncrono (se foi criado).
+    """
+    app.state.schema_version = migrations.verifica(engine, auto_migrate=database.settings.auto_migrate)
+    search.detecta_indice(engine)
+    # Log minimal indicando se a variável de ambiente do Mercado Pago foi carregada (não imprime o token)
+    _logger.info(f"MERCADO_PAGO_ACCESS_TOKEN present: {bool(os.getenv('MERCADO_PAGO_ACCESS_TOKEN'))}")
+    await jobs.queue.start(database.SessionLocal)
+    await arquivo.morto.start(database.SessionLocal)
+    yield
+    await arquivo.morto.stop()
+    await jobs.queue.stop()
+    payments = sys.modules.get("backend.payments")
+    if payments is not None:
+        await payments.close_client()
+    await database.dispose_async_engine()
+
+
+def create_app(settings: Optional[AppSettings] = None) -> FastAPI:
+    """Monta a aplicação; o banco só é tocado no lifespan (ver `lifespan`)."""
+    settings = settings or AppSettings.from_env()
+    # Rate limit por cliente e rota em todas as rotas (ver backend/ratelimit.py)
+    dependencies = [Depends(ratelimit.limita)] if ratelimit.limiter.settings.enabled else []
+    app = FastAPI(
+        title="Choperia Digital API",
+        lifespan=lifespan,
+        dependencies=dependencies,
+        default_response_class=responses.JSONResponse,
+    )
+
+    # Habilita CORS para o frontend em desenvolvimento (Vite padrão em localhost:8080)
+    # e para a URL definida em FRONTEND_URL (útil em produção Render).
+    allow_origins = ["http://localhost:8080", "http://127.0.0.1:8080"]
+    if settings.frontend_url:
+        allow_origins.append(settings.frontend_url)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=allow_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "ETag", "Idempotent-Replayed", "Retry-After"],
+    )
+
+    # gzip/brotli a partir de COMPRESSION_MIN_SIZE bytes (ver backend/responses.py)
+    if responses.settings.enabled:
+        app.add_middleware(responses.CompressionMiddleware, settings=responses.settings)
+
+    # Latência por rota, requisições em andamento e SQL por requisição (GET /metrics).
+    # Adicionado por último para ficar por fora de tudo e medir a requisição inteira.
+    if metrics.settings.enabled:
+        app.add_middleware(metrics.MetricsMiddleware)
+        app.add_api_route("/metrics", read_metrics, methods=["GET"], include_in_schema=False)
+
+    app.include_router(api)
+    if settings.dev_tools:
+        from backend import dev_routes
+        app.include_router(dev_routes.router)
+
+    # Rotas com acesso ao banco: versão síncrona (padrão) ou assíncrona (DB_ASYNC=1)
+    if database.settings.async_mode:
+        from backend import async_routes
+        app.include_router(async_routes.router)
+    else:
+        app.include_router(router)
+    return app
 
 
+app = create_app()
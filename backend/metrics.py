@@ -0,0 +1,332 @@
+"""
+Métricas do processo no formato texto do Prometheus (`GET /metrics`).
+
+- `MetricsMiddleware` (ASGI puro, não bufferiza o corpo nem quebra o SSE):
+  latência por rota (o template, ex. `/pedidos/{pedido_id}`, não a URL),
+  requisições em andamento e, por requisição, quantos statements SQL rodaram
+  e quanto tempo passaram no banco.
+- `instrument_engine`: eventos `before/after_cursor_execute` do SQLAlchemy em
+  `database.engine` (e no engine assíncrono, quando criado) contam e medem
+  cada statement. O total da requisição vai num objeto guardado num
+  ContextVar, que o Starlette propaga para o threadpool das rotas síncronas.
+- `observe_mercadopago`: latência de cada tentativa de chamada ao Mercado Pago
+  (ver `backend/payments.py`), por resultado.
+- `observe_job`: espera na fila e duração de cada job em segundo plano (ver
+  `backend/jobs.py`).
+- Log de lentidão, opcional: statements acima de `SLOW_QUERY_MS` e
+  requisições acima de `SLOW_REQUEST_MS` são logados (com a rota e o SQL).
+
+Tudo fica em memória, com um lock curto por observação (uma busca binária
+no bucket e duas somas); `METRICS_ENABLED=0` desliga middleware, eventos e
+rota. Com vários workers cada processo expõe os seus próprios números.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets em segundos (requisições e chamadas externas) e em statements por requisição
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+@dataclass
+class MetricsSettings:
+    enabled: bool = True
+    slow_query_ms: float = 0.0
+    slow_request_ms: float = 0.0
+
+    @classmethod
+    def from_env(cls) -> "MetricsSettings":
+        return cls(
+            enabled=os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes"),
+            slow_query_ms=float(os.getenv("SLOW_QUERY_MS", cls.slow_query_ms)),
+            slow_request_ms=float(os.getenv("SLOW_REQUEST_MS", cls.slow_request_ms)),
+        )
+
+
+# --- Tipos de métrica ---
+
+def _labels(nomes: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    pares = [f'{nome}="{_escapa(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _escapa(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, labels: Sequence[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def cabecalho(self) -> List[str]:
+        return [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+
+
+class Counter(_Metrica):
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, labels: Sequence[str] = ()):
+        super().__init__(nome, ajuda, labels)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *valores: str, n: float = 1) -> None:
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + n
+
+    def value(self, *valores: str) -> float:
+        return self._valores.get(valores, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            itens = sorted(self._valores.items())
+        return self.cabecalho() + [f"{self.nome}{_labels(self.labels, k)} {_numero(v)}" for k, v in itens]
+
+
+class Gauge(Counter):
+    tipo = "gauge"
+
+    def dec(self, *valores: str, n: float = 1) -> None:
+        self.inc(*valores, n=-n)
+
+
+class Histogram(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(nome, ajuda, labels)
+        self.buckets = tuple(buckets)
+        # labels -> [contagem por bucket (não cumulativa; o último é +Inf), soma]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, valor: float, *valores: str) -> None:
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def count(self, *valores: str) -> int:
+        serie = self._series.get(valores)
+        return sum(serie[0]) if serie else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            itens = sorted((k, (list(contagens), soma)) for k, (contagens, soma) in self._series.items())
+        linhas = self.cabecalho()
+        for valores, (contagens, soma) in itens:
+            acumulado = 0
+            for limite, n in zip(self.buckets + (float("inf"),), contagens):
+                acumulado += n
+                le = _labels(self.labels, valores, f'le="{_numero(limite)}"')
+                linhas.append(f"{self.nome}_bucket{le} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_labels(self.labels, valores)} {_numero(soma)}")
+            linhas.append(f"{self.nome}_count{_labels(self.labels, valores)} {acumulado}")
+        return linhas
+
+
+class Registry:
+    def __init__(self):
+        self._metricas: List[_Metrica] = []
+        # Funções chamadas a cada coleta, para expor contadores que já existem em outros módulos
+        self._coletores: List[Callable[[], Iterable[str]]] = []
+
+    def register(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def add_collector(self, coletor: Callable[[], Iterable[str]]) -> None:
+        self._coletores.append(coletor)
+
+    def render(self) -> str:
+        linhas: List[str] = []
+        for metrica in self._metricas:
+            linhas.extend(metrica.render())
+        for coletor in self._coletores:
+            try:
+                linhas.extend(coletor())
+            except Exception:
+                logger.exception("Falha num coletor de métricas")
+        return "\n".join(linhas) + "\n"
+
+
+def gauges(prefixo: str, ajuda: str, valores: Dict[str, object]) -> List[str]:
+    """Linhas de gauge para um dicionário de stats (só os valores numéricos), para `add_collector`."""
+    linhas = []
+    for chave, valor in valores.items():
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            continue
+        nome = f"{prefixo}_{chave}"
+        linhas += [f"# HELP {nome} {ajuda} ({chave})", f"# TYPE {nome} gauge", f"{nome} {_numero(valor)}"]
+    return linhas
+
+
+settings = MetricsSettings.from_env()
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "Requisições HTTP atendidas.", ("method", "route", "status")))
+http_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP.", ("method", "route")))
+http_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "Requisições HTTP em andamento (inclui streams SSE abertos)."))
+http_sql_queries = registry.register(Histogram(
+    "http_request_sql_queries", "Statements SQL por requisição.", ("method", "route"), COUNT_BUCKETS))
+http_sql_seconds = registry.register(Histogram(
+    "http_request_sql_seconds", "Tempo no banco por requisição.", ("method", "route")))
+http_rate_limited = registry.register(Counter(
+    "http_rate_limited_total", "Requisições recusadas com 429 pelo rate limit.", ("method", "route")))
+http_compression_bytes = registry.register(Counter(
+    "http_compression_bytes_total", "Bytes dos corpos antes (in) e depois (out) da compressão.", ("encoding", "stage")))
+http_slow = registry.register(Counter(
+    "http_slow_requests_total", "Requisições acima de SLOW_REQUEST_MS.", ("method", "route")))
+db_queries = registry.register(Histogram(
+    "db_query_duration_seconds", "Duração de cada statement SQL.", (), QUERY_BUCKETS))
+db_slow = registry.register(Counter(
+    "db_slow_queries_total", "Statements SQL acima de SLOW_QUERY_MS."))
+mp_duration = registry.register(Histogram(
+    "mercadopago_request_duration_seconds", "Latência de cada tentativa de chamada ao Mercado Pago.", ("outcome",)))
+job_lag = registry.register(Histogram(
+    "job_lag_seconds", "Espera de cada job na fila até começar a rodar.", ("job",)))
+job_duration = registry.register(Histogram(
+    "job_duration_seconds", "Duração de cada execução de job em segundo plano.", ("job", "outcome")))
+
+
+# --- Contexto por requisição ---
+
+class RequestStats:
+    __slots__ = ("route", "queries", "sql_seconds")
+
+    def __init__(self, route: str = ""):
+        self.route = route
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+
+_atual: ContextVar[Optional[RequestStats]] = ContextVar("metrics_request", default=None)
+
+
+def current() -> Optional[RequestStats]:
+    return _atual.get()
+
+
+# --- SQL ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # O início fica no ExecutionContext do statement (descartado junto com ele se falhar)
+    context._metrics_inicio = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duracao = time.perf_counter() - context._metrics_inicio
+    db_queries.observe(duracao)
+    stats = _atual.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.sql_seconds += duracao
+    if settings.slow_query_ms and duracao * 1000.0 >= settings.slow_query_ms:
+        db_slow.inc()
+        logger.warning(
+            "SQL lento (%.1f ms) em %s: %s",
+            duracao * 1000.0, stats.route if stats is not None else "-", " ".join(statement.split())[:500],
+        )
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Liga a contagem/medição de statements num engine síncrono (ou `async_engine.sync_engine`)."""
+    if not settings.enabled or event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Mercado Pago ---
+
+def observe_mercadopago(segundos: float, outcome: str) -> None:
+    """`outcome`: 2xx/4xx/429/5xx, timeout ou error (falha de rede)."""
+    if settings.enabled:
+        mp_duration.observe(segundos, outcome)
+
+
+# --- Jobs em segundo plano ---
+
+def observe_job(job: str, lag: float, segundos: float, outcome: str) -> None:
+    """`outcome`: ok, retry, failed ou skipped (job durável já pego por outro worker)."""
+    if settings.enabled:
+        job_lag.observe(lag, job)
+        job_duration.observe(segundos, job, outcome)
+
+
+# --- Middleware ---
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Até o roteamento terminar, o log de SQL lento mostra o caminho da URL
+        stats = RequestStats(scope.get("path", ""))
+        token = _atual.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        inicio = time.perf_counter()
+        http_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duracao = time.perf_counter() - inicio
+            http_in_progress.dec()
+            _atual.reset(token)
+            # O FastAPI grava a rota encontrada no scope; sem rota (404) agrupa tudo
+            # num label só, para URLs arbitrárias não criarem séries novas
+            route = scope.get("route")
+            stats.route = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_requests.inc(method, stats.route, str(status_code))
+            http_duration.observe(duracao, method, stats.route)
+            http_sql_queries.observe(stats.queries, method, stats.route)
+            http_sql_seconds.observe(stats.sql_seconds, method, stats.route)
+            if settings.slow_request_ms and duracao * 1000.0 >= settings.slow_request_ms:
+                http_slow.inc(method, stats.route)
+                logger.warning(
+                    "Requisição lenta (%.1f ms, %d statements SQL em %.1f ms): %s %s -> %d",
+                    duracao * 1000.0, stats.queries, stats.sql_seconds * 1000.0, method, stats.route, status_code,
+                )
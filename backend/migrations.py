@@ -0,0 +1,220 @@
+"""
+Migrações versionadas do esquema do banco.
+
+Antes, `main.py` rodava `create_all`, conferia índice por índice, adicionava
+colunas por ALTER TABLE e montava o índice FTS5 a cada import, em cada
+worker. Agora cada mudança de esquema é uma função numerada em `MIGRACOES`,
+aplicada uma única vez pelo comando de upgrade:
+
+    python -m backend.scripts.migrate            # aplica as pendentes
+    python -m backend.scripts.migrate status     # versão atual x última
+
+A versão aplicada fica na tabela `schema_version`. Na subida, `verifica`
+só lê essa versão (uma query): com o banco atualizado o worker não toca no
+esquema. Com o banco atrasado, o perfil dev aplica as pendentes sozinho
+(`DB_AUTO_MIGRATE`, padrão 1 em dev e 0 em production) e o production
+recusa subir, pedindo o upgrade. Um banco mais novo que o código (rollback
+do deploy) só gera um aviso: as migrações só adicionam.
+
+Regras para migrações novas (sempre no fim da lista, nunca renumerar):
+- idempotentes: bancos antigos sem `schema_version` (ex.: o `choperia.db`
+  de dev) passam por todas, e a 1 cria as tabelas já com o modelo atual;
+- índices via `cria_indices`, um por transação curta (SQLite) ou com
+  `CREATE INDEX CONCURRENTLY` (PostgreSQL), sem bloquear as escritas durante
+  a construção inteira.
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
+
+from backend import models, money, reports, search
+
+_logger = logging.getLogger("uvicorn.error")
+
+
+class SchemaDesatualizadoError(RuntimeError):
+    """O banco está numa versão anterior à do código e o upgrade automático está desligado."""
+
+
+class Migracao(NamedTuple):
+    versao: int
+    nome: str
+    aplica: Callable[[Engine], None]
+
+
+_versao_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _versao_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+    Column("duration_ms", Integer),
+)
+
+
+# --- Helpers para as migrações ---
+
+def cria_indices(engine: Engine, *nomes: str) -> List[str]:
+    """
+    Cria os índices de `models` que ainda não existem (todos, se `nomes` vazio).
+
+    SQLite: cada índice na sua própria transação curta (o lock de escrita dura
+    só a construção daquele índice; com WAL os leitores seguem lendo).
+    PostgreSQL: CREATE INDEX CONCURRENTLY, fora de transação, sem bloquear escritas.
+    """
+    concorrente = engine.dialect.name == "postgresql"
+    criados = []
+    for table in models.Base.metadata.sorted_tables:
+        existentes = {index["name"] for index in inspect(engine).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existentes or (nomes and index.name not in nomes):
+                continue
+            if concorrente:
+                # Só para este CREATE: o create_all (em transação) não aceita CONCURRENTLY
+                index.dialect_options["postgresql"]["concurrently"] = True
+                try:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                        index.create(conn)
+                finally:
+                    index.dialect_options["postgresql"]["concurrently"] = False
+            else:
+                with engine.begin() as conn:
+                    index.create(conn)
+            criados.append(index.name)
+    return criados
+
+
+def adiciona_colunas(engine: Engine) -> List[str]:
+    """ALTER TABLE ADD COLUMN para colunas dos modelos que faltam (as anuláveis ou com server_default)."""
+    inspector = inspect(engine)
+    adicionadas = []
+    for table in models.Base.metadata.sorted_tables:
+        existentes = {coluna["name"] for coluna in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existentes or (column.server_default is None and not column.nullable):
+                continue
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+            adicionadas.append(f"{table.name}.{column.name}")
+    return adicionadas
+
+
+# --- Migrações (em ordem; novas entram no fim) ---
+
+def _m001_tabelas(engine: Engine) -> None:
+    # Só cria as tabelas que faltam, já no formato atual dos modelos
+    models.Base.metadata.create_all(bind=engine)
+
+
+def _m002_centavos(engine: Engine) -> None:
+    money.migra_para_centavos(engine, models.Base.metadata)
+
+
+def _m003_colunas(engine: Engine) -> None:
+    adiciona_colunas(engine)  # pedidos.version
+
+
+def _m004_indices(engine: Engine) -> None:
+    # ix_produtos_category_id, ix_pedidos_date_id, ix_pedidos_status_date_id,
+    # ix_pedido_items_pedido_id, ix_vendas_periodo_produto_inicio...
+    cria_indices(engine)
+
+
+def _m005_busca(engine: Engine) -> None:
+    search.ensure_index(engine)
+
+
+def _m006_agregados(engine: Engine) -> None:
+    with Session(engine) as db:
+        if reports.precisa_rebuild(db):
+            reports.rebuild(db)
+
+
+def _m007_estoque(engine: Engine) -> None:
+    adiciona_colunas(engine)  # produtos.stock, stock_per_unit, stock_min
+    cria_indices(engine, "ix_produtos_estoque_baixo")
+
+
+def _m008_jobs(engine: Engine) -> None:
+    models.Base.metadata.create_all(bind=engine, tables=[models.Job.__table__])
+
+
+def _m009_geracao_agregados(engine: Engine) -> None:
+    models.Base.metadata.create_all(bind=engine, tables=[models.RelatorioGeracao.__table__])
+
+
+MIGRACOES: List[Migracao] = [
+    Migracao(1, "tabelas", _m001_tabelas),
+    Migracao(2, "dinheiro_em_centavos", _m002_centavos),
+    Migracao(3, "colunas_com_default", _m003_colunas),
+    Migracao(4, "indices", _m004_indices),
+    Migracao(5, "busca_fts5", _m005_busca),
+    Migracao(6, "agregados_de_vendas", _m006_agregados),
+    Migracao(7, "estoque", _m007_estoque),
+    Migracao(8, "jobs", _m008_jobs),
+    Migracao(9, "geracao_dos_agregados", _m009_geracao_agregados),
+]
+
+ULTIMA = MIGRACOES[-1].versao
+
+
+# --- Versão, upgrade e verificação ---
+
+def versao_atual(engine: Engine) -> Optional[int]:
+    """Última migração aplicada; None se o banco nunca passou pelo upgrade."""
+    with engine.connect() as conn:
+        try:
+            return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+        except (OperationalError, ProgrammingError):
+            # Tabela schema_version ainda não existe
+            return None
+
+
+def upgrade(engine: Engine, ate: Optional[int] = None) -> List[Migracao]:
+    """Aplica, em ordem, as migrações pendentes (até `ate`). Retorna as aplicadas."""
+    _versao_metadata.create_all(bind=engine)
+    atual = versao_atual(engine) or 0
+    aplicadas = []
+    for migracao in MIGRACOES:
+        if migracao.versao <= atual or (ate is not None and migracao.versao > ate):
+            continue
+        _logger.info(f"Aplicando migração {migracao.versao} ({migracao.nome})")
+        inicio = time.perf_counter()
+        migracao.aplica(engine)
+        with engine.begin() as conn:
+            conn.execute(schema_version.insert().values(
+                version=migracao.versao,
+                name=migracao.nome,
+                applied_at=datetime.utcnow(),
+                duration_ms=int((time.perf_counter() - inicio) * 1000),
+            ))
+        aplicadas.append(migracao)
+    return aplicadas
+
+
+def verifica(engine: Engine, auto_migrate: bool = False) -> int:
+    """
+    Checagem da subida: compara a versão do banco com `ULTIMA`. Atrasado:
+    aplica as pendentes (`auto_migrate`) ou levanta SchemaDesatualizadoError.
+    """
+    atual = versao_atual(engine)
+    if atual is not None and atual >= ULTIMA:
+        if atual > ULTIMA:
+            _logger.warning(f"Banco na versão {atual}, mais nova que a do código ({ULTIMA})")
+        return atual
+    if not auto_migrate:
+        raise SchemaDesatualizadoError(
+            f"Banco na versão {atual or 0}, código espera {ULTIMA}. "
+            "Rode `python -m backend.scripts.migrate` antes de subir os workers."
+        )
+    upgrade(engine)
+    return ULTIMA
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 from .database import Base
+from .money import Dinheiro
 
 # --- Tabela existente de Produtos ---
 class Produto(Base):
@@ -11,9 +12,24 @@ class Produto(Base):
     id = Column(String, primary_key=True, index=True) 
     name = Column(String, index=True)
     description = Column(String)
-    price = Column(Float)
+    price = Column(Dinheiro)                # Centavos no banco, Decimal em reais no Python (ver backend/money.py)
     image = Column(String)
     category = Column(String)
+    # Estoque (ver backend/estoque.py): NULL = produto sem controle de estoque.
+    # Chope em ml (volume do barril), comida em unidades
+    stock = Column(Integer, nullable=True)
+    stock_per_unit = Column(Integer, nullable=False, default=1, server_default="1")  # ml por copo (chope) ou 1
+    stock_min = Column(Integer, nullable=True)  # Abaixo disso o produto aparece em /estoque/baixo/
+
+    __table_args__ = (
+        # Listagem filtrada por categoria na ordem de ID (quando o catálogo não cabe no cache)
+        Index("ix_produtos_category_id", "category", "id"),
+        # Índice parcial: só os produtos com estoque baixo (fica pequeno e atende /estoque/baixo/)
+        Index(
+            "ix_produtos_estoque_baixo", "category", "stock",
+            sqlite_where=stock <= stock_min, postgresql_where=stock <= stock_min,
+        ),
+    )
 
 # --- NOVA Tabela de Pedidos ---
 class Pedido(Base):
@@ -21,26 +37,77 @@ class Pedido(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     pedido_date = Column(DateTime, default=datetime.utcnow)
-    total_price = Column(Float)
+    total_price = Column(Dinheiro)
     status = Column(String, default="pending") # Ex: pending, approved, shipped, delivered
+    # Trava otimista: cada transição de status incrementa (ver crud.transiciona_status)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Relação com PedidoItems: um Pedido tem muitos Itens
     items = relationship("PedidoItem", back_populates="pedido")
 
+    # Índices da paginação por keyset (ordem pedido_date, id), com e sem filtro de status
+    __table_args__ = (
+        Index("ix_pedidos_date_id", "pedido_date", "id"),
+        Index("ix_pedidos_status_date_id", "status", "pedido_date", "id"),
+    )
+
 # --- NOVA Tabela de Itens do Pedido ---
 class PedidoItem(Base):
     __tablename__ = "pedido_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    pedido_id = Column(Integer, ForeignKey("pedidos.id"))
+    pedido_id = Column(Integer, ForeignKey("pedidos.id"), index=True) # Usado pelo selectinload dos itens
     produto_id = Column(String, index=True) # ID do Produto
     produto_name = Column(String)           # Guardamos o nome caso o produto seja removido
-    unit_price = Column(Float)              # Preço no momento da compra
+    unit_price = Column(Dinheiro)           # Preço no momento da compra
     quantity = Column(Integer)
 
     # Relação com Pedido: um Item pertence a um Pedido
     pedido = relationship("Pedido", back_populates="items")
 
+# --- Agregados de vendas (mantidos por crud.create_pedido, ver backend/reports.py) ---
+class VendaAgregada(Base):
+    __tablename__ = "vendas_agregadas"
+
+    periodo = Column(String, primary_key=True)        # "hora" ou "dia"
+    inicio = Column(DateTime, primary_key=True)       # pedido_date truncado no período (UTC)
+    produto_id = Column(String, primary_key=True)
+    produto_name = Column(String)                     # Último nome vendido
+    category = Column(String)
+    quantity = Column(Integer, default=0)             # Unidades vendidas no período
+    revenue = Column(Dinheiro, default=0)             # Soma de unit_price * quantity
+    pedidos = Column(Integer, default=0)              # Pedidos que incluíram o produto
+
+    # A PK (periodo, inicio, produto_id) atende os intervalos; este atende a série de um produto
+    __table_args__ = (
+        Index("ix_vendas_periodo_produto_inicio", "periodo", "produto_id", "inicio"),
+    )
+
+# --- Jobs em segundo plano, no modo durável (JOBS_DURABLE=1, ver backend/jobs.py) ---
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)                      # JSON
+    status = Column(String, nullable=False, default="pending")  # pending, running ou failed
+    attempts = Column(Integer, nullable=False, default=0)
+    run_at = Column(DateTime, nullable=False)                   # Próxima tentativa (running: fim do lease)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(String)
+
+    # Poller: jobs pendentes (ou com lease vencido) em ordem de vencimento
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+# --- Geração dos agregados: muda a cada reports.rebuild (ver backend/reports.py) ---
+class RelatorioGeracao(Base):
+    __tablename__ = "relatorio_geracao"
+
+    id = Column(Integer, primary_key=True)                     # Sempre 1
+    geracao = Column(Integer, nullable=False, default=0)
+
 # Exemplo de uma tabela de Pedido/Item de Pedido (Pedido/PedidoItem)
 # Para este exemplo inicial, focaremos apenas em listar os produtos.
 # Se quiser implementar a funcionalidade de Checkout, precisaria de uma tabela de pedidos:
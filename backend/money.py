@@ -0,0 +1,135 @@
+"""
+Dinheiro em centavos inteiros.
+
+Preços e totais eram `Float`: 12.90 * 3 somado em ponto flutuante dá
+38.699999999999996, e os totais de pedidos e relatórios acumulavam frações de
+centavo. Agora:
+
+- no banco, `Dinheiro` grava um INTEGER de centavos (1290), então SUM e
+  qualquer conta feita no SQL são exatos;
+- no Python, o valor é um `Decimal` com duas casas (Decimal("12.90")), então
+  `preço * quantidade` e as somas em `crud`/`reports` também são exatos;
+- na API continua sendo um número em reais (12.9), como antes (ver
+  `schemas.Dinheiro`).
+
+`migra_para_centavos` converte um banco antigo (colunas REAL/FLOAT em reais)
+na subida da aplicação.
+"""
+import logging
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Tuple, Union
+
+from sqlalchemy import Integer, MetaData, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.types import TypeDecorator
+
+_logger = logging.getLogger("uvicorn.error")
+
+CENTAVO = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+Valor = Union[Decimal, int, float, str]
+
+
+def reais(valor: Valor) -> Decimal:
+    """Valor em reais com duas casas (arredonda meio centavo para cima). Floats passam por str: 12.9 -> 12.90."""
+    if isinstance(valor, float):
+        valor = repr(valor)
+    return Decimal(valor).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+
+def centavos(valor: Valor) -> int:
+    """Reais -> centavos inteiros: 12.9 -> 1290."""
+    return int(reais(valor).scaleb(2))
+
+
+def de_centavos(valor: Union[int, float]) -> Decimal:
+    """Centavos -> reais: 1290 -> Decimal("12.90")."""
+    if isinstance(valor, float):
+        # Coluna ainda com afinidade REAL (SQLite): guarda 1290.0
+        valor = int(round(valor))
+    return Decimal(valor).scaleb(-2)
+
+
+class Dinheiro(TypeDecorator):
+    """Coluna de dinheiro: INTEGER de centavos no banco, `Decimal` em reais no Python."""
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else centavos(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else de_centavos(value)
+
+
+# --- Migração de bancos com as colunas em reais (Float) ---
+
+def _colunas_antigas(engine: Engine, metadata) -> Dict[str, Tuple[str, ...]]:
+    """Tabelas existentes com colunas `Dinheiro` ainda declaradas como não inteiras."""
+    inspector = inspect(engine)
+    existentes = set(inspector.get_table_names())
+    pendentes = {}
+    for table in metadata.sorted_tables:
+        dinheiro = [c.name for c in table.columns if isinstance(c.type, Dinheiro)]
+        if not dinheiro or table.name not in existentes:
+            continue
+        tipos = {c["name"]: c["type"] for c in inspector.get_columns(table.name)}
+        antigas = tuple(nome for nome in dinheiro if nome in tipos and not isinstance(tipos[nome], Integer))
+        if antigas:
+            pendentes[table.name] = antigas
+    return pendentes
+
+
+def migra_para_centavos(engine: Engine, metadata) -> Dict[str, Tuple[str, ...]]:
+    """
+    Converte as colunas `Dinheiro` de reais (REAL) para centavos (INTEGER),
+    arredondando cada valor para o centavo mais próximo. Idempotente: só
+    mexe nas tabelas em que a coluna ainda não é inteira. Retorna o que converteu.
+
+    SQLite não altera o tipo de uma coluna: cada tabela é recriada (tabela
+    nova, cópia com os mesmos rowids, DROP da antiga e RENAME), tudo numa
+    transação. Os rowids preservados mantêm o índice FTS5 de `produtos`
+    válido; os triggers dele são recriados por `search.ensure_index`.
+    """
+    pendentes = _colunas_antigas(engine, metadata)
+    if not pendentes:
+        return pendentes
+
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for nome, antigas in pendentes.items():
+            table = metadata.tables[nome]
+            q = preparer.quote
+            if engine.dialect.name != "sqlite":
+                for coluna in antigas:
+                    conn.execute(text(
+                        f"ALTER TABLE {q(nome)} ALTER COLUMN {q(coluna)} TYPE INTEGER "
+                        f"USING CAST(ROUND({q(coluna)} * 100) AS INTEGER)"
+                    ))
+                continue
+
+            existentes = {c["name"] for c in inspect(conn).get_columns(nome)}
+            colunas = [c.name for c in table.columns if c.name in existentes]
+            origem = [
+                f"CAST(ROUND({q(c)} * 100) AS INTEGER)" if c in antigas else q(c)
+                for c in colunas
+            ]
+            # Cópia com outro nome num MetaData próprio (as FKs resolvem contra as cópias das outras tabelas)
+            copia = MetaData()
+            for outra in metadata.sorted_tables:
+                outra.to_metadata(copia)
+            temporaria = table.to_metadata(copia, name=f"{nome}__centavos")
+            conn.execute(CreateTable(temporaria))
+            conn.execute(text(
+                f"INSERT INTO {q(temporaria.name)} (rowid, {', '.join(map(q, colunas))}) "
+                f"SELECT rowid, {', '.join(origem)} FROM {q(nome)}"
+            ))
+            conn.execute(text(f"DROP TABLE {q(nome)}"))
+            conn.execute(text(f"ALTER TABLE {q(temporaria.name)} RENAME TO {q(nome)}"))
+            for index in table.indexes:
+                index.create(conn)
+            _logger.info(f"Colunas {', '.join(antigas)} de {nome} convertidas para centavos")
+    return pendentes
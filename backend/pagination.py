@@ -0,0 +1,75 @@
+"""
+Cursores opacos para paginação por keyset (seek) em /pedidos/ e /produtos/.
+
+Em vez de OFFSET (que lê e descarta todas as linhas anteriores), a próxima
+página começa logo após a chave da última linha entregue, usando o índice.
+O cliente recebe a chave codificada no header `X-Next-Cursor` e a devolve
+no parâmetro `cursor`; o conteúdo não deve ser interpretado pelo frontend.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Tuple
+
+from backend import models
+
+
+class CursorInvalidoError(ValueError):
+    """O cursor recebido não foi gerado por esta API (ou é de outro recurso)."""
+
+
+def encode_cursor(kind: str, values: List[Any]) -> str:
+    raw = json.dumps({"k": kind, "v": values}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(kind: str, cursor: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_kind, values = data["k"], data["v"]
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise CursorInvalidoError("Cursor inválido.") from e
+    if cursor_kind != kind or not isinstance(values, list):
+        raise CursorInvalidoError("Cursor inválido.")
+    return values
+
+
+# --- Pedidos: ordenados por (pedido_date, id) ---
+
+def pedido_cursor(pedido: models.Pedido) -> str:
+    return encode_cursor("pedido", [pedido.pedido_date.isoformat(), pedido.id])
+
+def decode_pedido_cursor(cursor: str) -> Tuple[datetime, int]:
+    values = decode_cursor("pedido", cursor)
+    try:
+        pedido_date, pedido_id = values
+        return datetime.fromisoformat(pedido_date), int(pedido_id)
+    except (ValueError, TypeError) as e:
+        raise CursorInvalidoError("Cursor inválido.") from e
+
+
+# --- Produtos: ordenados por id ---
+
+def produto_cursor(produto: models.Produto) -> str:
+    return encode_cursor("produto", [produto.id])
+
+def decode_produto_cursor(cursor: str) -> str:
+    values = decode_cursor("produto", cursor)
+    if len(values) != 1 or not isinstance(values[0], str):
+        raise CursorInvalidoError("Cursor inválido.")
+    return values[0]
+
+
+# --- Busca de produtos: ordenada por relevância, paginada por posição ---
+
+def busca_cursor(q: str, offset: int) -> str:
+    return encode_cursor("busca", [q, offset])
+
+def decode_busca_cursor(cursor: str, q: str) -> int:
+    """Posição da próxima página; o cursor só vale para a mesma busca."""
+    values = decode_cursor("busca", cursor)
+    if len(values) != 2 or values[0] != q or not isinstance(values[1], int) or values[1] < 0:
+        raise CursorInvalidoError("Cursor inválido.")
+    return values[1]
@@ -0,0 +1,299 @@
+"""
+Cliente HTTP assíncrono para a API do Mercado Pago.
+
+- Um único `httpx.AsyncClient` compartilhado (pool de conexões keep-alive).
+- Timeouts explícitos de conexão e de leitura: uma resposta lenta do
+  Mercado Pago não prende mais o worker indefinidamente.
+- Retentativas limitadas com backoff exponencial (+ jitter) apenas para
+  falhas transitórias (erro de rede, timeout, 429 e 5xx). Todas as tentativas
+  de uma mesma chamada enviam o mesmo `X-Idempotency-Key`, então o Mercado
+  Pago não cria preferências duplicadas.
+- Circuit breaker: após N chamadas seguidas com falha, as próximas falham
+  imediatamente (503) até `reset_timeout`; depois uma chamada de teste decide
+  se o circuito fecha de novo.
+- Cota de saída: cada tentativa gasta uma ficha de um token bucket
+  (`MP_RATE_LIMIT` chamadas por segundo, rajada de `MP_RATE_BURST`), então
+  um pico de checkouts não passa da cota do Mercado Pago. Sem ficha, a
+  chamada espera a vez até `MP_RATE_MAX_WAIT` segundos; mais do que isso,
+  falha na hora (503 com `Retry-After`). A cota é por processo: com vários
+  workers, divida a cota da conta entre eles.
+- A latência de cada tentativa vai para `GET /metrics`
+  (`mercadopago_request_duration_seconds`, por resultado).
+
+Configuração por variáveis de ambiente (ver `MercadoPagoSettings.from_env`).
+`MERCADO_PAGO_API_URL` permite apontar para o stub local
+(`python -m backend.scripts.mp_stub`) em testes e benchmarks.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+from backend import metrics, ratelimit
+
+
+class MercadoPagoError(Exception):
+    """Falha ao falar com o Mercado Pago; `status_code` é o que a rota deve responder."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class CircuitOpenError(MercadoPagoError):
+    def __init__(self, retry_after: float):
+        super().__init__(503, "Mercado Pago indisponível no momento. Tente novamente em instantes.")
+        self.retry_after = retry_after
+
+
+class RateLimitedError(MercadoPagoError):
+    """A cota de chamadas ao Mercado Pago deste processo está esgotada por mais de `rate_max_wait`."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(503, "Muitos pagamentos em andamento. Tente novamente em instantes.")
+        self.retry_after = retry_after
+
+
+@dataclass
+class MercadoPagoSettings:
+    base_url: str = "https://api.mercadopago.com"
+    connect_timeout: float = 3.0
+    read_timeout: float = 10.0
+    max_retries: int = 2
+    backoff: float = 0.2
+    max_connections: int = 20
+    breaker_threshold: int = 5
+    breaker_reset: float = 30.0
+    rate_limit: float = 10.0
+    rate_burst: int = 10
+    rate_max_wait: float = 2.0
+
+    @classmethod
+    def from_env(cls) -> "MercadoPagoSettings":
+        return cls(
+            base_url=os.getenv("MERCADO_PAGO_API_URL", cls.base_url).rstrip("/"),
+            connect_timeout=float(os.getenv("MP_CONNECT_TIMEOUT", cls.connect_timeout)),
+            read_timeout=float(os.getenv("MP_READ_TIMEOUT", cls.read_timeout)),
+            max_retries=int(os.getenv("MP_MAX_RETRIES", cls.max_retries)),
+            backoff=float(os.getenv("MP_BACKOFF", cls.backoff)),
+            max_connections=int(os.getenv("MP_MAX_CONNECTIONS", cls.max_connections)),
+            breaker_threshold=int(os.getenv("MP_BREAKER_THRESHOLD", cls.breaker_threshold)),
+            breaker_reset=float(os.getenv("MP_BREAKER_RESET", cls.breaker_reset)),
+            rate_limit=float(os.getenv("MP_RATE_LIMIT", cls.rate_limit)),
+            rate_burst=int(os.getenv("MP_RATE_BURST", cls.rate_burst)),
+            rate_max_wait=float(os.getenv("MP_RATE_MAX_WAIT", cls.rate_max_wait)),
+        )
+
+
+class CircuitBreaker:
+    """Circuit breaker simples (closed -> open -> half-open), seguro entre threads."""
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> None:
+        """Levanta CircuitOpenError se a chamada não deve nem ser tentada."""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.reset_timeout:
+                raise CircuitOpenError(retry_after=self.reset_timeout - elapsed)
+            # half-open: deixa passar uma única chamada de teste
+            if self._trial_in_flight:
+                raise CircuitOpenError(retry_after=1.0)
+            self._trial_in_flight = True
+
+    def release(self) -> None:
+        """Devolve a vez da chamada de teste do half-open sem registrar resultado (ela nem saiu)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+def _transitorio(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+class MercadoPagoClient:
+    def __init__(self, settings: Optional[MercadoPagoSettings] = None):
+        self.settings = settings or MercadoPagoSettings.from_env()
+        self.breaker = CircuitBreaker(self.settings.breaker_threshold, self.settings.breaker_reset)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # MP_RATE_LIMIT=0 desliga a cota de saída
+        self.quota: Optional[ratelimit.TokenBucket] = None
+        if self.settings.rate_limit > 0:
+            self.quota = ratelimit.TokenBucket(max(1, self.settings.rate_burst), self.settings.rate_limit)
+        self.quota_waits = 0
+        self.quota_rejected = 0
+
+    def _http(self) -> httpx.AsyncClient:
+        # O pool do httpx pertence ao event loop em que foi criado
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            s = self.settings
+            self._client = httpx.AsyncClient(
+                base_url=s.base_url,
+                timeout=httpx.Timeout(s.read_timeout, connect=s.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=s.max_connections,
+                    max_keepalive_connections=s.max_connections,
+                ),
+            )
+            self._loop = loop
+        return self._client
+
+    async def create_preference(self, token: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST /checkout/preferences com timeouts, retentativas e circuit breaker."""
+        return await self._post(
+            "/checkout/preferences",
+            payload,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "X-Idempotency-Key": str(uuid.uuid4()),
+            },
+        )
+
+    async def _aguarda_cota(self) -> None:
+        """Espera a vez na cota de saída; RateLimitedError se a espera passar de `rate_max_wait`."""
+        if self.quota is None:
+            return
+        espera = self.quota.reserve(self.settings.rate_max_wait)
+        if espera > self.settings.rate_max_wait:
+            self.quota_rejected += 1
+            raise RateLimitedError(retry_after=espera)
+        if espera:
+            self.quota_waits += 1
+            await asyncio.sleep(espera)
+
+    async def _post(self, path: str, payload: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+        self.breaker.before_call()
+        try:
+            return await self._tentativas(path, payload, headers)
+        except MercadoPagoError:
+            raise  # resultado já registrado no breaker
+        except BaseException:
+            # Cancelamento (cliente desconectou) ou erro inesperado: a chamada
+            # de teste do half-open não pode ficar presa como "em andamento"
+            self.breaker.record_failure()
+            raise
+
+    async def _tentativas(self, path: str, payload: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+        """A chamada com retentativas; todo MercadoPagoError que sai daqui já foi registrado no breaker."""
+        s = self.settings
+        try:
+            # Depois do breaker: com o circuito aberto, nem gasta cota nem espera
+            await self._aguarda_cota()
+        except RateLimitedError:
+            self.breaker.release()
+            raise
+        erro: Optional[MercadoPagoError] = None
+        for tentativa in range(s.max_retries + 1):
+            if tentativa:
+                # backoff exponencial com jitter: 0.2s, 0.4s, 0.8s... (± 50%)
+                await asyncio.sleep(s.backoff * (2 ** (tentativa - 1)) * random.uniform(0.5, 1.5))
+                try:
+                    await self._aguarda_cota()
+                except RateLimitedError:
+                    break  # sem cota para retentar: falha com o erro da última tentativa
+            inicio = time.perf_counter()
+            try:
+                resp = await self._http().post(path, json=payload, headers=headers)
+            except httpx.TimeoutException as e:
+                metrics.observe_mercadopago(time.perf_counter() - inicio, "timeout")
+                erro = MercadoPagoError(504, f"Timeout ao conectar ao Mercado Pago: {e!r}")
+                continue
+            except httpx.HTTPError as e:
+                metrics.observe_mercadopago(time.perf_counter() - inicio, "error")
+                erro = MercadoPagoError(502, f"Erro ao conectar ao Mercado Pago: {str(e)}")
+                continue
+            metrics.observe_mercadopago(
+                time.perf_counter() - inicio,
+                "429" if resp.status_code == 429 else f"{resp.status_code // 100}xx",
+            )
+
+            if resp.is_success:
+                try:
+                    corpo = resp.json()
+                except ValueError:
+                    # 2xx sem JSON: o POST pode ter surtido efeito, então não repete
+                    erro = MercadoPagoError(502, f"Resposta inválida do Mercado Pago: {resp.text[:200]}")
+                    break
+                self.breaker.record_success()
+                return corpo
+            erro = MercadoPagoError(502, f"Mercado Pago error: {resp.status_code} - {resp.text}")
+            if not _transitorio(resp.status_code):
+                # Erro do cliente (payload inválido, token errado): não adianta repetir
+                # e não indica indisponibilidade do Mercado Pago.
+                self.breaker.record_success()
+                raise erro
+
+        self.breaker.record_failure()
+        raise erro
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "breaker_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "quota_waits": self.quota_waits,
+            "quota_rejected": self.quota_rejected,
+        }
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+
+_client: Optional[MercadoPagoClient] = None
+_client_lock = threading.Lock()
+
+def get_client() -> MercadoPagoClient:
+    """Instância compartilhada do cliente (criada no primeiro uso)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MercadoPagoClient()
+    return _client
+
+async def close_client() -> None:
+    """Fecha o cliente compartilhado (shutdown); um novo é criado se a aplicação subir de novo."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,242 @@
+"""
+Limite de requisições por cliente e por rota (token bucket).
+
+Um tablet com defeito ou um loop de reload no frontend não pode martelar
+`GET /produtos/` ou `POST /mp/create_preference/` e deixar as outras mesas
+sem atendimento. Cada par (rota, cliente) tem um balde de `capacidade`
+fichas que se reabastece a `taxa` fichas por segundo; cada requisição gasta
+uma. Sem ficha, a resposta é 429 com `Retry-After` (segundos até a próxima).
+
+- O cliente é o header `RATE_LIMIT_KEY_HEADER` (padrão `X-Table-Id`, que o
+  frontend manda com um id por aparelho) ou, sem ele, o IP. Os tablets de um
+  bar costumam sair pelo mesmo IP, então o header é o que separa as mesas; ele
+  não é autenticação (quem quiser burlar troca o valor), só evita que um
+  aparelho com defeito derrube os outros. Atrás de proxy, suba o uvicorn com
+  `--forwarded-allow-ips` para o IP ser o do cliente.
+- A rota é o template (`GET /pedidos/{pedido_id}`, não a URL), então ids
+  diferentes não escapam do limite nem criam baldes novos.
+- `limita` é uma dependência global da aplicação (`create_app`): roda depois
+  do roteamento, no event loop, com um lock curto e duas contas por requisição.
+  Com `RATE_LIMIT_ENABLED=0` ela nem é registrada.
+
+O store padrão é em memória, por processo, limitado a `RATE_LIMIT_MAX_KEYS`
+baldes (os usados há mais tempo saem primeiro; um balde descartado volta
+cheio). Com vários workers cada um tem os seus baldes, então o limite efetivo
+é multiplicado pelo número de workers. `RATE_LIMIT_STORE=pacote.modulo:fabrica`
+troca o store por outro (ex.: Redis, compartilhado entre os workers): qualquer
+objeto com `take(chave, capacidade, taxa)` que devolva a espera em segundos
+(0 = pode passar; pode ser uma corrotina) e `stats()`.
+
+`TokenBucket` é o mesmo balde para um recurso só, com reserva: o cliente do
+Mercado Pago (`backend/payments.py`) o usa para não passar da cota de
+chamadas de saída.
+"""
+import importlib
+import inspect
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, NamedTuple, Optional
+
+from fastapi import HTTPException, Request
+
+from backend import metrics
+
+MAX_KEY_LENGTH = 64
+
+
+class Regra(NamedTuple):
+    capacidade: float
+    taxa: float
+
+
+def parse_regra(valor: str) -> Optional[Regra]:
+    """`"capacidade:taxa"` (ex.: `"20:2"`, rajada de 20 e 2 por segundo); `"off"` = sem limite."""
+    valor = valor.strip()
+    if valor.lower() in ("off", "0", ""):
+        return None
+    capacidade, _, taxa = valor.partition(":")
+    regra = Regra(float(capacidade), float(taxa or capacidade))
+    if regra.capacidade < 1 or regra.taxa <= 0:
+        raise ValueError(f"Regra de rate limit inválida: {valor!r} (use capacidade>=1 e taxa>0, ou 'off')")
+    return regra
+
+
+def parse_regras(valor: str) -> Dict[str, Optional[Regra]]:
+    """`"GET /produtos/=20:2;POST /pedidos/=30:5"` -> {"GET /produtos/": Regra(20, 2), ...}."""
+    regras = {}
+    for item in valor.split(";"):
+        if not item.strip():
+            continue
+        rota, sep, regra = item.rpartition("=")
+        if not sep:
+            raise ValueError(f"Regra de rate limit sem '=': {item!r}")
+        regras[" ".join(rota.split())] = parse_regra(regra)
+    return regras
+
+
+# Padrões: o catálogo e os pontos que criam coisas (pedido, preferência no Mercado Pago) são os
+# alvos de um loop no frontend; as outras rotas ficam com `RATE_LIMIT_DEFAULT`. O checkout é folgado
+# (30 de rajada, 5/s): um caixa ou balcão compartilhado fecha vários pedidos em sequência, e o
+# limite por cliente só segura aparelho com defeito (o header pode ser trocado). O teto de verdade
+# para o Mercado Pago é a cota global de saída (`MP_RATE_LIMIT`, em backend/payments.py).
+DEFAULT_RULES = "GET /produtos/=20:2;POST /pedidos/=30:5;POST /mp/create_preference/=30:5"
+
+
+@dataclass
+class RateLimitSettings:
+    enabled: bool = True
+    default: Optional[Regra] = Regra(60, 10)
+    rules: Dict[str, Optional[Regra]] = field(default_factory=lambda: parse_regras(DEFAULT_RULES))
+    key_header: str = "X-Table-Id"
+    max_keys: int = 100_000
+    store: str = "memory"
+    exempt: List[str] = field(default_factory=lambda: ["/", "/metrics"])
+
+    @classmethod
+    def from_env(cls) -> "RateLimitSettings":
+        regras = parse_regras(DEFAULT_RULES)
+        # RATE_LIMITS sobrescreve (ou acrescenta) regras por rota
+        regras.update(parse_regras(os.getenv("RATE_LIMITS", "")))
+        return cls(
+            enabled=os.getenv("RATE_LIMIT_ENABLED", "1").lower() in ("1", "true", "yes"),
+            default=parse_regra(os.getenv("RATE_LIMIT_DEFAULT", "60:10")),
+            rules=regras,
+            key_header=os.getenv("RATE_LIMIT_KEY_HEADER", cls.key_header),
+            max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", cls.max_keys)),
+            store=os.getenv("RATE_LIMIT_STORE", cls.store),
+            exempt=[p.strip() for p in os.getenv("RATE_LIMIT_EXEMPT", "/,/metrics").split(",") if p.strip()],
+        )
+
+
+def _consome(balde: list, capacidade: float, taxa: float, agora: float, max_espera: float) -> float:
+    """
+    Reabastece `balde` ([fichas, instante]) e tenta gastar uma ficha. Devolve
+    a espera até haver ficha (0 se havia); se ela for <= `max_espera`, a ficha
+    fica reservada (o saldo pode ficar negativo) e quem chamou só espera.
+    """
+    fichas = min(capacidade, balde[0] + (agora - balde[1]) * taxa)
+    espera = 0.0 if fichas >= 1 else (1 - fichas) / taxa
+    if espera <= max_espera:
+        fichas -= 1
+    balde[0] = fichas
+    balde[1] = agora
+    return espera
+
+
+class MemoryStore:
+    """Baldes em memória, por processo, com no máximo `max_keys` (LRU)."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._baldes: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+
+    def take(self, chave: Hashable, capacidade: float, taxa: float) -> float:
+        agora = time.monotonic()
+        with self._lock:
+            balde = self._baldes.get(chave)
+            if balde is None:
+                balde = self._baldes[chave] = [capacidade, agora]
+                if len(self._baldes) > self.max_keys:
+                    self._baldes.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._baldes.move_to_end(chave)
+            espera = _consome(balde, capacidade, taxa, agora, 0.0)
+            if espera:
+                self.limited += 1
+            else:
+                self.allowed += 1
+        return espera
+
+    def clear(self) -> None:
+        with self._lock:
+            self._baldes.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"keys": len(self._baldes), "allowed": self.allowed, "limited": self.limited, "evicted": self.evicted}
+
+
+class TokenBucket:
+    """Um balde só (ex.: a cota de chamadas ao Mercado Pago), seguro entre threads."""
+
+    def __init__(self, capacidade: float, taxa: float):
+        self.capacidade = capacidade
+        self.taxa = taxa
+        self._balde = [capacidade, time.monotonic()]
+        self._lock = threading.Lock()
+
+    def reserve(self, max_espera: float = 0.0) -> float:
+        """
+        Reserva uma ficha e devolve quanto esperar por ela. Se a espera passar
+        de `max_espera`, nada é reservado (quem chamou deve desistir).
+        """
+        with self._lock:
+            return _consome(self._balde, self.capacidade, self.taxa, time.monotonic(), max_espera)
+
+
+def _carrega_store(settings: RateLimitSettings):
+    if settings.store == "memory":
+        return MemoryStore(settings.max_keys)
+    modulo, _, nome = settings.store.partition(":")
+    return getattr(importlib.import_module(modulo), nome)()
+
+
+class RateLimiter:
+    def __init__(self, settings: Optional[RateLimitSettings] = None, store=None):
+        self.settings = settings or RateLimitSettings.from_env()
+        self.store = store if store is not None else _carrega_store(self.settings)
+        self._exempt = frozenset(self.settings.exempt)
+
+    def regra(self, method: str, path: str) -> Optional[Regra]:
+        regras = self.settings.rules
+        chave = f"{method} {path}"
+        if chave in regras:
+            return regras[chave]
+        if path in regras:  # regra sem método vale para todos
+            return regras[path]
+        return self.settings.default
+
+    def cliente(self, request: Request) -> str:
+        valor = request.headers.get(self.settings.key_header)
+        if valor and len(valor) <= MAX_KEY_LENGTH:
+            return valor
+        client = request.client
+        return client.host if client else "-"
+
+    async def verifica(self, request: Request) -> None:
+        route = request.scope.get("route")
+        path = getattr(route, "path", None) or request.url.path
+        if path in self._exempt:
+            return
+        regra = self.regra(request.method, path)
+        if regra is None:
+            return
+        espera = self.store.take((request.method, path, self.cliente(request)), regra.capacidade, regra.taxa)
+        if inspect.isawaitable(espera):
+            espera = await espera
+        if espera:
+            metrics.http_rate_limited.inc(request.method, path)
+            raise HTTPException(
+                status_code=429,
+                detail="Muitas requisições. Tente novamente em instantes.",
+                headers={"Retry-After": str(max(1, math.ceil(espera)))},
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return self.store.stats()
+
+
+limiter = RateLimiter()
+
+
+async def limita(request: Request) -> None:
+    """Dependência global da aplicação (ver `create_app`): 429 se o cliente passou do limite da rota."""
+    await limiter.verifica(request)
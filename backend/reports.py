@@ -0,0 +1,394 @@
+"""
+Relatórios de vendas a partir de agregados pré-calculados.
+
+Responder "quantos Chopp Pilsen vendemos hoje à noite" varrendo `pedidos` e
+`pedido_items` fica mais lento a cada pedido. Em vez disso, `crud.create_pedido`
+acumula uma linha por (período, produto) em `vendas_agregadas` (unidades,
+receita e número de pedidos), em dois níveis: por hora e por dia.
+
+O acúmulo é o job `JOB_ACUMULA` (ver backend/jobs.py): roda num worker logo
+depois do commit do pedido, ou na própria transação do pedido quando a fila
+está parada ou cheia. Em produção a fila é durável (`JOBS_DURABLE`): o job é
+gravado junto com o pedido e sobrevive a uma queda do processo. Com a fila só
+em memória (perfil dev), um pedido cujo job se perdeu só entra nos agregados
+no próximo `rebuild`.
+
+Um intervalo é respondido com os buckets diários para os dias inteiros e os
+horários só para as pontas, então o custo depende de (dias + horas das pontas)
+x produtos vendidos, não do tamanho do histórico.
+
+As horas são em UTC (como `pedido_date`) e os filtros `date_from`/`date_to`
+(com fuso são convertidos para UTC; sem fuso, lidos como UTC) têm
+granularidade de hora: o bucket que contém `date_from` entra, e `date_to`
+é exclusivo.
+
+Pedidos cancelados são descontados (`linhas_de_estorno`) pelo mesmo job
+`JOB_ACUMULA`, despachado no commit do cancelamento: venda e estorno têm a
+mesma garantia de entrega (na fila durável as duas pontas são gravadas na
+transação; só em memória, um estorno cuja venda se perdeu deixa o bucket
+negativo até o `rebuild`). Ficam fora do `rebuild`.
+
+Agregados de pedidos anteriores a esta tabela (ou após uma correção manual)
+são reconstruídos por `rebuild`, que percorre o histórico uma única vez,
+inclusive os pedidos já movidos para o arquivo morto (backend/arquivo.py).
+Cada job leva a geração dos agregados (`relatorio_geracao`) lida na transação
+do pedido; o `rebuild` troca a geração, e os jobs de antes dele, cujos pedidos
+ele já contou, são descartados.
+"""
+import itertools
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from backend import arquivo, jobs, models, money
+
+VendaAgregada = models.VendaAgregada
+
+HORA = "hora"
+DIA = "dia"
+
+_CHAVE = ("periodo", "inicio", "produto_id")
+
+
+def trunca(momento: datetime, periodo: str) -> datetime:
+    momento = momento.replace(minute=0, second=0, microsecond=0)
+    return momento.replace(hour=0) if periodo == DIA else momento
+
+
+def _arredonda_para_cima(momento: datetime, periodo: str) -> datetime:
+    inicio = trunca(momento, periodo)
+    if inicio == momento:
+        return inicio
+    return inicio + (timedelta(days=1) if periodo == DIA else timedelta(hours=1))
+
+
+def linhas_de_venda(pedido_date: datetime, itens: List[dict], produtos: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Incrementos por produto do pedido, no bucket da hora e no do dia."""
+    linhas = []
+    for periodo in (HORA, DIA):
+        inicio = trunca(pedido_date, periodo)
+        for item in itens:
+            linhas.append({
+                "periodo": periodo,
+                "inicio": inicio,
+                "produto_id": item["produto_id"],
+                "produto_name": item["produto_name"],
+                "category": getattr(produtos.get(item["produto_id"]), "category", None),
+                "quantity": item["quantity"],
+                "revenue": item["unit_price"] * item["quantity"],
+                "pedidos": 1,
+            })
+    return linhas
+
+
+def linhas_de_estorno(pedido_date: datetime, itens: List[dict], produtos: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Desconto de um pedido cancelado: as mesmas linhas de `linhas_de_venda`, negativas."""
+    linhas = linhas_de_venda(pedido_date, itens, produtos)
+    for linha in linhas:
+        linha["quantity"] = -linha["quantity"]
+        linha["revenue"] = -linha["revenue"]
+        linha["pedidos"] = -linha["pedidos"]
+    return linhas
+
+
+# --- Escrita incremental ---
+
+JOB_ACUMULA = "vendas.acumula"
+
+
+def linhas_para_job(linhas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Payload JSON do job de acúmulo (datas em ISO, receita em centavos)."""
+    return {"linhas": [
+        dict(linha, inicio=linha["inicio"].isoformat(), revenue=money.centavos(linha["revenue"])) for linha in linhas
+    ]}
+
+
+def geracao(db: Session) -> int:
+    """
+    Geração atual dos agregados (0 antes do primeiro `rebuild`).
+
+    Lida com trava compartilhada (FOR SHARE no PostgreSQL; no SQLite a
+    transação de quem chama já tem a trava de escrita): o `rebuild`, que
+    troca a geração, espera as transações que já a leram.
+    """
+    return db.execute(
+        select(models.RelatorioGeracao.geracao).where(models.RelatorioGeracao.id == 1).with_for_update(read=True)
+    ).scalar() or 0
+
+
+def agenda_acumulo(db: Session, linhas: List[Dict[str, Any]]) -> None:
+    """
+    Agenda o job de acúmulo das linhas, sem commit. Chamar depois da primeira
+    escrita da transação (o pedido ou o UPDATE de status), para a geração lida
+    aqui ser a do commit.
+    """
+    if linhas:
+        jobs.queue.submit(db, JOB_ACUMULA, dict(linhas_para_job(linhas), geracao=geracao(db)))
+
+
+@jobs.queue.handler(JOB_ACUMULA)
+def _acumula_job(db: Session, payload: Dict[str, Any]) -> None:
+    # De uma geração anterior: o pedido foi gravado antes do `rebuild`, que já o contou
+    if "geracao" in payload and payload["geracao"] != geracao(db):
+        return
+    acumula(db, [
+        dict(linha, inicio=datetime.fromisoformat(linha["inicio"]), revenue=money.de_centavos(linha["revenue"]))
+        for linha in payload["linhas"]
+    ])
+
+
+def _statement_acumula(dialeto: str):
+    """INSERT ... ON CONFLICT que soma no bucket existente; None se o dialeto não suporta."""
+    if dialeto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialeto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    stmt = dialect_insert(VendaAgregada)
+    return stmt.on_conflict_do_update(
+        index_elements=list(_CHAVE),
+        set_={
+            "produto_name": stmt.excluded.produto_name,
+            "category": stmt.excluded.category,
+            "quantity": VendaAgregada.quantity + stmt.excluded.quantity,
+            "revenue": VendaAgregada.revenue + stmt.excluded.revenue,
+            "pedidos": VendaAgregada.pedidos + stmt.excluded.pedidos,
+        },
+    )
+
+
+def _chave(linha: Dict[str, Any]) -> Tuple:
+    return tuple(linha[c] for c in _CHAVE)
+
+
+def acumula(db: Session, linhas: List[Dict[str, Any]]) -> None:
+    """
+    Soma as linhas nos buckets, sem commit (roda dentro da transação do pedido).
+
+    SQLite/PostgreSQL: um único upsert em lote. Outros bancos: SELECT das
+    chaves existentes, um UPDATE por bucket existente e INSERT em lote dos novos.
+    """
+    if not linhas:
+        return
+    stmt = _statement_acumula(db.get_bind().dialect.name)
+    if stmt is not None:
+        db.execute(stmt, linhas)
+        return
+
+    colunas = [getattr(VendaAgregada, c) for c in _CHAVE]
+    existentes = {
+        tuple(row)
+        for row in db.execute(
+            select(*colunas).where(
+                or_(*(and_(*(col == valor for col, valor in zip(colunas, _chave(linha)))) for linha in linhas))
+            )
+        )
+    }
+    novas = []
+    for linha in linhas:
+        if _chave(linha) not in existentes:
+            novas.append(linha)
+            continue
+        db.execute(
+            update(VendaAgregada)
+            .where(*(col == valor for col, valor in zip(colunas, _chave(linha))))
+            .values(
+                produto_name=linha["produto_name"],
+                category=linha["category"],
+                quantity=VendaAgregada.quantity + linha["quantity"],
+                revenue=VendaAgregada.revenue + linha["revenue"],
+                pedidos=VendaAgregada.pedidos + linha["pedidos"],
+            )
+        )
+    if novas:
+        db.execute(insert(VendaAgregada), novas)
+
+
+def rebuild(db: Session, batch_size: int = 5000) -> int:
+    """
+    Recalcula todos os buckets a partir de `pedidos`/`pedido_items` (e dos
+    pedidos arquivados) e faz commit.
+
+    O histórico é lido em streaming e agregado em memória (uma entrada por
+    período x produto). Retorna o número de buckets gravados.
+
+    A primeira escrita troca a geração dos agregados: os jobs `JOB_ACUMULA`
+    ainda na fila (de pedidos gravados antes, que este rebuild conta) viram
+    no-op, e os de pedidos gravados depois somam normalmente. Essa escrita
+    trava o banco para outras escritas até o commit (no SQLite, todas; no
+    PostgreSQL, os pedidos e cancelamentos): rode fora do expediente.
+    """
+    try:
+        _nova_geracao(db)
+    except Exception:
+        db.rollback()
+        raise
+    categorias = dict(db.execute(select(models.Produto.id, models.Produto.category)).all())
+    buckets: Dict[Tuple, Dict[str, Any]] = {}
+    pedidos_por_bucket: Dict[Tuple, set] = defaultdict(set)
+    rows = db.execute(
+        select(
+            models.Pedido.id,
+            models.Pedido.pedido_date,
+            models.PedidoItem.produto_id,
+            models.PedidoItem.produto_name,
+            models.PedidoItem.unit_price,
+            models.PedidoItem.quantity,
+        )
+        .join(models.PedidoItem, models.PedidoItem.pedido_id == models.Pedido.id)
+        .where(models.Pedido.status != "cancelled")
+        .order_by(models.Pedido.pedido_date, models.Pedido.id)
+        .execution_options(yield_per=batch_size)
+    )
+    rows = itertools.chain(arquivo.morto.itens_vendidos(batch_size), rows)
+    for pedido_id, pedido_date, produto_id, produto_name, unit_price, quantity in rows:
+        for periodo in (HORA, DIA):
+            chave = (periodo, trunca(pedido_date, periodo), produto_id)
+            bucket = buckets.get(chave)
+            if bucket is None:
+                bucket = buckets[chave] = dict(
+                    zip(_CHAVE, chave), category=categorias.get(produto_id), quantity=0, revenue=money.ZERO
+                )
+            bucket["produto_name"] = produto_name
+            bucket["quantity"] += quantity
+            bucket["revenue"] += unit_price * quantity
+            pedidos_por_bucket[chave].add(pedido_id)
+    for chave, bucket in buckets.items():
+        bucket["pedidos"] = len(pedidos_por_bucket[chave])
+
+    try:
+        db.execute(delete(VendaAgregada))
+        if buckets:
+            db.execute(insert(VendaAgregada), list(buckets.values()))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(buckets)
+
+
+def _nova_geracao(db: Session) -> None:
+    tabela = models.RelatorioGeracao
+    trocou = db.execute(update(tabela).where(tabela.id == 1).values(geracao=tabela.geracao + 1)).rowcount
+    if not trocou:
+        db.execute(insert(tabela).values(id=1, geracao=1))
+
+
+def precisa_rebuild(db: Session) -> bool:
+    """Há pedidos mas nenhum agregado (tabela recém-criada num banco com histórico)."""
+    tem_agregados = db.execute(select(VendaAgregada.inicio).limit(1)).first() is not None
+    tem_pedidos = db.execute(select(models.Pedido.id).limit(1)).first() is not None
+    return tem_pedidos and not tem_agregados
+
+
+# --- Consultas ---
+
+def _entre(inicio: Optional[datetime], fim: Optional[datetime]) -> list:
+    condicoes = []
+    if inicio is not None:
+        condicoes.append(VendaAgregada.inicio >= inicio)
+    if fim is not None:
+        condicoes.append(VendaAgregada.inicio < fim)
+    return condicoes
+
+
+def _utc(momento: Optional[datetime]) -> Optional[datetime]:
+    """Converte para UTC sem fuso, como `inicio`; sem fuso já é tratado como UTC."""
+    if momento is None or momento.tzinfo is None:
+        return momento
+    return momento.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _intervalo(date_from: Optional[datetime], date_to: Optional[datetime]):
+    """
+    Condição que cobre [date_from, date_to) sem contar nada duas vezes:
+    buckets diários nos dias inteiros do intervalo e horários nas pontas.
+    """
+    date_from, date_to = _utc(date_from), _utc(date_to)
+    h_inicio = trunca(date_from, HORA) if date_from is not None else None
+    h_fim = _arredonda_para_cima(date_to, HORA) if date_to is not None else None
+    d_inicio = _arredonda_para_cima(h_inicio, DIA) if h_inicio is not None else None
+    d_fim = trunca(h_fim, DIA) if h_fim is not None else None
+    if d_inicio is not None and d_fim is not None and d_inicio >= d_fim:
+        # Menos de um dia inteiro: só buckets horários
+        return and_(VendaAgregada.periodo == HORA, *_entre(h_inicio, h_fim))
+
+    partes = [and_(VendaAgregada.periodo == DIA, *_entre(d_inicio, d_fim))]
+    if h_inicio is not None and h_inicio < d_inicio:
+        partes.append(and_(VendaAgregada.periodo == HORA, *_entre(h_inicio, d_inicio)))
+    if h_fim is not None and d_fim < h_fim:
+        partes.append(and_(VendaAgregada.periodo == HORA, *_entre(d_fim, h_fim)))
+    return or_(*partes)
+
+
+def _filtra(stmt, category: Optional[str] = None, produto_id: Optional[str] = None):
+    if category is not None:
+        stmt = stmt.where(VendaAgregada.category == category)
+    if produto_id is not None:
+        stmt = stmt.where(VendaAgregada.produto_id == produto_id)
+    return stmt
+
+
+def vendas_por_produto(
+    db: Session,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    category: Optional[str] = None,
+    limit: int = 50,
+) -> List[Dict[str, Any]]:
+    """Produtos mais vendidos no intervalo, por receita."""
+    revenue = func.sum(VendaAgregada.revenue).label("revenue")
+    stmt = _filtra(
+        select(
+            VendaAgregada.produto_id,
+            func.max(VendaAgregada.produto_name).label("produto_name"),
+            func.max(VendaAgregada.category).label("category"),
+            func.sum(VendaAgregada.quantity).label("quantity"),
+            revenue,
+            func.sum(VendaAgregada.pedidos).label("pedidos"),
+        ).where(_intervalo(date_from, date_to)),
+        category,
+    )
+    stmt = stmt.group_by(VendaAgregada.produto_id).order_by(revenue.desc(), VendaAgregada.produto_id).limit(limit)
+    return [dict(row._mapping) for row in db.execute(stmt)]
+
+
+def vendas_por_categoria(
+    db: Session,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    revenue = func.sum(VendaAgregada.revenue).label("revenue")
+    stmt = select(
+        VendaAgregada.category, func.sum(VendaAgregada.quantity).label("quantity"), revenue
+    ).where(_intervalo(date_from, date_to))
+    stmt = stmt.group_by(VendaAgregada.category).order_by(revenue.desc())
+    return [dict(row._mapping) for row in db.execute(stmt)]
+
+
+def serie(
+    db: Session,
+    periodo: str = HORA,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    category: Optional[str] = None,
+    produto_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Série por hora ou por dia (só os períodos com venda), opcionalmente de uma categoria ou produto."""
+    date_from, date_to = _utc(date_from), _utc(date_to)
+    inicio = trunca(date_from, periodo) if date_from is not None else None
+    fim = _arredonda_para_cima(date_to, periodo) if date_to is not None else None
+    stmt = _filtra(
+        select(
+            VendaAgregada.inicio,
+            func.sum(VendaAgregada.quantity).label("quantity"),
+            func.sum(VendaAgregada.revenue).label("revenue"),
+        ).where(VendaAgregada.periodo == periodo, *_entre(inicio, fim)),
+        category, produto_id,
+    )
+    stmt = stmt.group_by(VendaAgregada.inicio).order_by(VendaAgregada.inicio)
+    return [dict(row._mapping) for row in db.execute(stmt)]
@@ -0,0 +1,162 @@
+"""
+Respostas HTTP para tablets em Wi-Fi fraco: JSON rápido e compressão.
+
+- `JSONResponse`: resposta padrão da aplicação (`create_app`), codificada com
+  orjson quando ele está instalado (sem ele, o `json` da stdlib, como antes).
+  As listagens grandes (catálogo e pedidos) nem passam por aqui: são
+  serializadas direto pelo pydantic (`web.json_response` / `cache.render_json`).
+- `CompressionMiddleware`: comprime respostas a partir de
+  `COMPRESSION_MIN_SIZE` bytes, negociando pelo `Accept-Encoding`: brotli
+  (`br`, se o pacote `brotli` estiver instalado) ou gzip. Abaixo do limite, e
+  em `text/event-stream` (o SSE das telas da cozinha), o corpo vai como está.
+  Respostas comprimidas levam `Vary: Accept-Encoding`, e o ETag vira fraco
+  (`W/"..."`): o corpo não é mais o mesmo byte a byte, mas o GET condicional
+  continua valendo (`web.etag_matches` faz a comparação fraca).
+
+Os níveis padrão (gzip 6, brotli 4) são os que compensam para respostas
+dinâmicas: quase toda a redução de tamanho por uma fração da CPU dos níveis
+máximos (ver `python -m backend.scripts.bench_serialization`).
+"""
+import os
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.responses import JSONResponse as _StdlibJSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend import metrics
+
+try:
+    import orjson
+except ImportError:  # opcional: sem orjson, o json da stdlib
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # opcional: sem brotli, só gzip
+    brotli = None
+
+
+class JSONResponse(_StdlibJSONResponse):
+    """JSON compacto em UTF-8, com orjson se disponível (mesmos bytes do `json` da stdlib)."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+@dataclass
+class CompressionSettings:
+    enabled: bool = True
+    minimum_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 4
+
+    @classmethod
+    def from_env(cls) -> "CompressionSettings":
+        return cls(
+            enabled=os.getenv("COMPRESSION_ENABLED", "1").lower() in ("1", "true", "yes"),
+            minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", cls.minimum_size)),
+            gzip_level=int(os.getenv("COMPRESSION_GZIP_LEVEL", cls.gzip_level)),
+            brotli_quality=int(os.getenv("COMPRESSION_BROTLI_QUALITY", cls.brotli_quality)),
+        )
+
+
+def escolhe_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    `br`, `gzip` ou None (sem compressão) para o header `Accept-Encoding`,
+    respeitando `q=0` e `*`. Com os dois aceitos, brotli ganha (menor, e
+    barato no nível usado).
+    """
+    aceitos = {}
+    for parte in accept_encoding.lower().split(","):
+        nome, _, params = parte.partition(";")
+        nome = nome.strip()
+        if not nome:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        aceitos[nome] = q
+    curinga = aceitos.get("*", 0.0)
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if aceitos.get(encoding, curinga) > 0:
+            return encoding
+    return None
+
+
+class _ContaBytes:
+    """Mixin dos responders: bytes antes e depois da compressão, por encoding (GET /metrics)."""
+    content_encoding: str
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        comprimido = super().apply_compression(body, more_body=more_body)
+        metrics.http_compression_bytes.inc(self.content_encoding, "in", n=len(body))
+        metrics.http_compression_bytes.inc(self.content_encoding, "out", n=len(comprimido))
+        return comprimido
+
+
+class _Brotli(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        # Em streams, flush a cada pedaço: o cliente recebe o que já foi gerado
+        if more_body:
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+
+class _BrotliResponder(_ContaBytes, _Brotli):
+    pass
+
+
+class _GZipResponder(_ContaBytes, GZipResponder):
+    pass
+
+
+settings = CompressionSettings.from_env()
+
+
+class CompressionMiddleware:
+    """ASGI puro: escolhe o encoding pela requisição e delega aos responders do Starlette."""
+
+    def __init__(self, app: ASGIApp, settings: Optional[CompressionSettings] = None):
+        self.app = app
+        self.settings = settings or CompressionSettings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = escolhe_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        s = self.settings
+        if encoding == "br":
+            responder = _BrotliResponder(self.app, s.minimum_size, s.brotli_quality)
+        else:
+            responder = _GZipResponder(self.app, s.minimum_size, compresslevel=s.gzip_level)
+
+        async def send_etag_fraco(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/") and "content-encoding" in headers:
+                    headers["etag"] = "W/" + etag
+            await send(message)
+
+        await responder(scope, receive, send_etag_fraco)
@@ -1,13 +1,25 @@
-from pydantic import BaseModel
-from typing import Literal, List
+from pydantic import AfterValidator, BaseModel, Field, PlainSerializer
+from typing import Annotated, Dict, Literal, List, Optional
 from datetime import datetime
+from decimal import Decimal
+
+from backend import money
+
+# Dinheiro em reais: a entrada é arredondada para o centavo por `money.reais` (10.555 -> 10.56,
+# 0.1 + 0.2 vindo do JS -> 0.30), Decimal no Python (contas exatas, ver backend/money.py),
+# número no JSON (12.9), como o frontend sempre recebeu
+Dinheiro = Annotated[
+    Decimal,
+    AfterValidator(money.reais),
+    PlainSerializer(float, return_type=float, when_used="json"),
+]
 
 # --- Schemas de Produto (existentes) ---
 
 class ProdutoBase(BaseModel):
     name: str
     description: str
-    price: float
+    price: Dinheiro
     image: str
     category: Literal["beer", "food"] 
 
@@ -25,7 +37,7 @@ class Produto(ProdutoBase):
 # 2.1 Item de Pedido para ENTRADA (O que o frontend envia no carrinho)
 class CartItem(BaseModel):
     produto_id: str
-    quantity: int
+    quantity: int = Field(gt=0) # Quantidade negativa devolveria estoque (ver backend/estoque.py)
 
 # 2.2 Pedido para CRIAÇÃO (O que a rota POST /pedidos/ espera)
 class PedidoCreate(BaseModel):
@@ -36,21 +48,80 @@ class PedidoCreate(BaseModel):
 class PedidoItem(BaseModel):
     produto_id: str
     produto_name: str
-    unit_price: float
+    unit_price: Dinheiro
     quantity: int
 
     class Config:
         from_attributes = True
 
-# 2.4 Pedido para SAÍDA (O que a rota GET /pedidos/ retorna)
-class Pedido(BaseModel):
+# 2.4 Cabeçalho do Pedido, sem itens (O que a rota GET /pedidos/resumo/ retorna)
+class PedidoResumo(BaseModel):
     id: int
     pedido_date: datetime
-    total_price: float
+    total_price: Dinheiro
     status: str
-    items: List[PedidoItem] # Inclui os itens do pedido
+    version: int = 1
 
     class Config:
         from_attributes = True
 
-        
\ No newline at end of file
+# 2.5 Pedido para SAÍDA (O que a rota GET /pedidos/ retorna)
+class Pedido(PedidoResumo):
+    items: List[PedidoItem] # Inclui os itens do pedido
+
+# 2.6 Transições de status (PATCH /pedidos/{id}/status e POST /pedidos/status/)
+StatusPedido = Literal["pending", "approved", "shipped", "delivered", "cancelled"]
+
+class PedidoStatusUpdate(BaseModel):
+    status: StatusPedido
+    version: Optional[int] = None # Versão que o cliente viu; se diferir da atual, 409
+
+class PedidoStatusBulkUpdate(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=500)
+    status: StatusPedido
+    versions: Optional[Dict[int, int]] = None # pedido_id -> versão vista (opcional, por pedido)
+
+class PedidoStatusResultado(BaseModel):
+    id: int
+    result: Literal["updated", "unchanged", "conflict", "invalid_transition", "not_found"]
+    status: Optional[str] = None # Status atual (após a transição, se aplicada)
+    version: Optional[int] = None
+
+# --- Schemas dos Relatórios de vendas (GET /relatorios/...) ---
+
+class VendasProduto(BaseModel):
+    produto_id: str
+    produto_name: Optional[str]
+    category: Optional[str]
+    quantity: int
+    revenue: Dinheiro
+    pedidos: int
+
+class VendasCategoria(BaseModel):
+    category: Optional[str]
+    quantity: int
+    revenue: Dinheiro
+
+class VendasPeriodo(BaseModel):
+    inicio: datetime
+    quantity: int
+    revenue: Dinheiro
+
+# --- Schemas de Estoque (ver backend/estoque.py) ---
+
+class EstoqueUpdate(BaseModel):
+    stock: Optional[int] = Field(None, ge=0)        # None desliga o controle de estoque do produto
+    stock_per_unit: int = Field(1, gt=0)            # ml por copo (chope) ou 1 (comida)
+    stock_min: Optional[int] = Field(None, ge=0)    # Limite de estoque baixo
+
+class Estoque(BaseModel):
+    id: str
+    name: str
+    category: Optional[str]
+    stock: Optional[int]
+    stock_per_unit: int
+    stock_min: Optional[int]
+    porcoes: Optional[int]                          # Copos/unidades que ainda dá para vender
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,98 @@
+# backend/scripts/_bench.py
+"""
+Utilitários compartilhados pelos scripts de benchmark em `backend/scripts`.
+
+Cada benchmark roda contra um banco SQLite temporário (nunca o `choperia.db`
+do projeto), semeado com produtos sintéticos.
+"""
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend import migrations, models
+
+
+class QueryCounter:
+    """Conta os statements SQL emitidos por um engine enquanto está ativo."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.statements: List[str] = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[QueryCounter]:
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter._on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter._on_execute)
+
+
+def make_temp_engine(prefix: str = "choperia-bench-") -> Engine:
+    """Cria um engine SQLite em arquivo temporário com o schema do projeto (todas as migrações)."""
+    tmpdir = tempfile.mkdtemp(prefix=prefix)
+    url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    migrations.upgrade(engine)
+    return engine
+
+
+def make_session_factory(engine: Engine) -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def seed_produtos(db: Session, total: int) -> List[str]:
+    """Insere `total` produtos sintéticos e retorna seus IDs."""
+    ids = [f"bench-{i}" for i in range(total)]
+    db.add_all(
+        models.Produto(
+            id=produto_id,
+            name=f"Produto {i}",
+            description="Produto sintético para benchmark",
+            price=10.0 + (i % 50) * 0.5,
+            image="🍺",
+            category="beer" if i % 2 == 0 else "food",
+        )
+        for i, produto_id in enumerate(ids)
+    )
+    db.commit()
+    return ids
+
+
+def timed(fn, repeat: int) -> List[float]:
+    """Executa `fn` `repeat` vezes e retorna as latências em milissegundos."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 (ms) de uma lista de latências."""
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        index = min(len(ordered) - 1, max(0, round(p / 100.0 * len(ordered)) - 1))
+        return ordered[index]
+
+    return {
+        "p50": statistics.median(ordered),
+        "p95": pct(95),
+        "p99": pct(99),
+        "mean": statistics.fmean(ordered),
+    }
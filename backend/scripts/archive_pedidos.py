@@ -0,0 +1,75 @@
+# backend/scripts/archive_pedidos.py
+"""
+Move os pedidos fechados antigos para o arquivo morto (`backend/arquivo.py`):
+saem de `pedidos`/`pedido_items` e vão para `ARCHIVE_DATABASE_URL`, e
+GET /pedidos/{id} continua encontrando cada um deles. Com `ARCHIVE_ENABLED=1`
+a aplicação faz o mesmo sozinha, um lote por job; o comando serve para a
+primeira carga (um histórico grande) ou para rodar por cron.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.archive_pedidos              # idade de ARCHIVE_AFTER_DAYS
+    python -m backend.scripts.archive_pedidos --dias 30 --batch 1000 --vacuum
+    python -m backend.scripts.archive_pedidos --dry-run
+    python -m backend.scripts.archive_pedidos status
+"""
+import argparse
+import os
+import sys
+import time
+
+from sqlalchemy import func, select, text
+
+try:
+    from backend import arquivo, database, models
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import arquivo, database, models
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("comando", nargs="?", choices=["arquiva", "status"], default="arquiva")
+    parser.add_argument("--dias", type=float, help=f"idade mínima em dias (padrão: {arquivo.morto.settings.after_days:g})")
+    parser.add_argument("--batch", type=int, help=f"pedidos por lote (padrão: {arquivo.morto.settings.batch_size})")
+    parser.add_argument("--dry-run", action="store_true", help="só conta os pedidos que seriam arquivados")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="VACUUM no banco principal depois (SQLite; trava o banco: use fora do expediente)")
+    args = parser.parse_args()
+
+    morto = arquivo.morto
+    print(f"Banco:   {database.engine.url.render_as_string(hide_password=True)}")
+    if morto.settings.url is None:
+        sys.exit("Arquivo: nenhum (o banco principal não é um arquivo SQLite; defina ARCHIVE_DATABASE_URL)")
+    print(f"Arquivo: {morto.settings.url}")
+    with database.SessionLocal() as db:
+        no_banco = db.scalar(select(func.count()).select_from(models.Pedido))
+        if args.comando == "status":
+            resumo = morto.resumo()
+            print(f"Pedidos no banco: {no_banco} / no arquivo: {resumo['pedidos']}")
+            for mes, total in resumo["meses"].items():
+                print(f"  {mes} {total:>8}")
+            return
+
+        antes = morto.corte(args.dias)
+        if args.dry_run:
+            candidatos = db.scalar(select(func.count()).select_from(morto.candidatos(db, antes).subquery()))
+            print(f"{candidatos} de {no_banco} pedidos fechados antes de {antes:%Y-%m-%d %H:%M} (UTC) seriam arquivados")
+            return
+
+        inicio = time.perf_counter()
+        movidos = morto.arquiva(db, dias=args.dias, limite=args.batch)
+        print(f"{movidos} de {no_banco} pedidos arquivados (antes de {antes:%Y-%m-%d %H:%M} UTC) "
+              f"em {time.perf_counter() - inicio:.1f}s")
+
+    if args.vacuum and database.settings.is_sqlite:
+        inicio = time.perf_counter()
+        with database.engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+        print(f"VACUUM em {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
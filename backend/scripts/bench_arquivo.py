@@ -0,0 +1,178 @@
+# backend/scripts/bench_arquivo.py
+"""
+Benchmark do arquivo morto de pedidos (`backend/arquivo.py`) sobre um
+histórico sintético de um ano: a maioria dos pedidos fechados e antigos, os
+últimos dias ainda em andamento.
+
+1. Tamanho: banco principal antes e depois de arquivar (com VACUUM) e o
+   arquivo, e quanto o zlib economiza nos itens.
+2. Latência das consultas que varrem ou filtram as tabelas quentes
+   (GET /pedidos/ com filtros, o resumo e um COUNT), antes x depois.
+3. GET /pedidos/{id} de um pedido no banco principal x no arquivo.
+4. Vazão do arquivamento (pedidos por segundo, em lotes de `--batch`).
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_arquivo
+    python -m backend.scripts.bench_arquivo --pedidos 200000 --itens 5 --dias 90 --batch 1000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# O backend lê a configuração ao importar: o banco temporário (e o arquivo ao
+# lado dele) precisa estar no ambiente antes de qualquer import de `backend`.
+_TMPDIR = tempfile.mkdtemp(prefix="choperia-arquivo-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMPDIR, 'bench.db')}"
+os.environ.setdefault("DEV_TOOLS", "0")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+os.environ["ARCHIVE_ENABLED"] = "0"
+
+import httpx  # noqa: E402
+from sqlalchemy import func, insert, select, text  # noqa: E402
+
+try:
+    from backend.scripts import _bench
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend.scripts import _bench
+
+
+def seed_historico(db, models, produto_ids, total: int, itens: int) -> None:
+    """`total` pedidos espalhados pelos últimos 365 dias; os dos últimos 2 dias ficam em andamento."""
+    agora = datetime.utcnow()
+    passo = timedelta(days=365) / total
+    item_id = 0
+    for lote in range(0, total, 5000):
+        pedidos, linhas = [], []
+        for i in range(lote, min(total, lote + 5000)):
+            data = agora - timedelta(days=365) + passo * i
+            if agora - data < timedelta(days=2):
+                status = ("pending", "preparing", "ready")[i % 3]
+            else:
+                status = "cancelled" if i % 20 == 0 else "delivered"
+            pedidos.append({
+                "id": i + 1, "pedido_date": data, "status": status, "version": 1,
+                "total_price": Decimal("12.90") * 2 * itens,
+            })
+            for j in range(itens):
+                item_id += 1
+                produto = produto_ids[(i + j) % len(produto_ids)]
+                linhas.append({
+                    "id": item_id, "pedido_id": i + 1, "produto_id": produto,
+                    "produto_name": f"Chopp Artesanal {produto} 500ml", "unit_price": Decimal("12.90"), "quantity": 2,
+                })
+        db.execute(insert(models.Pedido), pedidos)
+        db.execute(insert(models.PedidoItem), linhas)
+        db.commit()
+
+
+CONSULTAS = {
+    "listagem": "/pedidos/?limit=50",
+    "status=delivered": "/pedidos/?status=delivered&limit=50",
+    "últimos 30 dias": None,  # preenchida em rodar (depende da data atual)
+    "resumo": "/pedidos/resumo/?limit=50",
+}
+
+
+async def latencias(app, urls, repeat: int):
+    resultado = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for nome, url in urls.items():
+            amostras = []
+            for _ in range(repeat):
+                inicio = time.perf_counter()
+                r = await client.get(url)
+                amostras.append((time.perf_counter() - inicio) * 1000.0)
+                assert r.status_code == 200, r.text
+            resultado[nome] = _bench.summarize(amostras)["p50"]
+    return resultado
+
+
+def conta(database, models, repeat: int) -> float:
+    def contagem():
+        with database.engine.connect() as conn:
+            conn.execute(select(func.count()).select_from(models.Pedido)).scalar()
+            conn.execute(select(func.count()).select_from(models.PedidoItem)).scalar()
+    return _bench.summarize(_bench.timed(contagem, repeat))["p50"]
+
+
+def vacuum(database) -> None:
+    with database.engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+
+
+def tamanho_mb(caminho: str) -> float:
+    return sum(os.path.getsize(p) for p in (caminho, caminho + "-wal") if os.path.exists(p)) / 1e6
+
+
+async def rodar(args) -> None:
+    from backend import arquivo, database, migrations, models
+    from backend.main import app
+
+    migrations.upgrade(database.engine)
+    banco = os.path.join(_TMPDIR, "bench.db")
+    with database.SessionLocal() as db:
+        produto_ids = _bench.seed_produtos(db, 200)
+        seed_historico(db, models, produto_ids, args.pedidos, args.itens)
+        vivo_id = db.scalar(select(func.max(models.Pedido.id)))
+        antigo_id = db.scalar(select(func.min(models.Pedido.id)).where(models.Pedido.status == "delivered"))
+    vacuum(database)
+    urls = dict(CONSULTAS)
+    urls["últimos 30 dias"] = f"/pedidos/?date_from={(datetime.utcnow() - timedelta(days=30)):%Y-%m-%dT%H:%M:%S}&limit=50"
+    urls["GET /pedidos/{id} (no banco)"] = f"/pedidos/{vivo_id}"
+
+    async with app.router.lifespan_context(app):
+        antes = await latencias(app, urls, args.repeat)
+        antes["COUNT pedidos + itens"] = conta(database, models, args.repeat)
+        tamanho_antes = tamanho_mb(banco)
+
+        with database.SessionLocal() as db:
+            inicio = time.perf_counter()
+            movidos = arquivo.morto.arquiva(db, dias=args.dias, limite=args.batch)
+            duracao = time.perf_counter() - inicio
+            restantes = db.scalar(select(func.count()).select_from(models.Pedido))
+        vacuum(database)
+
+        urls["GET /pedidos/{id} (no arquivo)"] = f"/pedidos/{antigo_id}"
+        depois = await latencias(app, urls, args.repeat)
+        depois["COUNT pedidos + itens"] = conta(database, models, args.repeat)
+
+    caminho_arquivo = arquivo.morto.settings.url[len("sqlite:///"):]
+    with arquivo.morto.engine().connect() as conn:
+        blobs = [blob for (blob,) in conn.execute(select(arquivo.pedidos_arquivados.c["items"]))]
+    comprimido = sum(len(blob) for blob in blobs)
+    json_puro = sum(len(zlib.decompress(blob)) for blob in blobs)
+
+    print(f"{args.pedidos} pedidos de {args.itens} itens em 365 dias; arquivados os fechados com mais de "
+          f"{args.dias:g} dias: {movidos} em {duracao:.1f}s ({movidos / duracao:.0f} pedidos/s, lotes de {args.batch})")
+    print(f"\n1. tamanho: banco principal {tamanho_antes:.1f} MB -> {tamanho_mb(banco):.1f} MB "
+          f"({restantes} pedidos), arquivo {tamanho_mb(caminho_arquivo):.1f} MB")
+    print(f"   itens no arquivo: {json_puro / 1e6:.1f} MB em JSON, {comprimido / 1e6:.1f} MB com zlib "
+          f"({comprimido / max(json_puro, 1):.0%})")
+    print(f"\n2/3. p50 ms {'antes':>10} {'depois':>10}")
+    for nome in depois:
+        print(f"  {nome:<30} {antes.get(nome, float('nan')):>10.3f} {depois[nome]:>10.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pedidos", type=int, default=100_000)
+    parser.add_argument("--itens", type=int, default=4)
+    parser.add_argument("--dias", type=float, default=90.0, help="idade mínima para arquivar")
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(rodar(args))
+
+
+if __name__ == "__main__":
+    main()
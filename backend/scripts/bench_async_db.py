@@ -0,0 +1,65 @@
+# backend/scripts/bench_async_db.py
+"""
+Compara os modos síncrono (padrão) e assíncrono (DB_ASYNC=1) do acesso ao
+banco rodando o harness `backend.scripts.benchmark` uma vez em cada modo.
+
+Cada modo roda em um processo separado (a configuração é lida na importação
+do backend) com os mesmos parâmetros; o resultado é uma tabela lado a lado.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_async_db
+    python -m backend.scripts.bench_async_db --concurrency 64 --requests 1000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def rodar_modo(async_mode: bool, extra_args: list) -> dict:
+    fd, output = tempfile.mkstemp(suffix=".json", prefix="choperia-bench-")
+    os.close(fd)
+    env = dict(os.environ, DB_ASYNC="1" if async_mode else "0")
+    print(f"\n=== DB_ASYNC={env['DB_ASYNC']} ===", flush=True)
+    subprocess.run(
+        [sys.executable, "-m", "backend.scripts.benchmark", "--output", output, *extra_args],
+        cwd=PROJECT_ROOT, env=env, check=True,
+    )
+    with open(output, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--only", nargs="+", default=["catalog", "history", "orders"])
+    parser.add_argument("--depths", type=int, nargs="+", default=[10_000])
+    args = parser.parse_args()
+
+    extra = [
+        "--concurrency", str(args.concurrency),
+        "--requests", str(args.requests),
+        "--only", *args.only,
+        "--depths", *map(str, args.depths),
+    ]
+    sync_results = rodar_modo(False, extra)
+    async_results = rodar_modo(True, extra)
+
+    print(f"\n{'cenário':<34} {'sync p95':>9} {'async p95':>9} {'sync req/s':>11} {'async req/s':>11}")
+    for nome, s in sync_results.items():
+        a = async_results.get(nome)
+        if a is None:
+            continue
+        print(
+            f"{nome:<34} {s['p95_ms']:>9.2f} {a['p95_ms']:>9.2f} "
+            f"{s['throughput_rps']:>11.1f} {a['throughput_rps']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# backend/scripts/bench_catalog_import.py
+"""
+Benchmark da importação do catálogo: carga antiga (get_produto + commit por
+produto) x upsert em blocos (`catalog_import.upsert_produtos`).
+
+Gera um feed CSV sintético, importa num banco vazio (tudo inserido) e importa
+de novo com parte dos preços alterados (updated + unchanged). A carga antiga
+roda só sobre `--legacy-rows` linhas, porque em 50 mil levaria minutos.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_catalog_import
+    python -m backend.scripts.bench_catalog_import --rows 50000 --chunk-size 2000
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+try:
+    from backend import catalog_import, crud, schemas
+    from backend.scripts import _bench
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import catalog_import, crud, schemas
+    from backend.scripts import _bench
+
+
+def escreve_feed(path: str, rows: int, bump_every: int = 0) -> None:
+    """Feed CSV sintético; com `bump_every`, um a cada N produtos muda de preço."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "description", "price", "image", "category"])
+        for i in range(rows):
+            price = 10.0 + (i % 50) * 0.5
+            if bump_every and i % bump_every == 0:
+                price += 1.0
+            writer.writerow([f"sku-{i}", f"Produto {i}", "Produto do fornecedor", f"{price:.2f}",
+                             "🍺", "beer" if i % 2 == 0 else "food"])
+
+
+def carga_antiga(db, path: str, limit: int) -> int:
+    """O loop de populate.py/initialize_produtos antes do upsert em lote."""
+    count = 0
+    with open(path, encoding="utf-8", newline="") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            if i >= limit:
+                break
+            produto = schemas.ProdutoCreate(**row)
+            if crud.get_produto(db, produto_id=produto.id) is None:
+                crud.create_produto(db, produto)
+                count += 1
+    return count
+
+
+def importa(db, path: str, chunk_size: int) -> catalog_import.ImportResult:
+    with open(path, encoding="utf-8", newline="") as f:
+        return catalog_import.upsert_produtos(db, catalog_import.iter_csv(f), chunk_size=chunk_size)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--chunk-size", type=int, default=catalog_import.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--legacy-rows", type=int, default=2_000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="choperia-import-")
+    feed = os.path.join(tmpdir, "feed.csv")
+    feed_v2 = os.path.join(tmpdir, "feed-v2.csv")
+    escreve_feed(feed, args.rows)
+    escreve_feed(feed_v2, args.rows, bump_every=10)
+
+    print(f"{'cenário':<28} {'linhas':>8} {'queries':>8} {'segundos':>9} {'linhas/s':>10}")
+
+    def linha(nome, rows, queries, elapsed):
+        print(f"{nome:<28} {rows:>8} {queries:>8} {elapsed:>9.2f} {rows / elapsed:>10.0f}")
+
+    engine = _bench.make_temp_engine()
+    db = _bench.make_session_factory(engine)()
+    try:
+        with _bench.count_queries(engine) as counter:
+            start = time.perf_counter()
+            carga_antiga(db, feed, args.legacy_rows)
+            linha("antiga (get + commit/linha)", args.legacy_rows, counter.count, time.perf_counter() - start)
+    finally:
+        db.close()
+
+    engine = _bench.make_temp_engine()
+    db = _bench.make_session_factory(engine)()
+    try:
+        for nome, path in (("upsert, banco vazio", feed), ("upsert, 10% alterados", feed_v2)):
+            with _bench.count_queries(engine) as counter:
+                start = time.perf_counter()
+                result = importa(db, path, args.chunk_size)
+                linha(nome, args.rows, counter.count, time.perf_counter() - start)
+            print(f"{'':<28} inserted={result.inserted} updated={result.updated} "
+                  f"unchanged={result.unchanged} rejected={result.rejected}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# backend/scripts/bench_create_pedido.py
+"""
+Benchmark de `crud.create_pedido`: número de queries e latência conforme o
+tamanho do carrinho cresce.
+
+Compara a validação antiga (um `get_produto` por item do carrinho) com a
+busca em lote (`get_produtos_by_ids`) e mede o checkout completo.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_create_pedido
+    python -m backend.scripts.bench_create_pedido --sizes 1 10 30 100 --repeat 50
+"""
+import argparse
+import os
+import sys
+
+try:
+    from backend import crud, schemas
+    from backend.scripts import _bench
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import crud, schemas
+    from backend.scripts import _bench
+
+
+def lookup_por_item(db, produto_ids):
+    """Validação antiga: uma consulta por linha do carrinho."""
+    return [crud.get_produto(db, produto_id=produto_id) for produto_id in produto_ids]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10, 30, 100])
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--catalog", type=int, default=500, help="produtos semeados")
+    args = parser.parse_args()
+
+    engine = _bench.make_temp_engine()
+    SessionLocal = _bench.make_session_factory(engine)
+    db = SessionLocal()
+    try:
+        ids = _bench.seed_produtos(db, max(args.catalog, max(args.sizes)))
+
+        print(f"{'itens':>6} | {'lookup/item':>22} | {'lookup em lote':>22} | {'create_pedido':>22}")
+        print(f"{'':>6} | {'queries':>8} {'p50 ms':>13} | {'queries':>8} {'p50 ms':>13} | {'queries':>8} {'p50 ms':>13}")
+        for size in args.sizes:
+            cart_ids = ids[:size]
+            pedido = schemas.PedidoCreate(
+                items=[schemas.CartItem(produto_id=produto_id, quantity=2) for produto_id in cart_ids]
+            )
+            linhas = []
+            for fn in (
+                lambda: lookup_por_item(db, cart_ids),
+                lambda: crud.get_produtos_by_ids(db, cart_ids),
+                lambda: crud.create_pedido(db, pedido),
+            ):
+                # expire_all força cada rodada a ir ao banco, como em uma request nova
+                db.expire_all()
+                with _bench.count_queries(engine) as counter:
+                    fn()
+                samples = _bench.timed(lambda: (db.expire_all(), fn()), args.repeat)
+                linhas.append((counter.count, _bench.summarize(samples)["p50"]))
+            print(f"{size:>6} | " + " | ".join(f"{q:>8} {ms:>13.3f}" for q, ms in linhas))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# backend/scripts/bench_estoque.py
+"""
+Benchmark do controle de estoque (`backend/estoque.py`): custo da baixa no
+checkout (queries e latência, com e sem estoque controlado), checkouts
+concorrentes disputando o mesmo barril (sem vender copo a mais) e a consulta
+de estoque baixo pelo índice parcial.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_estoque
+    python -m backend.scripts.bench_estoque --carrinhos 1 10 30 --threads 8 --barril 50000
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import text, update
+
+try:
+    from backend import crud, estoque, models, schemas
+    from backend.scripts import _bench
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import crud, estoque, models, schemas
+    from backend.scripts import _bench
+
+
+def carrinho(produto_ids, tamanho: int, quantidade: int = 1) -> schemas.PedidoCreate:
+    return schemas.PedidoCreate(items=[
+        schemas.CartItem(produto_id=produto_id, quantity=quantidade) for produto_id in produto_ids[:tamanho]
+    ])
+
+
+def controla(db, produto_ids, stock) -> None:
+    db.execute(
+        update(models.Produto.__table__)
+        .where(models.Produto.id.in_(produto_ids))
+        .values(stock=stock, stock_per_unit=1, stock_min=None)
+    )
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--carrinhos", type=int, nargs="+", default=[1, 10, 30])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--barril", type=int, default=50_000, help="volume do barril em ml")
+    parser.add_argument("--copo", type=int, default=500, help="ml por copo")
+    parser.add_argument("--catalogo", type=int, default=5_000)
+    args = parser.parse_args()
+
+    engine = _bench.make_temp_engine()
+    SessionLocal = _bench.make_session_factory(engine)
+    db = SessionLocal()
+    try:
+        produto_ids = _bench.seed_produtos(db, max(args.catalogo, max(args.carrinhos)))
+
+        # 1. Custo da baixa no checkout: o mesmo UPDATE, com os produtos sem controle (NULL) ou controlados
+        print(f"{'carrinho':>8} | {'stock NULL: q':>14} {'p50 ms':>8} | {'controlado: q':>14} {'p50 ms':>8}")
+        for tamanho in args.carrinhos:
+            linhas = []
+            for stock in (None, 10 ** 9):
+                controla(db, produto_ids[:tamanho], stock)
+                pedido = carrinho(produto_ids, tamanho)
+                crud.create_pedido(db, pedido)  # aquece o cache do catálogo
+                with _bench.count_queries(engine) as counter:
+                    crud.create_pedido(db, pedido)
+                amostras = _bench.timed(lambda: crud.create_pedido(db, pedido), args.repeat)
+                linhas.append((counter.count, _bench.summarize(amostras)["p50"]))
+            print(f"{tamanho:>8} | " + " | ".join(f"{q:>14} {ms:>8.2f}" for q, ms in linhas))
+
+        # 2. Checkouts concorrentes no mesmo barril: todos tentam até esgotar
+        chope = produto_ids[0]
+        db.execute(
+            update(models.Produto.__table__).where(models.Produto.id == chope)
+            .values(stock=args.barril, stock_per_unit=args.copo, stock_min=args.copo * 10)
+        )
+        db.commit()
+        resultados: Counter = Counter()
+        vendidos = Counter()
+        lock = threading.Lock()
+
+        def caixa(n: int) -> None:
+            sessao = SessionLocal()
+            try:
+                quantidade = 1 + n % 2  # metade das mesas pede 2 copos
+                while True:
+                    try:
+                        crud.create_pedido(sessao, carrinho([chope], 1, quantidade))
+                    except estoque.EstoqueInsuficienteError:
+                        with lock:
+                            resultados["esgotado"] += 1
+                        if quantidade == 1:
+                            return
+                        quantidade = 1  # sobrou um copo: tenta de um
+                        continue
+                    with lock:
+                        resultados["vendido"] += 1
+                        vendidos["copos"] += quantidade
+            finally:
+                sessao.close()
+
+        threads = [threading.Thread(target=caixa, args=(i,)) for i in range(args.threads)]
+        inicio = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracao = time.perf_counter() - inicio
+        restante = estoque.get_estoque(db, chope)
+        copos = args.barril // args.copo
+        print(f"\n{args.threads} caixas concorrentes num barril de {args.barril} ml ({copos} copos de {args.copo} ml):")
+        print(f"  pedidos aceitos={resultados['vendido']} recusados={resultados['esgotado']} "
+              f"copos vendidos={vendidos['copos']} restante={restante.stock} ml "
+              f"({resultados['vendido'] / duracao:.0f} pedidos/s)")
+        print(f"  sem venda a mais: {vendidos['copos'] * args.copo + restante.stock == args.barril and restante.stock >= 0}")
+
+        # 3. Estoque baixo: o índice parcial só contém os produtos abaixo do limite
+        controla(db, produto_ids, 1_000)
+        db.execute(
+            update(models.Produto.__table__).where(models.Produto.id.in_(produto_ids[::250]))
+            .values(stock_min=2_000)
+        )
+        db.commit()
+        plano = db.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM produtos WHERE stock <= stock_min ORDER BY category, stock"
+        )).all()
+        amostras = _bench.timed(lambda: estoque.estoque_baixo(db), args.repeat)
+        print(f"\nestoque baixo ({len(estoque.estoque_baixo(db))} de {len(produto_ids)} produtos): "
+              f"p50={_bench.summarize(amostras)['p50']:.3f} ms; plano: {plano[0][-1]}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
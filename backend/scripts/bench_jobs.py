@@ -0,0 +1,107 @@
+# backend/scripts/bench_jobs.py
+"""
+Benchmark da fila de jobs (`backend/jobs.py`) no checkout: latência de
+POST /pedidos/ com os agregados de vendas na transação do pedido (fila
+desligada) x num worker depois do commit (fila em memória e durável), quanto
+tempo a fila leva para esvaziar depois da última resposta e se os agregados
+batem com os itens gravados.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_jobs
+    python -m backend.scripts.bench_jobs --pedidos 2000 --concurrency 16 --itens 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# O backend lê a configuração ao importar (inclusive via `_bench`): o banco
+# temporário precisa estar no ambiente antes de qualquer import de `backend`.
+_TMPDIR = tempfile.mkdtemp(prefix="choperia-jobs-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMPDIR, 'bench.db')}"
+os.environ.setdefault("DEV_TOOLS", "0")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+import httpx  # noqa: E402
+
+try:
+    from backend.scripts import _bench
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend.scripts import _bench
+
+
+MODOS = ("na transação", "em memória", "durável")
+
+
+async def rodar(args) -> None:
+    from sqlalchemy import func, select
+
+    from backend import database, jobs, migrations, models, reports
+    migrations.upgrade(database.engine)
+    from backend.main import app
+
+    with database.SessionLocal() as db:
+        produto_ids = _bench.seed_produtos(db, 50)
+
+    print(f"{args.pedidos} pedidos de {args.itens} itens, {args.concurrency} em paralelo, {args.workers} workers")
+    print(f"{'agregados':<14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'pedidos/s':>10} {'fila esvazia ms':>16}")
+    for modo in MODOS:
+        jobs.queue.settings = jobs.JobSettings(
+            enabled=modo != "na transação", durable=modo == "durável", workers=args.workers, max_queue=args.max_queue,
+        )
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+                semaforo = asyncio.Semaphore(args.concurrency)
+                latencias = []
+
+                async def pedido(i: int) -> None:
+                    items = [
+                        {"produto_id": produto_ids[(i + j) % len(produto_ids)], "quantity": 1}
+                        for j in range(args.itens)
+                    ]
+                    async with semaforo:
+                        inicio = time.perf_counter()
+                        r = await client.post("/pedidos/", json={"items": items})
+                        latencias.append((time.perf_counter() - inicio) * 1000.0)
+                    assert r.status_code == 201, r.text
+
+                inicio = time.perf_counter()
+                await asyncio.gather(*(pedido(i) for i in range(args.pedidos)))
+                duracao = time.perf_counter() - inicio
+                fim = time.perf_counter()
+                await jobs.queue.join()
+                esvazia = (time.perf_counter() - fim) * 1000.0
+        resumo = _bench.summarize(latencias)
+        print(f"{modo:<14} {resumo['p50']:>8.2f} {resumo['p95']:>8.2f} {resumo['p99']:>8.2f} "
+              f"{args.pedidos / duracao:>10.0f} {esvazia:>16.1f}")
+
+    with database.SessionLocal() as db:
+        vendidos = db.scalar(select(func.sum(models.PedidoItem.quantity)))
+        agregados = db.scalar(
+            select(func.sum(models.VendaAgregada.quantity)).where(models.VendaAgregada.periodo == reports.DIA)
+        )
+        pendentes = db.scalar(select(func.count()).select_from(models.Job))
+    print(f"\nitens vendidos={vendidos} nos agregados diários={agregados} jobs na tabela={pendentes} "
+          f"(consistente: {vendidos == agregados and pendentes == 0})")
+    print("fila:", jobs.queue.stats())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pedidos", type=int, default=500)
+    parser.add_argument("--itens", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-queue", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(rodar(args))
+
+
+if __name__ == "__main__":
+    main()
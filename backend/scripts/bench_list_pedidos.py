@@ -0,0 +1,135 @@
+# backend/scripts/bench_list_pedidos.py
+"""
+Benchmark da listagem de pedidos: queries e latência por tamanho de página,
+incluindo a serialização da resposta (onde o lazy-load dos itens acontecia).
+
+Também compara OFFSET com cursor (keyset) em páginas profundas do histórico.
+
+Com `--check` o script falha (exit 1) se o número de queries de uma página
+crescer com o número de pedidos — guarda de regressão contra N+1 (a mesma
+guarda roda nos testes: backend/tests/test_pedidos_queries.py).
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_list_pedidos
+    python -m backend.scripts.bench_list_pedidos --check
+    python -m backend.scripts.bench_list_pedidos --history 200000
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+try:
+    from backend import crud, models, schemas
+    from backend.scripts import _bench
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import crud, models, schemas
+    from backend.scripts import _bench
+
+# Limite de queries por página, independente do tamanho da página
+MAX_QUERIES = {"get_pedido": 2, "get_pedidos": 2, "get_pedidos_resumo": 1}
+
+
+def seed_pedidos(db, produto_ids, total: int, items_por_pedido: int = 3) -> None:
+    for i in range(total):
+        cart = [
+            schemas.CartItem(produto_id=produto_ids[(i + j) % len(produto_ids)], quantity=1)
+            for j in range(items_por_pedido)
+        ]
+        crud.create_pedido(db, schemas.PedidoCreate(items=cart))
+
+
+def seed_historico(db, total: int) -> None:
+    """Insere `total` cabeçalhos de pedido em lote (histórico profundo)."""
+    inicio = datetime(2024, 1, 1)
+    lote = 10_000
+    for start in range(0, total, lote):
+        db.execute(
+            insert(models.Pedido),
+            [
+                {"pedido_date": inicio + timedelta(minutes=i), "total_price": 10.0, "status": "delivered"}
+                for i in range(start, min(start + lote, total))
+            ],
+        )
+    db.commit()
+
+
+def bench_profundidade(historico: int, limit: int, repeat: int) -> None:
+    """Custo de uma página no início, meio e fim do histórico: OFFSET vs cursor."""
+    engine = _bench.make_temp_engine()
+    db = _bench.make_session_factory(engine)()
+    try:
+        seed_historico(db, historico)
+        print(f"\nHistórico de {historico} pedidos, página de {limit}")
+        print(f"{'profundidade':>12} {'offset p50 ms':>14} {'cursor p50 ms':>14}")
+        for skip in (0, historico // 2, historico - limit):
+            # A chave da linha anterior à página é o que o cliente teria no cursor
+            anterior = crud.get_pedidos_resumo(db, skip=skip - 1, limit=1) if skip else []
+            after = (anterior[0].pedido_date, anterior[0].id) if anterior else None
+            offset = _bench.summarize(_bench.timed(
+                lambda: crud.get_pedidos_resumo(db, skip=skip, limit=limit), repeat))
+            keyset = _bench.summarize(_bench.timed(
+                lambda: crud.get_pedidos_resumo(db, limit=limit, after=after), repeat))
+            print(f"{skip:>12} {offset['p50']:>14.3f} {keyset['p50']:>14.3f}")
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--check", action="store_true", help="falha se houver N+1")
+    parser.add_argument("--history", type=int, default=100_000, help="pedidos no teste de profundidade (0 desliga)")
+    args = parser.parse_args()
+
+    engine = _bench.make_temp_engine()
+    SessionLocal = _bench.make_session_factory(engine)
+    db = SessionLocal()
+    falhas = []
+    try:
+        produto_ids = _bench.seed_produtos(db, 20)
+        seed_pedidos(db, produto_ids, max(args.sizes))
+
+        cenarios = {
+            "get_pedido": lambda size: [schemas.Pedido.model_validate(crud.get_pedido(db, pedido_id=size))],
+            "get_pedidos": lambda size: [
+                schemas.Pedido.model_validate(p) for p in crud.get_pedidos(db, limit=size)
+            ],
+            "get_pedidos_resumo": lambda size: [
+                schemas.PedidoResumo.model_validate(p) for p in crud.get_pedidos_resumo(db, limit=size)
+            ],
+        }
+
+        print(f"{'cenário':<20} {'página':>7} {'queries':>8} {'p50 ms':>10} {'p95 ms':>10}")
+        for nome, fn in cenarios.items():
+            for size in args.sizes:
+                db.expire_all()
+                with _bench.count_queries(engine) as counter:
+                    fn(size)
+                stats = _bench.summarize(_bench.timed(lambda: (db.expire_all(), fn(size)), args.repeat))
+                print(f"{nome:<20} {size:>7} {counter.count:>8} {stats['p50']:>10.3f} {stats['p95']:>10.3f}")
+                if counter.count > MAX_QUERIES[nome]:
+                    falhas.append(f"{nome}(limit={size}): {counter.count} queries > {MAX_QUERIES[nome]}")
+    finally:
+        db.close()
+
+    if args.history:
+        bench_profundidade(args.history, limit=max(args.sizes), repeat=args.repeat)
+
+    if falhas:
+        print("\nRegressão de queries detectada:")
+        for falha in falhas:
+            print("  -", falha)
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# backend/scripts/bench_metrics.py
+"""
+Custo da instrumentação de `backend/metrics.py`: roda o harness
+`backend.scripts.benchmark` com `METRICS_ENABLED=0` e `METRICS_ENABLED=1`
+e compara latência e vazão de cada cenário.
+
+Cada modo roda em um processo separado (a configuração é lida na importação
+do backend). Também mede, no mesmo processo, o custo de uma observação de
+histograma e de um statement SQL contado pelos eventos do engine.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_metrics
+    python -m backend.scripts.bench_metrics --requests 1000 --only catalog orders
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from backend import metrics
+except Exception:
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    from backend import metrics
+
+
+def rodar_modo(enabled: bool, extra_args: list) -> dict:
+    fd, output = tempfile.mkstemp(suffix=".json", prefix="choperia-bench-")
+    os.close(fd)
+    env = dict(os.environ, METRICS_ENABLED="1" if enabled else "0")
+    print(f"\n=== METRICS_ENABLED={env['METRICS_ENABLED']} ===", flush=True)
+    subprocess.run(
+        [sys.executable, "-m", "backend.scripts.benchmark", "--output", output, *extra_args],
+        cwd=PROJECT_ROOT, env=env, check=True,
+    )
+    with open(output, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def micro(n: int = 100_000) -> None:
+    hist = metrics.Histogram("bench_seconds", "bench", ("route",))
+    inicio = time.perf_counter()
+    for i in range(n):
+        hist.observe(0.003, "/produtos/")
+    por_observacao = (time.perf_counter() - inicio) / n * 1e6
+
+    conexoes = {}
+    for instrumentado in (False, True):
+        engine = create_engine("sqlite://")
+        if instrumentado:
+            metrics.instrument_engine(engine)
+        conexoes[instrumentado] = engine.connect()
+    # Rodadas alternadas, melhor de cada modo (a máquina varia bastante entre rodadas)
+    tempos = {False: float("inf"), True: float("inf")}
+    for _ in range(5):
+        for instrumentado, conn in conexoes.items():
+            inicio = time.perf_counter()
+            for _ in range(n // 10):
+                conn.execute(text("SELECT 1"))
+            tempos[instrumentado] = min(tempos[instrumentado], (time.perf_counter() - inicio) / (n // 10) * 1e6)
+    for conn in conexoes.values():
+        conn.close()
+    print(f"\nhistogram.observe: {por_observacao:.2f} µs; SELECT 1: {tempos[False]:.1f} µs sem eventos, "
+          f"{tempos[True]:.1f} µs com eventos (+{tempos[True] - tempos[False]:.1f} µs por statement)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--only", nargs="+", default=["catalog", "history", "orders"])
+    parser.add_argument("--depths", type=int, nargs="+", default=[10_000])
+    args = parser.parse_args()
+
+    extra = [
+        "--concurrency", str(args.concurrency),
+        "--requests", str(args.requests),
+        "--only", *args.only,
+        "--depths", *map(str, args.depths),
+    ]
+    sem = rodar_modo(False, extra)
+    com = rodar_modo(True, extra)
+
+    print(f"\n{'cenário':<34} {'p50 sem':>8} {'p50 com':>8} {'p95 sem':>8} {'p95 com':>8} {'req/s sem':>10} {'req/s com':>10}")
+    for nome, s in sem.items():
+        c = com.get(nome)
+        if c is None:
+            continue
+        print(
+            f"{nome:<34} {s['p50_ms']:>8.2f} {c['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} {c['p95_ms']:>8.2f} "
+            f"{s['throughput_rps']:>10.1f} {c['throughput_rps']:>10.1f}"
+        )
+    micro()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# backend/scripts/bench_money.py
+"""
+Dinheiro em Float x centavos inteiros (`backend/money.py`): quanto o total
+de N pedidos desvia do valor exato e quanto custa somar no banco.
+
+Cada pedido tem de 1 a 5 itens com preços reais do cardápio (12.90, 18.50...).
+O lado "Float" faz o que o código antigo fazia (preço * quantidade somado em
+float e gravado numa coluna REAL); o lado "centavos" usa `crud.precifica_itens`
+e a coluna `Dinheiro`.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_money
+    python -m backend.scripts.bench_money --pedidos 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select, text
+
+try:
+    from backend import crud, models
+    from backend.scripts import _bench
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import crud, models
+    from backend.scripts import _bench
+
+PRECOS = ["12.90", "18.50", "14.90", "22.00", "45.00", "32.00", "9.99", "7.35"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pedidos", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'pedidos':>8} | {'desvio Float (R$)':>18} | {'desvio centavos':>15} | "
+          f"{'SUM REAL p50 ms':>15} | {'SUM INTEGER p50 ms':>18}")
+    for total in args.pedidos:
+        rng = random.Random(total)
+        engine = _bench.make_temp_engine()
+        db = _bench.make_session_factory(engine)()
+        try:
+            db.execute(text("CREATE TABLE pedidos_float (id INTEGER PRIMARY KEY, total_price REAL)"))
+            exato = Decimal("0")
+            soma_float = 0.0
+            pedidos, pedidos_float = [], []
+            produtos = {f"p{i}": _bench_produto(f"p{i}", preco) for i, preco in enumerate(PRECOS)}
+            for pedido_id in range(1, total + 1):
+                itens = {f"p{i}": rng.randint(1, 4) for i in rng.sample(range(len(PRECOS)), rng.randint(1, 5))}
+                total_decimal, _ = crud.precifica_itens(itens, produtos)
+                total_float = 0.0
+                for produto_id, quantidade in itens.items():
+                    total_float += float(produtos[produto_id].price) * quantidade
+                exato += total_decimal
+                soma_float += total_float
+                pedidos.append({"id": pedido_id, "total_price": total_decimal, "status": "approved"})
+                pedidos_float.append({"id": pedido_id, "total_price": total_float})
+            db.execute(insert(models.Pedido), pedidos)
+            db.execute(text("INSERT INTO pedidos_float (id, total_price) VALUES (:id, :total_price)"), pedidos_float)
+            db.commit()
+
+            soma_real = db.execute(text("SELECT SUM(total_price) FROM pedidos_float")).scalar()
+            soma_centavos = db.execute(select(func.sum(models.Pedido.total_price))).scalar()
+            real_ms = _bench.summarize(_bench.timed(
+                lambda: db.execute(text("SELECT SUM(total_price) FROM pedidos_float")).scalar(), args.repeat))
+            int_ms = _bench.summarize(_bench.timed(
+                lambda: db.execute(text("SELECT SUM(total_price) FROM pedidos")).scalar(), args.repeat))
+            desvio_float = max(abs(Decimal(repr(soma_float)) - exato), abs(Decimal(repr(soma_real)) - exato))
+            print(f"{total:>8} | {desvio_float:>18.10f} | {soma_centavos - exato:>15} | "
+                  f"{real_ms['p50']:>15.2f} | {int_ms['p50']:>18.2f}")
+        finally:
+            db.close()
+
+
+def _bench_produto(produto_id: str, preco: str):
+    return models.Produto(id=produto_id, name=produto_id, price=Decimal(preco), category="food")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# backend/scripts/bench_mp_client.py
+"""
+Benchmark do cliente do Mercado Pago (`backend.payments`) contra o stub local,
+com o upstream saudável e degradado (lento, instável, fora do ar).
+
+Para cada cenário mostra latência p50/p95/p99 das chamadas, quantas falharam
+e o estado final do circuit breaker.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_mp_client
+    python -m backend.scripts.bench_mp_client --calls 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+try:
+    from backend import payments
+    from backend.scripts import _bench, mp_stub
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import payments
+    from backend.scripts import _bench, mp_stub
+
+CENARIOS = {
+    "saudável": mp_stub.StubConfig(latency=0.02, jitter=0.01),
+    "lento": mp_stub.StubConfig(latency=0.3, jitter=0.2),
+    "instável (30% 5xx)": mp_stub.StubConfig(latency=0.02, error_rate=0.3),
+    "travado": mp_stub.StubConfig(hang=True),
+}
+
+PAYLOAD = {
+    "items": [{"title": "Chopp Pilsen 500ml", "quantity": 2, "unit_price": 12.9}],
+    "back_urls": {"success": "https://example.com/ok"},
+}
+
+
+async def rodar(client: payments.MercadoPagoClient, calls: int, concurrency: int):
+    sem = asyncio.Semaphore(concurrency)
+    latencias, erros = [], {}
+
+    async def uma():
+        async with sem:
+            start = time.perf_counter()
+            try:
+                await client.create_preference("TEST-TOKEN", PAYLOAD)
+            except payments.MercadoPagoError as e:
+                erros[e.status_code] = erros.get(e.status_code, 0) + 1
+            latencias.append((time.perf_counter() - start) * 1000.0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(uma() for _ in range(calls)))
+    return latencias, erros, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--read-timeout", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'cenário':<20} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'upstream':>9}  erros / breaker")
+    for nome, config in CENARIOS.items():
+        server = mp_stub.start_in_thread(config)
+        host, port = server.server_address
+        client = payments.MercadoPagoClient(payments.MercadoPagoSettings(
+            base_url=f"http://{host}:{port}",
+            connect_timeout=0.5,
+            read_timeout=args.read_timeout,
+            backoff=0.05,
+            breaker_reset=60.0,
+            rate_limit=0,
+        ))
+
+        async def cenario():
+            try:
+                return await rodar(client, args.calls, args.concurrency)
+            finally:
+                await client.aclose()
+
+        latencias, erros, duracao = asyncio.run(cenario())
+        server.shutdown()
+        stats = _bench.summarize(latencias)
+        print(
+            f"{nome:<20} {stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f} "
+            f"{args.calls / duracao:>8.1f} {config.requests:>9}  {erros or '-'} / {client.breaker.state}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# backend/scripts/bench_order_stream.py
+"""
+Exercita o stream de pedidos (`backend/events.py`) em processo: telas
+assinantes por estação, pedidos criados pela API, retomada por Last-Event-ID
+e uma tela lenta estourando a fila.
+
+As telas consomem o mesmo gerador SSE que `GET /pedidos/stream/` devolve; os
+pedidos entram por `POST /pedidos/` (httpx + ASGITransport, banco temporário).
+Mede a latência entre o commit do pedido e a chegada em cada tela e confere
+o filtro por categoria.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_order_stream
+    python -m backend.scripts.bench_order_stream --displays 30 --pedidos 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+_TMPDIR = tempfile.mkdtemp(prefix="choperia-stream-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMPDIR, 'bench.db')}"
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+import httpx  # noqa: E402
+
+try:
+    from backend import events
+    from backend.scripts import _bench
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import events
+    from backend.scripts import _bench
+
+
+def parse_frame(frame: str) -> Optional[dict]:
+    """Converte um bloco SSE em {id, event, data}; None para retry/ping."""
+    campos: Dict[str, str] = {}
+    for linha in frame.strip().splitlines():
+        if linha.startswith(":") or ":" not in linha:
+            continue
+        chave, valor = linha.split(":", 1)
+        campos[chave] = valor.strip()
+    if "event" not in campos:
+        return None
+    return {"id": campos.get("id"), "event": campos["event"], "data": json.loads(campos.get("data") or "{}")}
+
+
+class Tela:
+    def __init__(self, nome: str, categorias: Optional[List[str]], atraso: float = 0.0):
+        self.nome = nome
+        self.categorias = categorias
+        self.atraso = atraso
+        self.recebidos: List[dict] = []
+        self.chegadas: Dict[int, float] = {}
+        self.ultimo_id: Optional[int] = None
+        self.encerrado = False
+
+    async def assina(self, last_event_id: Optional[int] = None) -> None:
+        async for frame in events.stream(self.categorias, last_event_id, heartbeat=1.0):
+            evento = parse_frame(frame)
+            if evento is None:
+                continue
+            if evento["event"] == events.PEDIDO_CRIADO:
+                self.chegadas.setdefault(evento["data"]["id"], time.perf_counter())
+            self.recebidos.append(evento)
+            if evento["id"]:
+                self.ultimo_id = int(evento["id"])
+            if self.atraso:
+                await asyncio.sleep(self.atraso)
+        self.encerrado = True
+
+
+async def rodar(args) -> None:
+    from backend import database, migrations
+    migrations.upgrade(database.engine)
+    from backend.main import app
+
+    # ASGITransport não roda o lifespan: sobe e desce a aplicação como o uvicorn faria
+    lifespan = app.router.lifespan_context(app)
+    await lifespan.__aenter__()
+    db = database.SessionLocal()
+    ids = _bench.seed_produtos(db, 20)  # pares: beer, ímpares: food
+    db.close()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    enviados: Dict[int, float] = {}
+    telas = [Tela(f"bar-{i}", ["beer"]) for i in range(args.displays // 2)]
+    telas += [Tela(f"cozinha-{i}", ["food"]) for i in range(args.displays - len(telas))]
+    lenta = Tela("lenta", None, atraso=0.05)
+    tarefas = [asyncio.create_task(tela.assina()) for tela in telas + [lenta]]
+    await asyncio.sleep(0.05)
+
+    so_comida = 0
+    for i in range(args.pedidos):
+        if i % 3 == 0:
+            carrinho = [ids[1], ids[3]]  # só comida
+            so_comida += 1
+        else:
+            carrinho = [ids[0], ids[(i % 10) * 2 + 1]]  # chope + comida
+        inicio = time.perf_counter()
+        r = await client.post("/pedidos/", json={"items": [{"produto_id": p, "quantity": 1} for p in carrinho]})
+        enviados[r.json()["id"]] = inicio
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.3)
+
+    print(f"{args.pedidos} pedidos, {len(telas)} telas + 1 lenta (fila={events.broker.max_queue})")
+    for grupo, esperado, categoria in (("bar", args.pedidos - so_comida, "beer"), ("cozinha", args.pedidos, "food")):
+        do_grupo = [t for t in telas if t.nome.startswith(grupo)]
+        if not do_grupo:
+            continue
+        lat = _bench.summarize([
+            (chegada - enviados[pedido_id]) * 1000.0
+            for t in do_grupo for pedido_id, chegada in t.chegadas.items() if pedido_id in enviados
+        ])
+        filtrado = all(
+            item["category"] == categoria
+            for t in do_grupo for e in t.recebidos for item in e["data"]["items"]
+        )
+        recebidos = {len(t.recebidos) for t in do_grupo}
+        print(f"  {grupo:<8} recebidos/tela={sorted(recebidos)} esperado={esperado} "
+              f"só {categoria}={filtrado} latência p50={lat['p50']:.2f}ms p99={lat['p99']:.2f}ms")
+
+    # Com mais pedidos que a fila, a tela lenta é desconectada; reconecta com o
+    # último id e recebe o que perdeu (se ainda estiver conectada, cai agora)
+    print(f"  lenta    desconectada={lenta.encerrado} recebidos antes={len(lenta.recebidos)}")
+    tarefas[-1].cancel()
+    await asyncio.gather(tarefas[-1], return_exceptions=True)
+    lenta.atraso = 0.0
+    antes = len(lenta.recebidos)
+    retomada = asyncio.create_task(lenta.assina(last_event_id=lenta.ultimo_id))
+    await asyncio.sleep(0.3)
+    retomada.cancel()
+    ids_lenta = [e["data"]["id"] for e in lenta.recebidos]
+    completo = sorted(ids_lenta) == sorted(enviados) and len(set(ids_lenta)) == len(ids_lenta)
+    print(f"  lenta    retomada +{len(lenta.recebidos) - antes} eventos, todos os pedidos sem duplicar={completo}")
+
+    # Last-Event-ID que já saiu do buffer (ou de outro processo): reset
+    tela = Tela("reset", None)
+    tarefa = asyncio.create_task(tela.assina(last_event_id=1))
+    await asyncio.sleep(0.05)
+    tarefa.cancel()
+    print(f"  reset    primeiro evento={tela.recebidos[0]['event'] if tela.recebidos else None}")
+
+    for tarefa in tarefas:
+        tarefa.cancel()
+    await asyncio.gather(*tarefas, return_exceptions=True)
+    await client.aclose()
+    # Com DB_ASYNC=1 a thread do aiosqlite segura o processo até o engine ser descartado (no shutdown)
+    await lifespan.__aexit__(None, None, None)
+    print("  broker", events.broker.stats())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--displays", type=int, default=10)
+    parser.add_argument("--pedidos", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(rodar(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# backend/scripts/bench_ratelimit.py
+"""
+Benchmark do rate limit (`backend/ratelimit.py`) e da cota de saída do
+Mercado Pago (`backend/payments.py`).
+
+1. Custo do balde em si (`MemoryStore.take`) por chamada, com muitos clientes.
+2. Custo por requisição: GET / e GET /produtos/ com o rate limit desligado x
+   ligado (com limites altos, para nenhuma ser recusada).
+3. Um tablet em loop no catálogo junto com mesas normais: quantas requisições
+   dele passam (deveriam ser a rajada + a taxa configurada) e a latência das
+   outras mesas.
+4. Pico de checkouts no Mercado Pago (stub local): chamadas por segundo que
+   chegam ao upstream com a cota configurada, quantas esperaram a vez e
+   quantas foram recusadas.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_ratelimit
+    python -m backend.scripts.bench_ratelimit --requests 5000 --mp-calls 200 --mp-rate 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# O backend lê a configuração ao importar: o banco temporário precisa estar
+# no ambiente antes de qualquer import de `backend`.
+_TMPDIR = tempfile.mkdtemp(prefix="choperia-ratelimit-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMPDIR, 'bench.db')}"
+os.environ.setdefault("DEV_TOOLS", "0")
+
+import httpx  # noqa: E402
+
+try:
+    from backend.scripts import _bench, mp_stub
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend.scripts import _bench, mp_stub
+
+PAYLOAD = {
+    "items": [{"title": "Chopp Pilsen 500ml", "quantity": 2, "unit_price": 12.9}],
+    "back_urls": {"success": "https://example.com/ok"},
+}
+
+
+def bench_store(ratelimit, chamadas: int, clientes: int) -> None:
+    store = ratelimit.MemoryStore()
+    chaves = [("GET", "/produtos/", f"mesa-{i}") for i in range(clientes)]
+    inicio = time.perf_counter()
+    for i in range(chamadas):
+        store.take(chaves[i % clientes], 1e9, 1e9)
+    us = (time.perf_counter() - inicio) / chamadas * 1e6
+    print(f"MemoryStore.take: {us:.2f} µs por chamada ({clientes} clientes)")
+
+
+async def bench_requisicoes(main, ratelimit, requests: int, rodadas: int = 5) -> None:
+    # As duas aplicações sobem juntas e as rodadas alternam entre elas, para o
+    # aquecimento do processo não pesar mais para um dos lados
+    apps = {}
+    for ligado in (False, True):
+        ratelimit.limiter = ratelimit.RateLimiter(ratelimit.RateLimitSettings(
+            enabled=ligado, default=ratelimit.Regra(1e9, 1e9), rules={},
+        ))
+        apps[ligado] = main.create_app()
+    latencias = {(url, ligado): [] for url in ("/", "/produtos/?limit=20") for ligado in apps}
+    async with apps[False].router.lifespan_context(apps[False]):
+        clientes = {
+            ligado: httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+            for ligado, app in apps.items()
+        }
+        try:
+            for _ in range(rodadas):
+                for (url, ligado), amostras in latencias.items():
+                    client = clientes[ligado]
+                    for i in range(requests // rodadas):
+                        inicio = time.perf_counter()
+                        r = await client.get(url, headers={"X-Table-Id": f"mesa-{i % 50}"})
+                        amostras.append((time.perf_counter() - inicio) * 1000.0)
+                        assert r.status_code == 200, r.text
+        finally:
+            for client in clientes.values():
+                await client.aclose()
+
+    print(f"\n{'rota':<14} {'desligado p50':>14} {'ligado p50':>11} {'custo µs':>9}")
+    for url in ("/", "/produtos/?limit=20"):
+        desligado = _bench.summarize(latencias[(url, False)])["p50"]
+        ligado = _bench.summarize(latencias[(url, True)])["p50"]
+        print(f"{url.split('?')[0]:<14} {desligado:>14.3f} {ligado:>11.3f} {(ligado - desligado) * 1000.0:>+9.0f}")
+    print("  (GET / é isenta: só a busca da rota na lista de isentas)")
+
+
+async def bench_tablet_em_loop(main, ratelimit, segundos: float, mesas: int) -> None:
+    regra = ratelimit.Regra(20, 2)
+    print(f"\ntablet recarregando o catálogo sem parar por {segundos:.0f}s, com {mesas} outras mesas "
+          f"(regra {regra.capacidade:.0f}:{regra.taxa:g}, esperado ~{regra.capacidade + regra.taxa * segundos:.0f} liberadas):")
+    print(f"{'rate limit':<10} {'loop 200':>9} {'loop 429':>9} {'mesas p50 ms':>13} {'mesas p95 ms':>13}")
+    for ligado in (False, True):
+        ratelimit.limiter = ratelimit.RateLimiter(ratelimit.RateLimitSettings(
+            enabled=ligado, rules={"GET /produtos/": regra}, default=None,
+        ))
+        app = main.create_app()
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+                fim = time.perf_counter() + segundos
+                loop = {200: 0, 429: 0}
+                latencias = []
+
+                async def tablet_com_defeito():
+                    while time.perf_counter() < fim:
+                        r = await client.get("/produtos/?limit=20", headers={"X-Table-Id": "mesa-loop"})
+                        loop[r.status_code] += 1
+                        # o cliente é outro processo na vida real; aqui divide o event loop com a API
+                        await asyncio.sleep(0.002)
+
+                async def mesa(i: int):
+                    await asyncio.sleep(i / mesas)
+                    while time.perf_counter() < fim:
+                        inicio = time.perf_counter()
+                        r = await client.get("/produtos/?limit=20", headers={"X-Table-Id": f"mesa-{i}"})
+                        latencias.append((time.perf_counter() - inicio) * 1000.0)
+                        assert r.status_code == 200, r.text
+                        await asyncio.sleep(1.0)
+
+                await asyncio.gather(tablet_com_defeito(), *(mesa(i) for i in range(mesas)))
+        resumo = _bench.summarize(latencias)
+        print(f"{'ligado' if ligado else 'desligado':<10} {loop[200]:>9} {loop[429]:>9} "
+              f"{resumo['p50']:>13.2f} {resumo['p95']:>13.2f}")
+
+
+async def bench_mercadopago(payments, chamadas: int, taxa: float, rajada: int, max_espera: float) -> None:
+    config = mp_stub.StubConfig(latency=0.02)
+    server = mp_stub.start_in_thread(config)
+    host, port = server.server_address
+    client = payments.MercadoPagoClient(payments.MercadoPagoSettings(
+        base_url=f"http://{host}:{port}", max_retries=0,
+        rate_limit=taxa, rate_burst=rajada, rate_max_wait=max_espera,
+    ))
+    amostras = []  # (instante, requisições que chegaram ao stub)
+    resultado = {"ok": 0, "recusadas": 0}
+
+    async def amostra():
+        while True:
+            amostras.append((time.perf_counter(), config.requests))
+            await asyncio.sleep(0.05)
+
+    async def checkout():
+        try:
+            await client.create_preference("TEST-TOKEN", PAYLOAD)
+            resultado["ok"] += 1
+        except payments.RateLimitedError:
+            resultado["recusadas"] += 1
+
+    amostrador = asyncio.create_task(amostra())
+    inicio = time.perf_counter()
+    try:
+        await asyncio.gather(*(checkout() for _ in range(chamadas)))
+    finally:
+        duracao = time.perf_counter() - inicio
+        amostrador.cancel()
+        await client.aclose()
+        server.shutdown()
+    amostras.append((time.perf_counter(), config.requests))
+    # Maior número de chamadas ao upstream em qualquer janela de 1s
+    pico = max(
+        fim_n - inicio_n
+        for i, (t0, inicio_n) in enumerate(amostras)
+        for t1, fim_n in amostras[i:]
+        if t1 - t0 <= 1.0
+    )
+    print(f"\n{chamadas} checkouts simultâneos no Mercado Pago, cota de {taxa:g}/s (rajada {rajada}, "
+          f"espera máxima {max_espera:g}s):")
+    print(f"  chegaram ao upstream={config.requests} em {duracao:.2f}s, pico em 1s={pico} "
+          f"(limite {rajada + taxa:g}), esperaram a vez={client.quota_waits}, recusadas (503)={resultado['recusadas']}")
+
+
+async def rodar(args) -> None:
+    from backend import database, main, migrations, payments, ratelimit
+    migrations.upgrade(database.engine)
+    with database.SessionLocal() as db:
+        _bench.seed_produtos(db, 200)
+
+    bench_store(ratelimit, args.requests * 20, args.clientes)
+    await bench_requisicoes(main, ratelimit, args.requests)
+    await bench_tablet_em_loop(main, ratelimit, args.segundos, args.mesas)
+    await bench_mercadopago(payments, args.mp_calls, args.mp_rate, args.mp_burst, args.mp_max_wait)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clientes", type=int, default=10_000)
+    parser.add_argument("--segundos", type=float, default=5.0)
+    parser.add_argument("--mesas", type=int, default=20)
+    parser.add_argument("--mp-calls", type=int, default=100)
+    parser.add_argument("--mp-rate", type=float, default=10.0)
+    parser.add_argument("--mp-burst", type=int, default=10)
+    parser.add_argument("--mp-max-wait", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(rodar(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# backend/scripts/bench_reports.py
+"""
+Benchmark dos relatórios de vendas: agregação direta sobre `pedidos` +
+`pedido_items` x leitura dos buckets pré-calculados (`reports.vendas_por_produto`),
+conforme o histórico cresce.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_reports
+    python -m backend.scripts.bench_reports --pedidos 10000 100000 --repeat 20
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+try:
+    from backend import models, reports
+    from backend.scripts import _bench
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import models, reports
+    from backend.scripts import _bench
+
+
+def semeia_historico(db, produto_ids, total: int, dias: int = 90, seed: int = 42) -> None:
+    """`total` pedidos de 1 a 4 itens espalhados pelos últimos `dias`."""
+    rng = random.Random(seed)
+    inicio = datetime.utcnow() - timedelta(days=dias)
+    passo = timedelta(days=dias) / total
+    pedidos, itens = [], []
+    for pedido_id in range(1, total + 1):
+        pedidos.append({"id": pedido_id, "pedido_date": inicio + passo * pedido_id,
+                        "total_price": 0.0, "status": "approved"})
+        for produto_id in rng.sample(produto_ids, rng.randint(1, 4)):
+            itens.append({"pedido_id": pedido_id, "produto_id": produto_id, "produto_name": produto_id,
+                          "unit_price": 10.0, "quantity": rng.randint(1, 3)})
+    db.execute(insert(models.Pedido), pedidos)
+    db.execute(insert(models.PedidoItem), itens)
+    db.commit()
+
+
+def agregacao_direta(db, date_from, date_to):
+    """O que o dashboard precisaria sem os agregados: GROUP BY sobre o histórico."""
+    revenue = func.sum(models.PedidoItem.unit_price * models.PedidoItem.quantity).label("revenue")
+    stmt = (
+        select(models.PedidoItem.produto_id, func.sum(models.PedidoItem.quantity), revenue)
+        .join(models.Pedido, models.Pedido.id == models.PedidoItem.pedido_id)
+        .where(models.Pedido.pedido_date >= date_from, models.Pedido.pedido_date < date_to)
+        .group_by(models.PedidoItem.produto_id)
+        .order_by(revenue.desc())
+    )
+    return db.execute(stmt).all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pedidos", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--catalog", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    agora = datetime.utcnow()
+    janelas = {"última noite": (agora - timedelta(hours=6), agora), "90 dias": (agora - timedelta(days=90), agora)}
+
+    print(f"{'pedidos':>8} {'janela':<14} | {'direta p50 ms':>14} | {'agregados p50 ms':>17} | {'buckets':>8}")
+    for total in args.pedidos:
+        engine = _bench.make_temp_engine()
+        db = _bench.make_session_factory(engine)()
+        try:
+            ids = _bench.seed_produtos(db, args.catalog)
+            semeia_historico(db, ids, total)
+            buckets = reports.rebuild(db)
+            for nome, (date_from, date_to) in janelas.items():
+                direta = _bench.summarize(_bench.timed(lambda: agregacao_direta(db, date_from, date_to), args.repeat))
+                agregada = _bench.summarize(_bench.timed(
+                    lambda: reports.vendas_por_produto(db, date_from=date_from, date_to=date_to), args.repeat
+                ))
+                print(f"{total:>8} {nome:<14} | {direta['p50']:>14.2f} | {agregada['p50']:>17.2f} | {buckets:>8}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# backend/scripts/bench_search.py
+"""
+Benchmark da busca de produtos: índice FTS5 x LIKE em nome/descrição,
+conforme o catálogo cresce. Também mostra quanto o tablet deixa de baixar
+quando filtra no servidor em vez de receber o catálogo inteiro.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_search
+    python -m backend.scripts.bench_search --catalog 1000 50000 --repeat 50
+"""
+import argparse
+import os
+import random
+import sys
+
+from sqlalchemy import insert
+
+try:
+    from backend import models, search
+    from backend.scripts import _bench
+    from backend.web import produtos_adapter
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import models, search
+    from backend.scripts import _bench
+    from backend.web import produtos_adapter
+
+PALAVRAS = [
+    "chopp", "pilsen", "ipa", "weiss", "stout", "lager", "artesanal", "porção", "batata", "frita",
+    "calabresa", "tábua", "frios", "asas", "açaí", "limão", "mel", "picanha", "queijo", "coxinha",
+    "caldo", "feijão", "torresmo", "mandioca", "pastel", "carne", "camarão", "alho", "cebola", "bacon",
+]
+BUSCAS = ["porcao", "chopp pil", "acai mel", "camarao alho"]
+
+
+def semeia_catalogo(db, total: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    linhas = []
+    for i in range(total):
+        nome = " ".join(rng.sample(PALAVRAS, 3)).title()
+        linhas.append({
+            "id": f"sku-{i:06d}",
+            "name": f"{nome} {i}",
+            "description": " ".join(rng.sample(PALAVRAS, 6)),
+            "price": round(rng.uniform(5, 120), 2),
+            "image": "🍺",
+            "category": "beer" if i % 2 == 0 else "food",
+        })
+    db.execute(insert(models.Produto), linhas)
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--catalog", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'produtos':>9} {'busca':<14} | {'FTS5 p50 ms':>12} | {'LIKE p50 ms':>12} | {'página KB':>10} | {'catálogo KB':>12}")
+    for total in args.catalog:
+        engine = _bench.make_temp_engine()
+        db = _bench.make_session_factory(engine)()
+        try:
+            semeia_catalogo(db, total)
+            search.ensure_index(engine)
+            catalogo_kb = len(produtos_adapter.dump_json(db.query(models.Produto).all())) / 1024
+            for q in BUSCAS:
+                resultados = {}
+                for modo in (True, False):
+                    search.fts_enabled = modo
+                    stmt = search.statement_busca(q, limit=args.limit)
+                    resultados[modo] = _bench.summarize(
+                        _bench.timed(lambda: db.execute(stmt).all(), args.repeat)
+                    )["p50"]
+                search.fts_enabled = True
+                ids = list(db.execute(search.statement_busca(q, limit=args.limit)).scalars())
+                pagina = db.query(models.Produto).filter(models.Produto.id.in_(ids)).all()
+                pagina_kb = len(produtos_adapter.dump_json(pagina)) / 1024
+                print(f"{total:>9} {q:<14} | {resultados[True]:>12.2f} | {resultados[False]:>12.2f} | "
+                      f"{pagina_kb:>10.1f} | {catalogo_kb:>12.0f}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# backend/scripts/bench_serialization.py
+"""
+Benchmark da serialização e da compressão de listas de `schemas.Pedido`
+(a resposta de GET /pedidos/), por tamanho de página.
+
+1. CPU para transformar as linhas do ORM no corpo JSON: o caminho padrão do
+   FastAPI (validação + dicts + json da stdlib), o mesmo com orjson
+   (`responses.JSONResponse`) e o pydantic direto (`web.json_response`, o que
+   as rotas de pedidos usam). Confere que os três geram os mesmos bytes.
+2. Bytes na rede e CPU de compressão: sem compressão, gzip e brotli em
+   alguns níveis (os padrões de `backend/responses.py` são gzip 6 e brotli 4).
+3. Ponta a ponta: GET /pedidos/?limit=N pela aplicação, com cada
+   `Accept-Encoding` (latência e tamanho do corpo enviado).
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_serialization
+    python -m backend.scripts.bench_serialization --tamanhos 10 100 1000 --itens 8 --repeat 100
+"""
+import argparse
+import asyncio
+import gzip
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+# O backend lê a configuração ao importar: o banco temporário precisa estar
+# no ambiente antes de qualquer import de `backend`.
+_TMPDIR = tempfile.mkdtemp(prefix="choperia-serialization-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMPDIR, 'bench.db')}"
+os.environ.setdefault("DEV_TOOLS", "0")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+import httpx  # noqa: E402
+
+try:
+    from backend.scripts import _bench
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend.scripts import _bench
+
+
+def seed_pedidos(db, models, total: int, itens: int) -> None:
+    inicio = datetime(2025, 1, 1, 18, 0)
+    for lote in range(0, total, 1000):
+        db.add_all(
+            models.Pedido(
+                pedido_date=inicio + timedelta(minutes=i),
+                total_price=Decimal("12.90") * 2 * itens,
+                status="delivered" if i % 3 else "pending",
+                items=[
+                    models.PedidoItem(
+                        produto_id=f"bench-{(i + j) % 200}",
+                        produto_name=f"Chopp Artesanal {(i + j) % 200} 500ml",
+                        unit_price=Decimal("12.90"),
+                        quantity=2,
+                    )
+                    for j in range(itens)
+                ],
+            )
+            for i in range(lote, min(total, lote + 1000))
+        )
+        db.commit()
+
+
+def bench_serializacao(db, crud, responses, web, tamanhos: List[int], repeat: int) -> None:
+    from typing import List as ListType
+
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from starlette.responses import JSONResponse as StdlibJSONResponse
+
+    from backend import schemas
+
+    field = create_model_field(name="Response", type_=ListType[schemas.Pedido], mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def fastapi_padrao(pedidos, classe):
+        conteudo = loop.run_until_complete(
+            serialize_response(field=field, response_content=pedidos, is_coroutine=False)
+        )
+        return classe(conteudo).body
+
+    caminhos = {
+        "json (stdlib)": lambda pedidos: fastapi_padrao(pedidos, StdlibJSONResponse),
+        "orjson": lambda pedidos: fastapi_padrao(pedidos, responses.JSONResponse),
+        "pydantic direto": lambda pedidos: web.json_response(web.pedidos_adapter, pedidos).body,
+    }
+    print("1. serialização de List[schemas.Pedido] (p50 ms por resposta)")
+    print(f"{'pedidos':>8} {'bytes':>10} " + " ".join(f"{nome:>16}" for nome in caminhos) + "  iguais")
+    try:
+        for tamanho in tamanhos:
+            pedidos = crud.get_pedidos(db, limit=tamanho)
+            corpos = [fn(pedidos) for fn in caminhos.values()]
+            vezes = max(5, repeat * 100 // max(tamanho, 100))
+            tempos = [_bench.summarize(_bench.timed(lambda: fn(pedidos), vezes))["p50"] for fn in caminhos.values()]
+            print(f"{len(pedidos):>8} {len(corpos[0]):>10} " + " ".join(f"{t:>16.3f}" for t in tempos)
+                  + f"  {all(c == corpos[0] for c in corpos)}")
+    finally:
+        loop.close()
+
+
+def bench_compressao(db, crud, responses, web, tamanhos: List[int], repeat: int) -> None:
+    codecs = {
+        "gzip 1": lambda corpo: gzip.compress(corpo, compresslevel=1),
+        "gzip 6": lambda corpo: gzip.compress(corpo, compresslevel=6),
+        "gzip 9": lambda corpo: gzip.compress(corpo, compresslevel=9),
+    }
+    if responses.brotli is not None:
+        for qualidade in (1, 4, 11):
+            codecs[f"br {qualidade}"] = lambda corpo, q=qualidade: responses.brotli.compress(corpo, quality=q)
+    else:
+        print("\n(pacote brotli não instalado: só gzip)")
+    print("\n2. bytes na rede (tamanho comprimido / ms para comprimir)")
+    print(f"{'pedidos':>8} {'sem':>10} " + " ".join(f"{nome:>17}" for nome in codecs))
+    for tamanho in tamanhos:
+        corpo = web.json_response(web.pedidos_adapter, crud.get_pedidos(db, limit=tamanho)).body
+        celulas = []
+        for comprime in codecs.values():
+            vezes = max(3, repeat * 100 // max(tamanho, 100))
+            ms = _bench.summarize(_bench.timed(lambda: comprime(corpo), vezes))["p50"]
+            celulas.append(f"{len(comprime(corpo)):>8} /{ms:>7.3f}")
+        print(f"{tamanho:>8} {len(corpo):>10} " + " ".join(f"{c:>17}" for c in celulas))
+
+
+async def bench_ponta_a_ponta(main, tamanhos: List[int], repeat: int) -> None:
+    encodings = {"identity": "identity", "gzip": "gzip", "br": "br, gzip"}
+    print("\n3. GET /pedidos/?limit=N pela aplicação (p50 ms / bytes enviados)")
+    print(f"{'pedidos':>8} " + " ".join(f"{nome:>20}" for nome in encodings))
+    app = main.app
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for tamanho in tamanhos:
+                celulas = []
+                for accept in encodings.values():
+                    headers = {"Accept-Encoding": accept}
+                    latencias = []
+                    enviados = 0
+                    for _ in range(max(5, repeat * 50 // max(tamanho, 100))):
+                        inicio = time.perf_counter()
+                        r = await client.get(f"/pedidos/?limit={tamanho}", headers=headers)
+                        latencias.append((time.perf_counter() - inicio) * 1000.0)
+                        assert r.status_code == 200, r.text
+                        enviados = int(r.headers["content-length"])
+                    celulas.append(f"{_bench.summarize(latencias)['p50']:>8.2f} / {enviados:>9}")
+                print(f"{tamanho:>8} " + " ".join(f"{c:>20}" for c in celulas))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--itens", type=int, default=5, help="itens por pedido")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    from backend import crud, database, migrations, models, responses, web
+    from backend import main as app_main
+    migrations.upgrade(database.engine)
+    with database.SessionLocal() as db:
+        seed_pedidos(db, models, max(args.tamanhos), args.itens)
+        print(f"{max(args.tamanhos)} pedidos de {args.itens} itens; orjson: {responses.orjson is not None}, "
+              f"brotli: {responses.brotli is not None}\n")
+        bench_serializacao(db, crud, responses, web, args.tamanhos, args.repeat)
+        bench_compressao(db, crud, responses, web, args.tamanhos, args.repeat)
+    asyncio.run(bench_ponta_a_ponta(app_main, args.tamanhos, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
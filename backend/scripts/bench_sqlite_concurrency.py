@@ -0,0 +1,108 @@
+# backend/scripts/bench_sqlite_concurrency.py
+"""
+Benchmark de concorrência do SQLite: throughput de leitura e escrita com
+checkouts e listagens simultâneos, comparando os perfis DB_PROFILE=dev e
+DB_PROFILE=production (WAL, synchronous=NORMAL, busy timeout, pool).
+
+Cada perfil roda contra um arquivo temporário novo; "erros de lock" são os
+"database is locked" que chegariam ao cliente como 500.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_sqlite_concurrency
+    python -m backend.scripts.bench_sqlite_concurrency --writers 8 --readers 8 --seconds 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+try:
+    from backend import crud, database, migrations, schemas
+    from backend.scripts import _bench
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import crud, database, migrations, schemas
+    from backend.scripts import _bench
+
+
+def rodar_perfil(profile: str, writers: int, readers: int, seconds: float) -> dict:
+    tmpdir = tempfile.mkdtemp(prefix=f"choperia-{profile}-")
+    settings = database.DatabaseSettings(
+        url=f"sqlite:///{os.path.join(tmpdir, 'bench.db')}",
+        profile=profile,
+        pool_size=writers + readers,
+    )
+    engine = database.build_engine(settings)
+    migrations.upgrade(engine)
+    SessionLocal = _bench.make_session_factory(engine)
+    with SessionLocal() as db:
+        produto_ids = _bench.seed_produtos(db, 50)
+
+    pedido = schemas.PedidoCreate(
+        items=[schemas.CartItem(produto_id=produto_id, quantity=1) for produto_id in produto_ids[:5]]
+    )
+    contagem = {"writes": 0, "reads": 0, "lock_errors": 0}
+    latencias = {"writes": [], "reads": []}
+    lock = threading.Lock()
+    fim = time.perf_counter() + seconds
+
+    def worker(tipo: str, operacao) -> None:
+        while time.perf_counter() < fim:
+            start = time.perf_counter()
+            with SessionLocal() as db:
+                try:
+                    operacao(db)
+                except OperationalError:
+                    with lock:
+                        contagem["lock_errors"] += 1
+                    continue
+            with lock:
+                contagem[tipo] += 1
+                latencias[tipo].append((time.perf_counter() - start) * 1000.0)
+
+    threads = [
+        threading.Thread(target=worker, args=("writes", lambda db: crud.create_pedido(db, pedido)))
+        for _ in range(writers)
+    ] + [
+        threading.Thread(target=worker, args=("reads", lambda db: crud.get_pedidos(db, limit=50)))
+        for _ in range(readers)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    resultado = {k: v / seconds for k, v in contagem.items() if k != "lock_errors"}
+    resultado["lock_errors"] = contagem["lock_errors"]
+    for tipo in ("writes", "reads"):
+        resultado[f"{tipo}_p95"] = _bench.summarize(latencias[tipo])["p95"] if latencias[tipo] else 0.0
+    return resultado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.writers} escritores + {args.readers} leitores por {args.seconds:.0f}s")
+    print(f"{'perfil':<12} {'writes/s':>9} {'w p95 ms':>9} {'reads/s':>9} {'r p95 ms':>9} {'erros de lock':>14}")
+    for profile in ("dev", "production"):
+        r = rodar_perfil(profile, args.writers, args.readers, args.seconds)
+        print(
+            f"{profile:<12} {r['writes']:>9.1f} {r['writes_p95']:>9.1f} "
+            f"{r['reads']:>9.1f} {r['reads_p95']:>9.1f} {r['lock_errors']:>14}"
+        )
+
+
+if __name__ == "__main__":
+    main()
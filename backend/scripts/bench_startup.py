@@ -0,0 +1,148 @@
+# backend/scripts/bench_startup.py
+"""
+Cold start de um worker novo (autoscaling): cada rodada é um processo Python
+novo que importa `backend.main`, sobe o lifespan (checagem da versão do
+esquema) e atende as primeiras requisições.
+
+Mede, por rodada: import de `backend.main`, subida do lifespan, primeira
+requisição a GET / e a GET /produtos/, e o tempo total do processo (inclui
+o interpretador). Também confere que os subsistemas opcionais não foram
+carregados (cliente do Mercado Pago, rotas de Dev Tools).
+
+O banco é uma cópia temporária já migrada, e os workers sobem com
+`DB_PROFILE=production` (sem auto-migração), como num deploy.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_startup
+    python -m backend.scripts.bench_startup --runs 20 --importtime
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from backend.scripts import _bench
+except Exception:
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    from backend.scripts import _bench
+
+
+# Roda no processo filho; imprime uma linha JSON com as medidas
+WORKER = r"""
+import asyncio, json, sys, time
+inicio = time.perf_counter()
+import backend.main
+importado = time.perf_counter()
+carregados = {m: m in sys.modules for m in ("backend.payments", "backend.dev_routes", "backend.async_routes", "dotenv")}
+modulos = len(sys.modules)
+import httpx
+
+async def sobe():
+    app = backend.main.app
+    async with app.router.lifespan_context(app):
+        pronto = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://worker") as client:
+            t = time.perf_counter()
+            assert (await client.get("/")).status_code == 200
+            health = time.perf_counter() - t
+            t = time.perf_counter()
+            assert (await client.get("/produtos/")).status_code == 200
+            produtos = time.perf_counter() - t
+    return pronto, health, produtos
+
+pronto, health, produtos = asyncio.run(sobe())
+print(json.dumps({
+    "import_ms": (importado - inicio) * 1000.0,
+    "lifespan_ms": (pronto - importado) * 1000.0,
+    "health_ms": health * 1000.0,
+    "produtos_ms": produtos * 1000.0,
+    "modulos": modulos,
+    "carregados": carregados,
+}))
+"""
+
+CENARIOS = {
+    "production": {"DB_PROFILE": "production"},
+    "production+dev_tools": {"DB_PROFILE": "production", "DEV_TOOLS": "1"},
+    "production+async": {"DB_PROFILE": "production", "DB_ASYNC": "1"},
+}
+
+
+def prepara_banco(produtos: int) -> str:
+    """Banco temporário já migrado, com `produtos` no catálogo. Retorna a URL."""
+    engine = _bench.make_temp_engine(prefix="choperia-startup-")
+    with _bench.make_session_factory(engine)() as db:
+        _bench.seed_produtos(db, produtos)
+    engine.dispose()
+    return str(engine.url)
+
+
+def rodada(env: dict) -> dict:
+    inicio = time.perf_counter()
+    saida = subprocess.run(
+        [sys.executable, "-c", WORKER], cwd=PROJECT_ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    resultado = json.loads(saida.strip().splitlines()[-1])
+    resultado["processo_ms"] = (time.perf_counter() - inicio) * 1000.0
+    return resultado
+
+
+def importtime(env: dict, top: int) -> None:
+    """Maiores tempos cumulativos de import (`python -X importtime`) dos módulos do worker."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        cwd=PROJECT_ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stderr
+    linhas = []
+    for linha in stderr.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, cumulativo, nome = (parte.strip() for parte in linha[len("import time:"):].split("|"))
+        if cumulativo.isdigit():
+            linhas.append((int(cumulativo), nome))
+    print("\nimports mais caros (cumulativo, ms):")
+    for cumulativo, nome in sorted(linhas, reverse=True)[:top]:
+        print(f"  {cumulativo / 1000.0:>8.1f}  {nome}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--produtos", type=int, default=200)
+    parser.add_argument("--only", nargs="+", choices=sorted(CENARIOS), default=list(CENARIOS))
+    parser.add_argument("--importtime", action="store_true", help="lista os imports mais caros")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    url = prepara_banco(args.produtos)
+    base = dict(os.environ, DATABASE_URL=url, PYTHONPATH=PROJECT_ROOT)
+    base.pop("DB_ASYNC", None)
+    base.pop("DEV_TOOLS", None)
+    try:
+        campos = ("import_ms", "lifespan_ms", "health_ms", "produtos_ms", "processo_ms")
+        print(f"{args.runs} rodadas por cenário, p50 / p95 em ms")
+        print(f"{'cenário':<22} " + " ".join(f"{c[:-3]:>15}" for c in campos) + f" {'módulos':>8}  carregados")
+        for nome in args.only:
+            env = dict(base, **CENARIOS[nome])
+            rodadas = [rodada(env) for _ in range(args.runs)]
+            resumo = {c: _bench.summarize([r[c] for r in rodadas]) for c in campos}
+            carregados = [m for m, sim in rodadas[0]["carregados"].items() if sim]
+            print(f"{nome:<22} " + " ".join(
+                f"{resumo[c]['p50']:>7.1f} /{resumo[c]['p95']:>6.1f}" for c in campos
+            ) + f" {rodadas[0]['modulos']:>8}  {', '.join(carregados) or '-'}")
+        if args.importtime:
+            importtime(dict(base, **CENARIOS["production"]), args.top)
+    finally:
+        shutil.rmtree(os.path.dirname(url[len("sqlite:///"):]), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
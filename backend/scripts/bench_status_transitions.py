@@ -0,0 +1,99 @@
+# backend/scripts/bench_status_transitions.py
+"""
+Benchmark das transições de status (`crud.transiciona_status`): N pedidos
+marcados um a um x numa única transição em lote, e escritores concorrentes
+disputando os mesmos pedidos (bar e caixa) com a trava otimista.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.bench_status_transitions
+    python -m backend.scripts.bench_status_transitions --lote 20 100 --threads 8
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+try:
+    from backend import crud, models, schemas
+    from backend.scripts import _bench
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import crud, models, schemas
+    from backend.scripts import _bench
+
+
+def cria_pedidos(db, produto_ids, total: int):
+    pedido = schemas.PedidoCreate(items=[schemas.CartItem(produto_id=produto_ids[0], quantity=1)])
+    return [crud.create_pedido(db, pedido).id for _ in range(total)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lote", type=int, nargs="+", default=[1, 20, 100])
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    engine = _bench.make_temp_engine()
+    SessionLocal = _bench.make_session_factory(engine)
+    db = SessionLocal()
+    try:
+        produto_ids = _bench.seed_produtos(db, 10)
+        print(f"{'pedidos':>8} | {'um a um: queries':>17} {'ms':>8} | {'em lote: queries':>17} {'ms':>8}")
+        for total in args.lote:
+            linhas = []
+            for modo in ("um a um", "lote"):
+                ids = cria_pedidos(db, produto_ids, total)
+                with _bench.count_queries(engine) as counter:
+                    inicio = time.perf_counter()
+                    if modo == "lote":
+                        crud.transiciona_status(db, ids, "approved")
+                    else:
+                        for pedido_id in ids:
+                            crud.transiciona_status(db, [pedido_id], "approved")
+                    linhas.append((counter.count, (time.perf_counter() - inicio) * 1000.0))
+            print(f"{total:>8} | " + " | ".join(f"{q:>17} {ms:>8.2f}" for q, ms in linhas))
+
+        # Escritores concorrentes: todos leram a versão 1 e tentam mover os mesmos pedidos
+        ids = cria_pedidos(db, produto_ids, 50)
+        resultados: Counter = Counter()
+        lock = threading.Lock()
+
+        def escritor(destino: str) -> None:
+            sessao = SessionLocal()
+            try:
+                for r in crud.transiciona_status(sessao, ids, destino, {pedido_id: 1 for pedido_id in ids}):
+                    with lock:
+                        resultados[(destino, r["result"])] += 1
+            finally:
+                sessao.close()
+
+        threads = [
+            threading.Thread(target=escritor, args=("approved" if i % 2 == 0 else "cancelled",))
+            for i in range(args.threads)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        finais = Counter(
+            status for (status,) in db.execute(
+                models.Pedido.__table__.select().with_only_columns(models.Pedido.status)
+                .where(models.Pedido.id.in_(ids))
+            )
+        )
+        print(f"\n{args.threads} escritores concorrentes em 50 pedidos (versão 1):")
+        for (destino, resultado), n in sorted(resultados.items()):
+            print(f"  {destino:<10} {resultado:<20} {n:>4}")
+        print(f"  status finais: {dict(finais)} (cada pedido mudou exatamente uma vez)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+# backend/scripts/benchmark.py
+"""
+Harness de carga/benchmark da API (`backend.main`), reproduzível localmente.
+
+Sobe a aplicação em processo (httpx + ASGITransport, sem rede) contra um
+banco SQLite temporário semeado com catálogo e histórico de pedidos, e um
+stub local do Mercado Pago. Para cada cenário mede, com N clientes
+concorrentes: latência p50/p95/p99, throughput e queries SQL por request.
+
+Cenários: leitura do catálogo (lista, GET condicional e item), listagem de
+pedidos em várias profundidades de histórico (primeira página e última via
+cursor), criação de pedidos com carrinhos de tamanhos diferentes e o proxy
+do Mercado Pago.
+
+O resultado pode ser salvo em JSON (`--output`) e comparado com uma execução
+anterior (`--compare`), falhando (exit 1) se algum p95 piorar além de
+`--max-regression` por cento.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.benchmark
+    python -m backend.scripts.benchmark --output bench.json
+    python -m backend.scripts.benchmark --compare bench.json --max-regression 25
+    python -m backend.scripts.benchmark --only catalog --requests 1000 --concurrency 32
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+# O backend lê a configuração ao importar: o ambiente do benchmark precisa
+# estar pronto antes de qualquer import de `backend`.
+_TMPDIR = tempfile.mkdtemp(prefix="choperia-benchmark-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMPDIR, 'bench.db')}"
+os.environ["MERCADO_PAGO_ACCESS_TOKEN"] = "TEST-BENCHMARK"
+os.environ.setdefault("MP_MAX_RETRIES", "0")
+# Todas as requisições saem do mesmo cliente: sem rate limit (nem cota de saída) a carga chega às rotas
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+os.environ.setdefault("MP_RATE_LIMIT", "0")
+
+import httpx  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+try:
+    from backend.scripts import _bench, mp_stub
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend.scripts import _bench, mp_stub
+
+Request = Tuple[str, str, dict]  # (método, url, kwargs do httpx)
+
+
+class Harness:
+    def __init__(self, app, engine, concurrency: int, requests: int, warmup: int):
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        self.engine = engine
+        self.concurrency = concurrency
+        self.requests = requests
+        self.warmup = warmup
+        self.results: Dict[str, dict] = {}
+
+    async def cenario(self, nome: str, make_request: Callable[[int], Request], ok=(200, 201, 304)) -> None:
+        for i in range(self.warmup):
+            method, url, kwargs = make_request(i)
+            await self.client.request(method, url, **kwargs)
+
+        contador = itertools.count()
+        latencias: List[float] = []
+        erros: Dict[int, int] = {}
+        nbytes = 0
+
+        async def worker() -> None:
+            nonlocal nbytes
+            while (i := next(contador)) < self.requests:
+                method, url, kwargs = make_request(i)
+                start = time.perf_counter()
+                resp = await self.client.request(method, url, **kwargs)
+                latencias.append((time.perf_counter() - start) * 1000.0)
+                nbytes += len(resp.content)
+                if resp.status_code not in ok:
+                    erros[resp.status_code] = erros.get(resp.status_code, 0) + 1
+
+        with _bench.count_queries(self.engine) as queries:
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            duracao = time.perf_counter() - start
+
+        stats = _bench.summarize(latencias)
+        self.results[nome] = {
+            "requests": len(latencias),
+            "concurrency": self.concurrency,
+            "p50_ms": stats["p50"],
+            "p95_ms": stats["p95"],
+            "p99_ms": stats["p99"],
+            "mean_ms": stats["mean"],
+            "throughput_rps": len(latencias) / duracao,
+            "queries_per_request": queries.count / len(latencias),
+            "bytes_per_response": nbytes / len(latencias),
+            "errors": erros,
+        }
+        r = self.results[nome]
+        print(
+            f"{nome:<34} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+            f"{r['throughput_rps']:>9.1f} {r['queries_per_request']:>7.2f} {sum(erros.values()):>6}",
+            flush=True,
+        )
+
+
+# --- Semeadura ---
+
+def seed_catalogo(SessionLocal, total: int) -> List[str]:
+    with SessionLocal() as db:
+        return _bench.seed_produtos(db, total)
+
+
+def seed_historico(SessionLocal, models, produto_ids: List[str], ate: int) -> None:
+    """Completa o histórico até `ate` pedidos (2 itens cada), em lotes."""
+    with SessionLocal() as db:
+        atual = db.query(models.Pedido).count()
+        inicio = datetime(2024, 1, 1)
+        lote = 5_000
+        for start in range(atual, ate, lote):
+            fim = min(start + lote, ate)
+            ids = [
+                row.id for row in db.execute(
+                    insert(models.Pedido).returning(models.Pedido.id),
+                    [
+                        {"pedido_date": inicio + timedelta(minutes=i), "total_price": 25.0, "status": "delivered"}
+                        for i in range(start, fim)
+                    ],
+                )
+            ]
+            db.execute(insert(models.PedidoItem), [
+                {
+                    "pedido_id": pedido_id,
+                    "produto_id": produto_ids[(pedido_id + j) % len(produto_ids)],
+                    "produto_name": "Produto",
+                    "unit_price": 12.5,
+                    "quantity": 1,
+                }
+                for pedido_id in ids for j in range(2)
+            ])
+        db.commit()
+
+
+def cursor_ultima_pagina(SessionLocal, crud, pagination, total: int, limit: int) -> str:
+    with SessionLocal() as db:
+        anterior = crud.get_pedidos_resumo(db, skip=max(0, total - limit - 1), limit=1)[0]
+        return pagination.pedido_cursor(anterior)
+
+
+# --- Execução ---
+
+async def rodar(args) -> Dict[str, dict]:
+    stub = mp_stub.start_in_thread(mp_stub.StubConfig(latency=args.mp_latency))
+    os.environ["MERCADO_PAGO_API_URL"] = f"http://127.0.0.1:{stub.server_address[1]}"
+
+    from backend import crud, database, migrations, models, pagination
+    # Banco temporário novo: aplica as migrações antes da checagem de versão da subida
+    migrations.upgrade(database.engine)
+    from backend.main import app
+
+    # ASGITransport não roda o lifespan: sobe e desce a aplicação como o uvicorn faria
+    lifespan = app.router.lifespan_context(app)
+    await lifespan.__aenter__()
+
+    SessionLocal = database.SessionLocal
+    produto_ids = seed_catalogo(SessionLocal, args.catalog)
+    engine = database.engine
+    if database.settings.async_mode:
+        # DB_ASYNC=1: as rotas usam o engine assíncrono; as queries passam pelo sync_engine dele
+        database.get_async_sessionmaker()
+        engine = database.async_engine.sync_engine
+    h = Harness(app, engine, args.concurrency, args.requests, args.warmup)
+
+    print(f"{'cenário':<34} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>9} {'q/req':>7} {'erros':>6}")
+    try:
+        if "catalog" in args.only:
+            await h.cenario("catalog.list", lambda i: ("GET", "/produtos/", {}))
+            etag = (await h.client.get("/produtos/")).headers.get("etag", "")
+            await h.cenario("catalog.list_if_none_match", lambda i: (
+                "GET", "/produtos/", {"headers": {"If-None-Match": etag}}))
+            await h.cenario("catalog.item", lambda i: (
+                "GET", f"/produtos/{produto_ids[i % len(produto_ids)]}", {}))
+
+        # O histórico vem antes da criação de pedidos para que as páginas medidas
+        # contenham só pedidos semeados (mesmo formato em todas as profundidades).
+        if "history" in args.only:
+            for depth in args.depths:
+                seed_historico(SessionLocal, models, produto_ids, depth)
+                limit = args.page_size
+                cursor = cursor_ultima_pagina(SessionLocal, crud, pagination, depth, limit)
+                await h.cenario(f"orders.list.depth_{depth}.first", lambda i: (
+                    "GET", "/pedidos/", {"params": {"limit": limit}}))
+                await h.cenario(f"orders.list.depth_{depth}.last", lambda i: (
+                    "GET", "/pedidos/", {"params": {"limit": limit, "cursor": cursor}}))
+                await h.cenario(f"orders.resumo.depth_{depth}.last", lambda i: (
+                    "GET", "/pedidos/resumo/", {"params": {"limit": limit, "cursor": cursor}}))
+
+        if "orders" in args.only:
+            for size in args.cart_sizes:
+                def pedido(i, size=size):
+                    items = [
+                        {"produto_id": produto_ids[(i + j) % len(produto_ids)], "quantity": 1}
+                        for j in range(size)
+                    ]
+                    return "POST", "/pedidos/", {"json": {"items": items}}
+                await h.cenario(f"orders.create.cart_{size}", pedido)
+
+        if "mp" in args.only:
+            pref = {
+                "items": [{"title": "Chopp Pilsen 500ml", "quantity": 1, "unit_price": 12.9}],
+                "back_urls": {"success": "https://example.com/ok"},
+            }
+            await h.cenario("mp.create_preference", lambda i: (
+                "POST", "/mp/create_preference/", {"json": pref}))
+    finally:
+        await h.client.aclose()
+        await lifespan.__aexit__(None, None, None)
+        stub.shutdown()
+    return h.results
+
+
+def metadata(args) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+    }
+
+
+def comparar(atual: Dict[str, dict], arquivo: str, max_regression: float) -> bool:
+    """Imprime a variação de p95/throughput por cenário; retorna False se houver regressão."""
+    with open(arquivo, encoding="utf-8") as f:
+        base = json.load(f)
+    print(f"\nComparação com {arquivo} (commit {base['metadata'].get('commit')})")
+    print(f"{'cenário':<34} {'p95 base':>9} {'p95 agora':>9} {'Δ p95':>8} {'Δ req/s':>8}")
+    ok = True
+    for nome, r in atual.items():
+        b = base["results"].get(nome)
+        if b is None:
+            continue
+        delta_p95 = (r["p95_ms"] / b["p95_ms"] - 1.0) * 100.0 if b["p95_ms"] else 0.0
+        delta_rps = (r["throughput_rps"] / b["throughput_rps"] - 1.0) * 100.0 if b["throughput_rps"] else 0.0
+        marca = ""
+        if delta_p95 > max_regression:
+            ok = False
+            marca = "  <-- regressão"
+        print(f"{nome:<34} {b['p95_ms']:>9.2f} {r['p95_ms']:>9.2f} {delta_p95:>7.1f}% {delta_rps:>7.1f}%{marca}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", nargs="+", default=["catalog", "history", "orders", "mp"],
+                        choices=["catalog", "history", "orders", "mp"])
+    parser.add_argument("--requests", type=int, default=300, help="requests por cenário")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--catalog", type=int, default=200, help="produtos no catálogo")
+    parser.add_argument("--cart-sizes", type=int, nargs="+", default=[1, 10, 30])
+    parser.add_argument("--depths", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--mp-latency", type=float, default=0.02, help="latência do stub (s)")
+    parser.add_argument("--output", help="salva os resultados em JSON")
+    parser.add_argument("--compare", help="JSON de uma execução anterior")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="%% tolerado de piora no p95")
+    args = parser.parse_args()
+
+    results = asyncio.run(rodar(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"metadata": metadata(args), "results": results}, f, indent=2)
+        print(f"\nResultados salvos em {args.output}")
+    if args.compare and not comparar(results, args.compare, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# backend/scripts/import_catalog.py
+"""
+Importa (upsert) um catálogo de produtos de um arquivo CSV, JSON ou JSON Lines.
+
+O arquivo é lido em streaming e gravado em blocos (um statement e um commit por
+bloco); ao final imprime as contagens inserted/updated/unchanged/rejected e os
+primeiros erros de validação. Ver `backend/catalog_import.py`.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.import_catalog fornecedor.csv
+    python -m backend.scripts.import_catalog feed.jsonl --chunk-size 5000
+    cat feed.json | python -m backend.scripts.import_catalog - --format json --insert-only
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    from backend import catalog_import, database
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import catalog_import, database
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="arquivo do catálogo ('-' para stdin)")
+    parser.add_argument("--format", choices=["csv", "json", "jsonl"], help="padrão: pela extensão do arquivo")
+    parser.add_argument("--chunk-size", type=int, default=catalog_import.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--insert-only", action="store_true", help="não altera produtos que já existem")
+    args = parser.parse_args()
+
+    fmt = args.format or catalog_import.detect_format(filename=args.path)
+    if args.path == "-":
+        stream = catalog_import.open_text(sys.stdin.buffer)
+    else:
+        stream = open(args.path, encoding="utf-8-sig", newline="")
+
+    db = database.SessionLocal()
+    start = time.perf_counter()
+    try:
+        result = catalog_import.upsert_produtos(
+            db,
+            catalog_import.iter_rows(stream, fmt),
+            chunk_size=args.chunk_size,
+            update_existing=not args.insert_only,
+        )
+    except catalog_import.FormatoInvalidoError as e:
+        sys.exit(f"Arquivo inválido: {e}")
+    finally:
+        db.close()
+        stream.close()
+    elapsed = time.perf_counter() - start
+
+    for erro in result.errors:
+        print(f"linha {erro['row']} (id={erro['id']}): {erro['error']}", file=sys.stderr)
+    resumo = {k: v for k, v in result.as_dict().items() if k != "errors"}
+    print(json.dumps(resumo), f"em {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# backend/scripts/migrate.py
+"""
+Aplica as migrações pendentes do esquema (`backend/migrations.py`) no banco
+de `DATABASE_URL`. Rode antes de subir (ou reiniciar) os workers num deploy
+com mudança de esquema; em production os workers não sobem com o banco atrasado.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.migrate              # upgrade até a última versão
+    python -m backend.scripts.migrate upgrade --to 4
+    python -m backend.scripts.migrate status
+"""
+import argparse
+import os
+import sys
+
+try:
+    from backend import database, migrations
+except Exception:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    project_root = os.path.dirname(backend_dir)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from backend import database, migrations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("comando", nargs="?", choices=["upgrade", "status"], default="upgrade")
+    parser.add_argument("--to", type=int, help="para na versão indicada (padrão: a última)")
+    args = parser.parse_args()
+
+    engine = database.engine
+    atual = migrations.versao_atual(engine)
+    print(f"Banco: {engine.url.render_as_string(hide_password=True)}")
+    print(f"Versão atual: {atual if atual is not None else 'sem schema_version'} / última: {migrations.ULTIMA}")
+    if args.comando == "status":
+        for migracao in migrations.MIGRACOES:
+            marca = "x" if atual is not None and migracao.versao <= atual else " "
+            print(f"  [{marca}] {migracao.versao:>3} {migracao.nome}")
+        return
+
+    aplicadas = migrations.upgrade(engine, ate=args.to)
+    for migracao in aplicadas:
+        print(f"  aplicada {migracao.versao:>3} {migracao.nome}")
+    if not aplicadas:
+        print("  nada a aplicar")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# backend/scripts/mp_stub.py
+"""
+Stub local da API de preferências do Mercado Pago, para testes e benchmarks.
+
+Responde POST /checkout/preferences com um JSON parecido com o real e permite
+simular um upstream degradado: latência fixa + jitter, taxa de erros 5xx e
+travamento (nunca responde dentro do timeout).
+
+Uso (a partir da raiz do repositório):
+    python -m backend.scripts.mp_stub --port 8765 --latency 0.05 --error-rate 0.1
+
+e então, no backend:
+    MERCADO_PAGO_API_URL=http://127.0.0.1:8765 uvicorn backend.main:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubConfig:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, hang: bool = False):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.hang = hang
+        self.requests = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    config: StubConfig  # definido por make_server
+    protocol_version = "HTTP/1.1"  # keep-alive, como o servidor real
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # silencia o log por request
+        pass
+
+    def _send(self, status: int, body: dict) -> None:
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        cfg = self.config
+        cfg.requests += 1
+
+        if self.path.rstrip("/") != "/checkout/preferences":
+            return self._send(404, {"message": "not found"})
+        if cfg.hang:
+            time.sleep(3600)
+        time.sleep(cfg.latency + random.uniform(0, cfg.jitter))
+        if random.random() < cfg.error_rate:
+            return self._send(500, {"message": "internal_error"})
+
+        pref_id = f"stub-{uuid.uuid4().hex[:12]}"
+        self._send(201, {
+            "id": pref_id,
+            "items": payload.get("items"),
+            "external_reference": payload.get("external_reference"),
+            "init_point": f"https://www.mercadopago.com.br/checkout/v1/redirect?pref_id={pref_id}",
+            "sandbox_init_point": f"https://sandbox.mercadopago.com.br/checkout/v1/redirect?pref_id={pref_id}",
+        })
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # o padrão (5) derruba conexões sob concorrência
+
+
+def make_server(host: str = "127.0.0.1", port: int = 0, config: StubConfig = None) -> ThreadingHTTPServer:
+    """Cria o servidor (porta 0 = porta livre qualquer; veja `server.server_address`)."""
+    handler = type("StubHandler", (_Handler,), {"config": config or StubConfig()})
+    return _Server((host, port), handler)
+
+
+def start_in_thread(config: StubConfig = None) -> ThreadingHTTPServer:
+    """Sobe o stub em uma thread daemon e retorna o servidor (use `server.shutdown()`)."""
+    server = make_server(config=config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="segundos por resposta")
+    parser.add_argument("--jitter", type=float, default=0.0, help="atraso extra aleatório (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 500")
+    parser.add_argument("--hang", action="store_true", help="nunca responde")
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency, args.jitter, args.error_rate, args.hang)
+    server = make_server(args.host, args.port, config)
+    print(f"Stub do Mercado Pago em http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,7 @@ import sys
 # importar normalmente e, em caso de falha, inserimos o parent do diretório
 # scripts (o diretório `backend`) no sys.path.
 try:
-    from backend import crud, data, database, schemas
+    from backend import catalog_import, data, database
 except Exception:
     # Quando executado diretamente, adicionamos o diretório PAI do pacote
     # `backend` (ou seja, a raiz do repositório) ao sys.path.
@@ -25,26 +25,18 @@ except Exception:
     project_root = os.path.dirname(backend_dir)
     if project_root not in sys.path:
         sys.path.insert(0, project_root)
-    from backend import crud, data, database, schemas
+    from backend import catalog_import, data, database
 
 
 def main() -> None:
     db = database.SessionLocal()
     try:
-        count = 0
-        for prod in data.initial_produtos:
-            try:
-                prod_schema = schemas.ProdutoCreate(**prod)
-            except Exception as e:
-                print("Erro de validação para produto:", prod.get("id"), e)
-                continue
-
-            if crud.get_produto(db, produto_id=prod_schema.id) is None:
-                # Assinatura correta: create_produto(db, produto: schemas.ProdutoCreate)
-                crud.create_produto(db, prod_schema)
-                count += 1
-
-        print(f"{count} produtos adicionados.")
+        # Validação (schemas.ProdutoCreate) e gravação em lote; só insere os que faltam
+        result = catalog_import.upsert_produtos(db, data.initial_produtos, update_existing=False)
+        for erro in result.errors:
+            print("Erro de validação para produto:", erro["id"], erro["error"])
+
+        print(f"{result.inserted} produtos adicionados.")
     finally:
         db.close()
 
@@ -0,0 +1,174 @@
+"""
+Busca textual de produtos (nome e descrição) com índice SQLite FTS5.
+
+A tabela virtual `produtos_fts` indexa `produtos.name` e `produtos.description`
+com o tokenizer `unicode61 remove_diacritics 2`: "acai" encontra "Açaí" e
+"porcao" encontra "Porção". Cada termo da busca vira um prefixo ("bat" encontra
+"Batata", "batatas"), todos os termos precisam aparecer, e o resultado é
+ordenado por relevância (bm25, com o nome pesando mais que a descrição).
+
+O índice é de conteúdo externo (não duplica os textos) e é mantido por
+triggers de INSERT/UPDATE/DELETE em `produtos`, inclusive nos upserts em lote
+de `catalog_import`. `ensure_index` (migração `busca_fts5`) cria tabela e
+triggers e reconstrói o índice quando ele acabou de ser criado; na subida,
+`detecta_indice` só confere se ele existe; `rebuild` refaz tudo
+(necessário, por exemplo, após um VACUUM, que pode renumerar os rowids).
+
+Sem FTS5 (outros bancos ou SQLite compilado sem a extensão) a busca cai num
+LIKE em nome/descrição, sem ranking nem remoção de acentos.
+"""
+import logging
+import re
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.engine import Engine
+
+from backend import models, money
+
+_logger = logging.getLogger("uvicorn.error")
+
+MAX_TERMOS = 8
+
+# Peso das colunas no bm25 (name, description)
+_PESOS = (10.0, 2.0)
+
+_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS produtos_fts USING fts5(
+        name, description,
+        content='produtos', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS produtos_fts_ai AFTER INSERT ON produtos BEGIN
+        INSERT INTO produtos_fts(rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS produtos_fts_ad AFTER DELETE ON produtos BEGIN
+        INSERT INTO produtos_fts(produtos_fts, rowid, name, description)
+        VALUES ('delete', old.rowid, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS produtos_fts_au AFTER UPDATE OF name, description ON produtos BEGIN
+        INSERT INTO produtos_fts(produtos_fts, rowid, name, description)
+        VALUES ('delete', old.rowid, old.name, old.description);
+        INSERT INTO produtos_fts(rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END
+    """,
+)
+
+# Definido por ensure_index: o banco tem o índice FTS5 pronto
+fts_enabled = False
+
+
+def ensure_index(engine: Engine) -> bool:
+    """Cria o índice FTS5 e os triggers se faltarem. Retorna se a busca indexada está ativa."""
+    global fts_enabled
+    if engine.dialect.name != "sqlite":
+        fts_enabled = False
+        return False
+    try:
+        with engine.begin() as conn:
+            existia = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'produtos_fts'")
+            ).first() is not None
+            for ddl in _DDL:
+                conn.execute(text(ddl))
+            if not existia:
+                conn.execute(text("INSERT INTO produtos_fts(produtos_fts) VALUES ('rebuild')"))
+    except Exception as e:
+        # SQLite sem FTS5: segue com o LIKE
+        _logger.warning(f"Índice FTS5 indisponível, busca de produtos via LIKE: {e}")
+        fts_enabled = False
+        return False
+    fts_enabled = True
+    return True
+
+
+def detecta_indice(engine: Engine) -> bool:
+    """Só confere se o índice existe (criado pela migração `busca_fts5`), sem DDL. Usado na subida."""
+    global fts_enabled
+    if engine.dialect.name != "sqlite":
+        fts_enabled = False
+        return False
+    with engine.connect() as conn:
+        fts_enabled = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'produtos_fts'")
+        ).first() is not None
+    return fts_enabled
+
+
+def rebuild(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO produtos_fts(produtos_fts) VALUES ('rebuild')"))
+
+
+def termos(q: str) -> List[str]:
+    """Palavras da busca (letras/dígitos), sem a sintaxe do FTS5 que o usuário possa digitar."""
+    return re.findall(r"\w+", q.lower())[:MAX_TERMOS]
+
+
+def match_expression(q: str) -> Optional[str]:
+    """'bat frit' -> '"bat"* "frit"*' (todos os termos, como prefixo). None se não há termos."""
+    palavras = termos(q)
+    if not palavras:
+        return None
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+
+def statement_busca(
+    q: str,
+    category: Optional[str] = None,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    skip: int = 0,
+    limit: int = 100,
+):
+    """
+    SELECT dos IDs dos produtos que casam com `q`, já filtrados e na ordem de relevância.
+    Retorna None quando a busca não tem termos (nada casa).
+    """
+    filtros = []
+    params = {"skip": skip, "limit": limit}
+    if category is not None:
+        filtros.append("p.category = :category")
+        params["category"] = category
+    if min_price is not None:
+        filtros.append("p.price >= :min_price")
+        params["min_price"] = money.centavos(min_price)
+    if max_price is not None:
+        filtros.append("p.price <= :max_price")
+        params["max_price"] = money.centavos(max_price)
+
+    if fts_enabled:
+        expressao = match_expression(q)
+        if expressao is None:
+            return None
+        params["match"] = expressao
+        where = " AND ".join(["produtos_fts MATCH :match", *filtros])
+        rank = f"bm25(produtos_fts, {_PESOS[0]}, {_PESOS[1]})"
+        return text(
+            f"SELECT p.id FROM produtos_fts JOIN produtos AS p ON p.rowid = produtos_fts.rowid "
+            f"WHERE {where} ORDER BY {rank}, p.id LIMIT :limit OFFSET :skip"
+        ).bindparams(**params)
+
+    palavras = termos(q)
+    if not palavras:
+        return None
+    stmt = select(models.Produto.id)
+    for palavra in palavras:
+        padrao = f"%{palavra}%"
+        stmt = stmt.where(or_(models.Produto.name.ilike(padrao), models.Produto.description.ilike(padrao)))
+    if category is not None:
+        stmt = stmt.where(models.Produto.category == category)
+    if min_price is not None:
+        stmt = stmt.where(models.Produto.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(models.Produto.price <= max_price)
+    return stmt.order_by(models.Produto.name, models.Produto.id).offset(skip).limit(limit)
@@ -0,0 +1,55 @@
+"""Arquivo morto (`backend/arquivo.py`): onde ele fica e a leitura dos pedidos arquivados."""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import dataclasses  # noqa: E402
+from datetime import datetime, timedelta  # noqa: E402
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine, func, select, update  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from backend import arquivo, crud, migrations, models, reports, schemas  # noqa: E402
+from backend.scripts import _bench  # noqa: E402
+
+
+@pytest.mark.parametrize("url", ["sqlite://", "sqlite:///:memory:", "postgresql://choperia@db/choperia"])
+def test_banco_principal_sem_arquivo_nao_tem_arquivo_padrao(url, monkeypatch):
+    monkeypatch.delenv("ARCHIVE_DATABASE_URL", raising=False)
+    monkeypatch.setenv("ARCHIVE_ENABLED", "1")
+    monkeypatch.setattr(arquivo.database.settings, "url", url)
+    morto = arquivo.ArquivoMorto(arquivo.ArquivoSettings.from_env())
+    assert morto.settings.url is None and not morto.ativo
+    assert morto.get_pedido(1) is None and list(morto.itens_vendidos()) == []
+    with pytest.raises(RuntimeError):
+        morto.engine()
+
+
+def test_pedido_arquivado_continua_legivel_e_no_rebuild(tmp_path, monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    migrations.upgrade(engine)
+    url = f"sqlite:///{tmp_path / 'arquivo.db'}"
+    morto = arquivo.ArquivoMorto(dataclasses.replace(arquivo.morto.settings, url=url))
+    monkeypatch.setattr(arquivo, "morto", morto)
+    with _bench.make_session_factory(engine)() as db:
+        [produto_id] = _bench.seed_produtos(db, 1)
+        ids = [
+            crud.create_pedido(db, schemas.PedidoCreate(items=[schemas.CartItem(produto_id=produto_id, quantity=2)])).id
+            for _ in range(2)
+        ]
+        db.execute(update(models.Pedido).values(status="delivered", pedido_date=datetime.utcnow() - timedelta(days=200)))
+        db.commit()
+
+        # O de maior id fica no banco principal
+        assert morto.arquiva(db) == 1
+        assert db.scalar(select(func.count()).select_from(models.Pedido)) == 1
+        arquivado = morto.get_pedido(ids[0])
+        assert arquivado.status == "delivered" and arquivado.items[0].quantity == 2
+
+        reports.rebuild(db)
+        assert db.scalar(select(func.sum(models.VendaAgregada.quantity)).where(
+            models.VendaAgregada.periodo == reports.DIA)) == 4
+    morto.dispose()
+    engine.dispose()
+    assert (tmp_path / "arquivo.db").exists()
@@ -0,0 +1,38 @@
+"""Cancelar um pedido desconta dos agregados pelo mesmo job da venda (`reports.JOB_ACUMULA`)."""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, func, select  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from backend import crud, jobs, migrations, models, reports, schemas  # noqa: E402
+from backend.scripts import _bench  # noqa: E402
+
+
+def test_venda_e_estorno_passam_pelo_job_de_acumulo(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    migrations.upgrade(engine)
+    submetidos = []
+    submit = jobs.queue.submit
+
+    def espia(db, nome, payload):
+        submetidos.append((nome, payload))
+        submit(db, nome, payload)  # fila parada: roda na transação, como sem workers
+
+    monkeypatch.setattr(jobs.queue, "submit", espia)
+    with _bench.make_session_factory(engine)() as db:
+        produto_ids = _bench.seed_produtos(db, 2)
+        pedido = crud.create_pedido(db, schemas.PedidoCreate(items=[
+            schemas.CartItem(produto_id=produto_ids[0], quantity=2),
+            schemas.CartItem(produto_id=produto_ids[1], quantity=1),
+        ]))
+        [resultado] = crud.transiciona_status(db, [pedido.id], "cancelled")
+        assert resultado["result"] == "updated"
+
+        assert [nome for nome, _ in submetidos] == [reports.JOB_ACUMULA, reports.JOB_ACUMULA]
+        estorno = submetidos[1][1]["linhas"]
+        assert estorno and all(linha["quantity"] < 0 for linha in estorno)
+        for coluna in (models.VendaAgregada.quantity, models.VendaAgregada.revenue, models.VendaAgregada.pedidos):
+            assert db.scalar(select(func.sum(coluna))) == 0
+    engine.dispose()
@@ -0,0 +1,28 @@
+"""PUT /produtos/{id}/estoque sem `stock_min` mantém o limite de estoque baixo."""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from backend import main, migrations, schemas  # noqa: E402
+from backend.scripts import _bench  # noqa: E402
+
+
+def test_put_sem_stock_min_mantem_o_limite():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    migrations.upgrade(engine)
+    with _bench.make_session_factory(engine)() as db:
+        [produto_id] = _bench.seed_produtos(db, 1)
+        update = schemas.EstoqueUpdate.model_validate
+        inicial = update({"stock": 50000, "stock_per_unit": 500, "stock_min": 5000})
+        assert main.update_estoque(produto_id, inicial, db).stock_min == 5000
+
+        # Barril novo: só o estoque
+        atual = main.update_estoque(produto_id, update({"stock": 50000, "stock_per_unit": 500}), db)
+        assert (atual.stock, atual.stock_min) == (50000, 5000)
+
+        # Explícito: null remove o limite
+        assert main.update_estoque(produto_id, update({"stock": 40000, "stock_min": None}), db).stock_min is None
+    engine.dispose()
@@ -0,0 +1,31 @@
+"""Limite do store de idempotência quando todas as entradas estão em andamento."""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+
+from backend import idempotency  # noqa: E402
+
+
+def test_store_cheio_de_execucoes_em_andamento_recusa_chave_nova():
+    store = idempotency.IdempotencyStore(max_entries=2)
+    em_andamento = [store._begin(("pedidos", f"k{i}"), "fp") for i in range(2)]
+    assert all(dono for _, dono in em_andamento)
+
+    with pytest.raises(HTTPException) as erro:
+        store._begin(("pedidos", "k-nova"), "fp")
+    assert erro.value.status_code == 503
+    assert erro.value.headers["Retry-After"] == "1"
+    assert store.stats()["keys"] == 2
+
+    # Uma repetição de chave existente continua sendo atendida (espera/replay)
+    entry, dono = store._begin(("pedidos", "k0"), "fp")
+    assert not dono
+
+    # Quando uma termina, ela pode ser descartada e a chave nova entra
+    store._finish(("pedidos", "k0"), entry, idempotency.StoredResponse(201, {"id": 1}))
+    _, dono = store._begin(("pedidos", "k-nova"), "fp")
+    assert dono
+    assert store.stats()["keys"] == 2
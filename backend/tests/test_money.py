@@ -0,0 +1,32 @@
+"""Entrada de `schemas.Dinheiro`: arredondada para o centavo, não recusada."""
+import os
+from decimal import Decimal
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest  # noqa: E402
+from pydantic import TypeAdapter, ValidationError  # noqa: E402
+
+from backend import schemas  # noqa: E402
+
+dinheiro = TypeAdapter(schemas.Dinheiro)
+
+
+@pytest.mark.parametrize("entrada, esperado", [
+    ("10.555", Decimal("10.56")),
+    (0.1 + 0.2, Decimal("0.30")),
+    (12.9, Decimal("12.90")),
+    (7, Decimal("7.00")),
+])
+def test_arredonda_para_o_centavo(entrada, esperado):
+    assert dinheiro.validate_python(entrada) == esperado
+
+
+def test_json_continua_numero_em_reais():
+    assert dinheiro.dump_json(dinheiro.validate_python(12.9)) == b"12.9"
+
+
+@pytest.mark.parametrize("entrada", ["abc", "NaN", float("inf")])
+def test_recusa_o_que_nao_e_valor(entrada):
+    with pytest.raises(ValidationError):
+        dinheiro.validate_python(entrada)
@@ -0,0 +1,106 @@
+"""
+Circuit breaker do cliente do Mercado Pago: a chamada de teste do half-open
+sempre termina registrada, inclusive quando é cancelada ou a resposta 2xx
+não é JSON (senão todo checkout seguinte falharia com CircuitOpenError).
+"""
+import asyncio
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from backend import payments  # noqa: E402
+
+
+class _Upstream:
+    """Mercado Pago falso; `handler` pode ser trocado entre as chamadas."""
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        return await self.handler(request)
+
+
+def _cliente(upstream: _Upstream) -> payments.MercadoPagoClient:
+    client = payments.MercadoPagoClient(payments.MercadoPagoSettings(
+        base_url="http://mp", max_retries=0, breaker_threshold=1, breaker_reset=0.0, rate_limit=0,
+    ))
+    client._http = lambda: httpx.AsyncClient(base_url="http://mp", transport=httpx.MockTransport(upstream))
+    # Circuito aberto há mais que `breaker_reset`: a próxima chamada é a de teste (half-open)
+    client.breaker.record_failure()
+    assert client.breaker.state == "half-open"
+    return client
+
+
+def _responde(status_code: int, **kwargs):
+    async def handler(request):
+        return httpx.Response(status_code, **kwargs)
+    return handler
+
+
+def test_trial_cancelado_libera_o_half_open():
+    async def trava(request):
+        await asyncio.sleep(10)
+
+    async def cenario():
+        upstream = _Upstream(trava)
+        client = _cliente(upstream)
+        tarefa = asyncio.create_task(client.create_preference("TOKEN", {}))
+        await asyncio.sleep(0.05)
+        tarefa.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarefa
+        upstream.handler = _responde(201, json={"id": "pref-1"})
+        assert await client.create_preference("TOKEN", {}) == {"id": "pref-1"}
+        assert client.breaker.state == "closed"
+
+    asyncio.run(cenario())
+
+
+def test_2xx_sem_json_vira_502_e_libera_o_half_open():
+    async def cenario():
+        upstream = _Upstream(_responde(200, text="<html>manutenção</html>"))
+        client = _cliente(upstream)
+        with pytest.raises(payments.MercadoPagoError) as erro:
+            await client.create_preference("TOKEN", {})
+        assert erro.value.status_code == 502
+        assert not isinstance(erro.value, payments.CircuitOpenError)
+        # Não ficou preso: a próxima chamada é uma nova chamada de teste, não CircuitOpenError
+        upstream.handler = _responde(201, json={"id": "pref-2"})
+        assert await client.create_preference("TOKEN", {}) == {"id": "pref-2"}
+
+    asyncio.run(cenario())
+
+
+def test_circuito_aberto_nao_gasta_cota():
+    async def cenario():
+        client = payments.MercadoPagoClient(payments.MercadoPagoSettings(
+            base_url="http://mp", breaker_threshold=1, breaker_reset=60.0, rate_limit=1, rate_burst=1,
+        ))
+        client.breaker.record_failure()
+        for _ in range(3):
+            with pytest.raises(payments.CircuitOpenError):
+                await client.create_preference("TOKEN", {})
+        # A única ficha da cota continua lá: reservá-la não espera nada
+        assert client.quota.reserve(0.0) == 0
+
+    asyncio.run(cenario())
+
+
+def test_sem_cota_no_half_open_libera_a_chamada_de_teste():
+    async def cenario():
+        upstream = _Upstream(_responde(201, json={"id": "pref-3"}))
+        client = _cliente(upstream)
+        client.settings.rate_max_wait = 0.0
+        client.quota = payments.ratelimit.TokenBucket(1, 0.001)
+        client.quota.reserve(0.0)  # gasta a única ficha
+        with pytest.raises(payments.RateLimitedError):
+            await client.create_preference("TOKEN", {})
+        # A chamada de teste não saiu: o half-open segue livre para a próxima
+        client.quota = None
+        assert await client.create_preference("TOKEN", {}) == {"id": "pref-3"}
+
+    asyncio.run(cenario())
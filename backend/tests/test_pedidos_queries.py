@@ -0,0 +1,69 @@
+"""
+Guarda de regressão contra N+1 na leitura de pedidos: o número de statements
+de uma página não pode crescer com o tamanho da página (mesmos limites de
+`bench_list_pedidos.MAX_QUERIES`).
+"""
+import os
+
+# O backend lê a configuração ao importar: nada aqui pode tocar o choperia.db
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from backend import crud, migrations, schemas  # noqa: E402
+from backend.scripts import _bench  # noqa: E402
+
+PEDIDOS = 100
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    migrations.upgrade(engine)
+    with _bench.make_session_factory(engine)() as db:
+        produto_ids = _bench.seed_produtos(db, 20)
+        for i in range(PEDIDOS):
+            cart = [schemas.CartItem(produto_id=produto_ids[(i + j) % len(produto_ids)], quantity=1) for j in range(3)]
+            crud.create_pedido(db, schemas.PedidoCreate(items=cart))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    with _bench.make_session_factory(engine)() as db:
+        yield db
+
+
+def _conta(engine, fn) -> int:
+    with _bench.count_queries(engine) as counter:
+        fn()
+    return counter.count
+
+
+@pytest.mark.parametrize("limit", [1, 100])
+def test_get_pedidos_sem_n_mais_1(engine, db, limit):
+    def pagina():
+        pedidos = crud.get_pedidos(db, limit=limit)
+        assert len(pedidos) == limit
+        # A serialização toca os itens: é onde o lazy-load aparecia
+        [schemas.Pedido.model_validate(p) for p in pedidos]
+
+    assert _conta(engine, pagina) <= 2
+
+
+@pytest.mark.parametrize("limit", [1, 100])
+def test_get_pedido_sem_n_mais_1(engine, db, limit):
+    assert _conta(engine, lambda: schemas.Pedido.model_validate(crud.get_pedido(db, pedido_id=limit))) <= 2
+
+
+@pytest.mark.parametrize("limit", [1, 100])
+def test_get_pedidos_resumo_uma_query(engine, db, limit):
+    def pagina():
+        pedidos = crud.get_pedidos_resumo(db, limit=limit)
+        assert len(pedidos) == limit
+        [schemas.PedidoResumo.model_validate(p) for p in pedidos]
+
+    assert _conta(engine, pagina) == 1
@@ -0,0 +1,34 @@
+"""Jobs `reports.JOB_ACUMULA` ainda na fila durante um `reports.rebuild` não contam o pedido duas vezes."""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, func, select  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from backend import crud, jobs, migrations, models, reports, schemas  # noqa: E402
+from backend.scripts import _bench  # noqa: E402
+
+
+def test_job_de_antes_do_rebuild_vira_no_op(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    migrations.upgrade(engine)
+    na_fila = []
+    monkeypatch.setattr(jobs.queue, "submit", lambda db, nome, payload: na_fila.append(payload))
+    with _bench.make_session_factory(engine)() as db:
+        produto_ids = _bench.seed_produtos(db, 1)
+        item = schemas.CartItem(produto_id=produto_ids[0], quantity=3)
+        crud.create_pedido(db, schemas.PedidoCreate(items=[item]))
+        reports.rebuild(db)
+        crud.create_pedido(db, schemas.PedidoCreate(items=[item]))
+
+        # Os dois jobs rodam só agora: o do primeiro pedido já foi contado pelo rebuild
+        for payload in na_fila:
+            reports._acumula_job(db, payload)
+            db.commit()
+        assert reports.geracao(db) == 1
+        dias = db.scalars(select(models.VendaAgregada).where(models.VendaAgregada.periodo == reports.DIA)).all()
+        assert sum(bucket.quantity for bucket in dias) == 6
+        assert db.scalar(select(func.sum(models.VendaAgregada.pedidos)).where(
+            models.VendaAgregada.periodo == reports.DIA)) == 2
+    engine.dispose()
@@ -0,0 +1,34 @@
+"""Filtros `date_from`/`date_to` dos relatórios com e sem fuso na mesma consulta."""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from datetime import datetime, timedelta, timezone  # noqa: E402
+from decimal import Decimal  # noqa: E402
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from backend import migrations, reports  # noqa: E402
+from backend.scripts import _bench  # noqa: E402
+
+
+def test_intervalo_misturando_com_e_sem_fuso_usa_utc():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    migrations.upgrade(engine)
+    with _bench.make_session_factory(engine)() as db:
+        item = {"produto_id": "p1", "produto_name": "Chopp Pilsen", "unit_price": Decimal("10.00"), "quantity": 2}
+        reports.acumula(db, reports.linhas_de_venda(datetime(2026, 3, 10, 21, 30), [item], {}))
+        db.commit()
+
+        # 18h em São Paulo = 21h UTC: a venda das 21h30 UTC entra; até 21h UTC, não
+        brt = timezone(timedelta(hours=-3))
+        dentro = dict(date_from=datetime(2026, 3, 10, 18, tzinfo=brt), date_to=datetime(2026, 3, 10, 22))
+        fora = dict(date_from=datetime(2026, 3, 10, 12), date_to=datetime(2026, 3, 10, 18, tzinfo=brt))
+
+        assert [v["quantity"] for v in reports.vendas_por_produto(db, **dentro)] == [2]
+        assert reports.vendas_por_produto(db, **fora) == []
+        assert [v["inicio"] for v in reports.serie(db, reports.HORA, **dentro)] == [datetime(2026, 3, 10, 21)]
+        assert reports.serie(db, reports.HORA, **fora) == []
+        assert [v["quantity"] for v in reports.serie(db, reports.DIA, **dentro)] == [2]
+    engine.dispose()
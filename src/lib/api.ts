@@ -3,6 +3,21 @@
 // Em produção: usa VITE_API_URL (configurado no Render)
 export const API_URL = import.meta.env.VITE_API_URL || "http://127.0.0.1:8000";
 
+// Id deste aparelho (tablet da mesa), enviado em X-Table-Id: o backend aplica o
+// rate limit por aparelho, já que os tablets de um bar saem pelo mesmo IP
+function getTableId(): string {
+    try {
+        let id = localStorage.getItem("tableId");
+        if (!id) {
+            id = crypto.randomUUID();
+            localStorage.setItem("tableId", id);
+        }
+        return id;
+    } catch {
+        return "";
+    }
+}
+
 // Funções auxiliares para chamadas à API
 export async function fetchApi(endpoint: string, options: RequestInit = {}) {
     const url = `${API_URL}${endpoint}`;
@@ -10,6 +25,7 @@ export async function fetchApi(endpoint: string, options: RequestInit = {}) {
         ...options,
         headers: {
             "Content-Type": "application/json",
+            "X-Table-Id": getTableId(),
             ...options.headers,
         },
     });